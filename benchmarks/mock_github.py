@@ -0,0 +1,691 @@
+"""Local stand-in for the parts of the GitHub REST and GraphQL APIs the scripts use.
+
+Serves synthetic repositories and a ProjectV2 from memory, with optional
+per-request latency, a primary rate limit per token and resource and a
+secondary limit on content-creating requests. It also issues GitHub App
+installation tokens, accepting any JWT. Every request is counted per endpoint
+so benchmarks can report calls per item.
+"""
+import hashlib
+import json
+import random
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+STATUS_OPTIONS = ["Todo", "In Progress", "Blocked", "Done"]
+PRIORITY_OPTIONS = ["P0", "P1", "P2"]
+SIZE_OPTIONS = ["XS", "S", "M", "L", "XL"]
+ITERATIONS = [f"Sprint {n}" for n in range(1, 7)]
+LABELS = ["bug", "enhancement", "documentation", "question", "infra"]
+USERS = ["alice", "bob", "carol", "dave"]
+
+
+def _timestamp(offset):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1_600_000_000 + offset))
+
+
+class MockGitHub:
+    """In-memory GitHub state plus the rate-limit and latency simulation."""
+
+    def __init__(self, latency=0.0, rate_limit=5000, rate_window=3600, content_per_minute=None, installations=(1,),
+                 token_ttl=3600, item_visible_after=0.0, git_root=None, installation_accounts=None):
+        self.latency = latency
+        self.item_visible_after = item_visible_after  # Seconds before a new project item accepts field updates
+        self.git_root = git_root  # Directory of bare repos, <owner>/<repo>.git, backing each repo's branches
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.content_per_minute = content_per_minute
+        self.repos = {}
+        self.projects = {}
+        self.node_index = {}
+        self.comments = {}  # Issue or PR node ID -> comments, oldest first
+        self.calls = Counter()
+        self.bytes_sent = 0
+        self.budgets = {}
+        self.content_times = []
+        self.installations = list(installations)
+        # Account login -> installation ID; other accounts belong to the first installation
+        self.installation_accounts = dict(installation_accounts or {})
+        self.token_ttl = token_ttl
+        self.installation_tokens = {}  # Token -> expiry time
+        self.lock = threading.RLock()
+
+    # Synthetic data
+
+    def repo(self, full_name):
+        """Return a repository, creating an empty one on first use."""
+        with self.lock:
+            if full_name not in self.repos:
+                self.repos[full_name] = {
+                    "issues": {},
+                    "next_number": 1,
+                    "branches": {"main"},
+                    "labels": {},
+                }
+            return self.repos[full_name]
+
+    def project(self, project_id):
+        """Return a project with the standard fields, creating it on first use."""
+        with self.lock:
+            if project_id not in self.projects:
+                fields = [
+                    {"__typename": "ProjectV2Field", "id": f"{project_id}_F_title", "name": "Title", "dataType": "TITLE"},
+                ]
+                for name, options in (("Status", STATUS_OPTIONS), ("Priority", PRIORITY_OPTIONS), ("Size", SIZE_OPTIONS)):
+                    fields.append({
+                        "__typename": "ProjectV2SingleSelectField",
+                        "id": f"{project_id}_F_{name}",
+                        "name": name,
+                        "dataType": "SINGLE_SELECT",
+                        "options": [{"id": f"{project_id}_O_{name}_{n}", "name": option} for n, option in enumerate(options)],
+                    })
+                fields.append({
+                    "__typename": "ProjectV2IterationField",
+                    "id": f"{project_id}_F_Iteration",
+                    "name": "Iteration",
+                    "dataType": "ITERATION",
+                    "configuration": {"iterations": [
+                        {"id": f"{project_id}_IT_{n}", "title": title, "startDate": f"2024-01-{n + 1:02d}"}
+                        for n, title in enumerate(ITERATIONS)
+                    ]},
+                })
+                self.projects[project_id] = {"fields": fields, "items": [], "next_item": 1}
+            return self.projects[project_id]
+
+    def add_item(self, full_name, number, body="", title="", **fields):
+        """Create an issue or PR in a repository and return it."""
+        repo = self.repo(full_name)
+        with self.lock:
+            if number is None:
+                number = repo["next_number"]
+            repo["next_number"] = max(repo["next_number"], number + 1)
+            owner, name = full_name.split("/")
+            item = {
+                "number": number,
+                "node_id": f"N_{full_name}_{number}",
+                "title": title or f"Item {number}",
+                "body": body,
+                "state": "open",
+                "labels": [],
+                "assignees": [],
+                "user": {"login": "ghost"},
+                "comments": 0,
+                "created_at": _timestamp(number * 60),
+                "updated_at": _timestamp(number * 60),
+                "html_url": f"https://github.com/{full_name}/issues/{number}",
+                "repository_url": f"https://api.github.com/repos/{owner}/{name}",
+            }
+            item.update(fields)
+            repo["issues"][number] = item
+            self.node_index[item["node_id"]] = (full_name, number)
+            return item
+
+    def generate(self, full_name, project_id, issues=100, prs=20, seed=1, comments=0):
+        """Fill a repository with synthetic issues and PRs placed in a project.
+
+        Each item gets between 0 and `comments` comments.
+        """
+        rng = random.Random(seed)
+        project = self.project(project_id)
+        repo = self.repo(full_name)
+        for name in LABELS:
+            repo["labels"][name] = {"name": name, "color": f"{rng.randrange(0xFFFFFF):06x}", "description": f"{name} label"}
+
+        numbers = list(range(1, issues + prs + 1))
+        pr_numbers = set(rng.sample(numbers, prs))
+        for number in numbers:
+            item = self.add_item(
+                full_name,
+                number,
+                title=f"Synthetic item {number}",
+                body=f"Body of item {number}\n" + "lorem ipsum " * rng.randrange(1, 40),
+                state=rng.choice(["open", "closed"]),
+                labels=[dict(repo["labels"][name]) for name in rng.sample(LABELS, rng.randrange(0, 3))],
+                assignees=[{"login": login} for login in rng.sample(USERS, rng.randrange(0, 2))],
+                updated_at=_timestamp(number * 60 + rng.randrange(10_000_000)),
+            )
+            if comments:
+                for n in range(rng.randrange(comments + 1)):
+                    self.add_comment(item, rng.choice(USERS), f"Comment {n + 1} on item {number}")
+            if number in pr_numbers:
+                branch = f"feature/{number}"
+                repo["branches"].add(branch)
+                item["pull_request"] = {"url": f"https://api.github.com/repos/{full_name}/pulls/{number}"}
+                item["head"] = {"ref": branch}
+                item["base"] = {"ref": "main"}
+                item["merged_at"] = None
+                continue
+
+            with self.lock:
+                values = {
+                    "Status": rng.choice(STATUS_OPTIONS),
+                    "Priority": rng.choice(PRIORITY_OPTIONS),
+                    "Size": rng.choice(SIZE_OPTIONS),
+                }
+                iteration = rng.choice(project["fields"][-1]["configuration"]["iterations"])
+                values["Iteration"] = {"iterationId": iteration["id"], "title": iteration["title"],
+                                       "startDate": iteration["startDate"]}
+                self._add_project_item(project_id, item["node_id"], values)
+
+    def add_comment(self, item, author, body):
+        """Append a comment to an issue or PR and return it."""
+        with self.lock:
+            thread = self.comments.setdefault(item["node_id"], [])
+            comment = {
+                "author": {"login": author},
+                "body": body,
+                "createdAt": _timestamp(item["number"] * 60 + len(thread)),
+                "url": f"{item['html_url']}#issuecomment-{len(thread) + 1}",
+            }
+            thread.append(comment)
+            item["comments"] = len(thread)
+            return comment
+
+    def branches(self, full_name):
+        """Return a repository's branch names, from its bare repo under `git_root` if there is one."""
+        path = os.path.join(self.git_root or "", f"{full_name}.git")
+        if not self.git_root or not os.path.isdir(path):
+            return self.repo(full_name)["branches"]
+        refs = subprocess.run(["git", "for-each-ref", "--format=%(refname:short)", "refs/heads"], cwd=path,
+                              capture_output=True, text=True, check=True).stdout
+        return set(refs.split())
+
+    def _add_project_item(self, project_id, node_id, values=None):
+        project = self.project(project_id)
+        with self.lock:
+            for item in project["items"]:
+                if item["content"] == node_id:
+                    return item
+            item = {"id": f"PVTI_{project_id}_{project['next_item']}", "content": node_id, "values": values or {},
+                    "added": time.time()}
+            project["next_item"] += 1
+            project["items"].append(item)
+            self.node_index[item["id"]] = (project_id, item)
+            return item
+
+    # Rate limits
+
+    def budget(self, token, resource):
+        """Return the budget of one token and resource, starting a new window when the last one ended."""
+        now = time.time()
+        with self.lock:
+            budget = self.budgets.get((token, resource))
+            if not budget or now >= budget["reset"]:
+                budget = self.budgets[(token, resource)] = {"remaining": self.rate_limit,
+                                                            "reset": int(now + self.rate_window)}
+            return budget
+
+    def charge(self, token, resource, creates_content):
+        """Spend one request of a token's budget. Returns an error response tuple when a limit is hit."""
+        now = time.time()
+        with self.lock:
+            if self.installation_tokens.get(token, now + 1) <= now:
+                return 401, {"message": "Bad credentials"}, {}
+            budget = self.budget(token, resource)
+            headers = {
+                "X-RateLimit-Limit": str(self.rate_limit),
+                "X-RateLimit-Resource": resource,
+                "X-RateLimit-Reset": str(budget["reset"]),
+            }
+
+            if budget["remaining"] <= 0:
+                headers["X-RateLimit-Remaining"] = "0"
+                return 403, {"message": "API rate limit exceeded"}, headers
+
+            if creates_content and self.content_per_minute:
+                self.content_times = [t for t in self.content_times if now - t < 60]
+                if len(self.content_times) >= self.content_per_minute:
+                    headers["X-RateLimit-Remaining"] = str(budget["remaining"])
+                    headers["Retry-After"] = str(int(60 - (now - self.content_times[0])) + 1)
+                    return 403, {"message": "You have exceeded a secondary rate limit"}, headers
+                self.content_times.append(now)
+
+            budget["remaining"] -= 1
+            headers["X-RateLimit-Remaining"] = str(budget["remaining"])
+            return None, None, headers
+
+    def rate_limit_status(self, token=None):
+        with self.lock:
+            resources = {}
+            for resource in ("core", "graphql"):
+                budget = self.budget(token, resource)
+                resources[resource] = {"limit": self.rate_limit, "remaining": budget["remaining"],
+                                       "reset": budget["reset"], "used": self.rate_limit - budget["remaining"]}
+            return {"resources": resources}
+
+    def issue_token(self, installation_id):
+        """Mint an installation token, as POST /app/installations/{id}/access_tokens does."""
+        with self.lock:
+            token = f"ghs_{installation_id}_{len(self.installation_tokens) + 1}"
+            expires = time.time() + self.token_ttl
+            self.installation_tokens[token] = expires
+            return {"token": token, "expires_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(expires))}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    github = None  # Set by serve()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def _dispatch(self, method):
+        github = self.github
+        url = urlparse(self.path)
+        query = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"null") if length else None
+
+        if github.latency:
+            time.sleep(github.latency)
+
+        if url.path == "/graphql":
+            resource = "graphql"
+            creates_content = (payload or {}).get("query", "").lstrip().startswith("mutation")
+        else:
+            resource = "core"
+            creates_content = method != "GET"
+
+        authorization = self.headers.get("Authorization", "")
+        token = authorization.split(" ", 1)[-1] if authorization else None
+
+        if url.path.startswith("/app/") or re.fullmatch(r"/repos/[^/]+/[^/]+/installation", url.path):
+            return self._app(method, url.path, token)
+
+        if url.path == "/rate_limit":
+            return self._send(200, github.rate_limit_status(token), {})
+
+        status, body, headers = github.charge(token, resource, creates_content)
+        if status is not None:
+            with github.lock:
+                github.calls[f"{status} rate limited"] += 1
+            return self._send(status, body, headers)
+
+        try:
+            if resource == "graphql":
+                name, body = handle_graphql(github, payload["query"], payload.get("variables") or {}, token)
+                with github.lock:
+                    github.calls[f"graphql {name}"] += 1
+                return self._send(200, body, headers)
+
+            route, status, body, extra = handle_rest(github, method, url.path, query, payload, self)
+        except KeyError as e:
+            route, status, body, extra = f"{method} {url.path}", 404, {"message": f"Not Found: {e}"}, {}
+
+        with github.lock:
+            github.calls[route] += 1
+
+        headers.update(extra)
+        if method == "GET" and status == 200:
+            etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                with github.lock:
+                    # Conditional hits are free on GitHub
+                    github.budget(token, resource)["remaining"] += 1
+                return self._send(304, None, headers)
+        return self._send(status, body, headers)
+
+    def _app(self, method, path, jwt):
+        """Serve the GitHub App endpoints used to find installations and mint their tokens."""
+        github = self.github
+        with github.lock:
+            github.calls[f"{method} {re.sub(r'/[0-9]+', '/{id}', path)}"] += 1
+        if not jwt:
+            return self._send(401, {"message": "A JSON web token could not be decoded"}, {})
+
+        match = re.fullmatch(r"/repos/([^/]+)/[^/]+/installation", path)
+        if method == "GET" and match:
+            owner = match.group(1)
+            installation_id = github.installation_accounts.get(owner, github.installations[0])
+            return self._send(200, {"id": installation_id, "account": {"login": owner}}, {})
+
+        match = re.fullmatch(r"/app/installations/(\d+)/access_tokens", path)
+        if method == "POST" and match and int(match.group(1)) in github.installations:
+            return self._send(201, github.issue_token(int(match.group(1))), {})
+        return self._send(404, {"message": "Not Found"}, {})
+
+    def _send(self, status, body, headers):
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.github.lock:
+            self.github.bytes_sent += len(data)
+
+    def page_link(self, path, query, page):
+        base = f"http://{self.headers['Host']}{path}"
+        return f'<{base}?{urlencode(dict(query, page=page))}>; rel="next"'
+
+
+def _paged(handler, path, query, items):
+    per_page = int(query.get("per_page", 30))
+    page = int(query.get("page", 1))
+    chunk = items[(page - 1) * per_page:page * per_page]
+    headers = {}
+    if page * per_page < len(items):
+        headers["Link"] = handler.page_link(path, query, page + 1)
+    return chunk, headers
+
+
+def _public(item):
+    return {key: value for key, value in item.items() if key not in ("head", "base", "merged_at")}
+
+
+def handle_rest(github, method, path, query, payload, handler):
+    """Serve one REST call. Returns (route, status, body, headers)."""
+    match = re.fullmatch(r"/repos/([^/]+)/([^/]+)(/.*)?", path)
+    if not match:
+        raise KeyError(path)
+    full_name = f"{match.group(1)}/{match.group(2)}"
+    rest = match.group(3) or ""
+    repo = github.repo(full_name)
+
+    with github.lock:
+        if rest == "/issues" and method == "GET":
+            items = [_public(item) for item in repo["issues"].values()]
+            if query.get("since"):
+                items = [item for item in items if item["updated_at"] >= query["since"]]
+            if query.get("state", "open") != "all":
+                items = [item for item in items if item["state"] == query.get("state", "open")]
+            sort_key = "updated_at" if query.get("sort") == "updated" else "created_at"
+            items.sort(key=lambda item: (item[sort_key], item["number"]), reverse=query.get("direction", "desc") == "desc")
+            chunk, headers = _paged(handler, path, query, items)
+            return "GET /issues", 200, chunk, headers
+
+        if rest == "/issues" and method == "POST":
+            item = github.add_item(
+                full_name, None,
+                title=payload["title"],
+                body=payload.get("body", ""),
+                labels=[{"name": name} for name in payload.get("labels", [])],
+                assignees=[{"login": login} for login in payload.get("assignees", [])],
+            )
+            return "POST /issues", 201, _public(item), {}
+
+        number_match = re.fullmatch(r"/issues/(\d+)(/.*)?", rest)
+        if number_match:
+            item = repo["issues"][int(number_match.group(1))]
+            sub = number_match.group(2) or ""
+            if sub == "" and method == "GET":
+                return "GET /issues/{n}", 200, _public(item), {}
+            if sub == "" and method == "PATCH":
+                for key in ("title", "body", "state"):
+                    if key in payload:
+                        item[key] = payload[key]
+                if "labels" in payload:
+                    item["labels"] = [{"name": name} for name in payload["labels"]]
+                if "assignees" in payload:
+                    item["assignees"] = [{"login": login} for login in payload["assignees"]]
+                item["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                return "PATCH /issues/{n}", 200, _public(item), {}
+            if sub == "/labels" and method == "GET":
+                return "GET /issues/{n}/labels", 200, item["labels"], {}
+            if sub == "/labels" and method == "POST":
+                item["labels"] += [{"name": name} for name in payload["labels"]]
+                return "POST /issues/{n}/labels", 200, item["labels"], {}
+            if sub == "/comments" and method == "POST":
+                comment = github.add_comment(item, "migrator", payload["body"])
+                return "POST /issues/{n}/comments", 201, comment, {}
+            if sub == "/assignees" and method == "POST":
+                item["assignees"] += [{"login": login} for login in payload["assignees"]]
+                return "POST /issues/{n}/assignees", 201, _public(item), {}
+
+        if rest == "/pulls" and method == "GET":
+            items = [item for item in repo["issues"].values() if "pull_request" in item]
+            items.sort(key=lambda item: item["number"], reverse=True)
+            chunk, headers = _paged(handler, path, query, items)
+            return "GET /pulls", 200, chunk, headers
+
+        if rest == "/pulls" and method == "POST":
+            if payload["head"] not in github.branches(full_name):
+                return "POST /pulls", 422, {"message": "Validation Failed", "errors": [{"field": "head"}]}, {}
+            item = github.add_item(
+                full_name, None,
+                title=payload["title"],
+                body=payload.get("body", ""),
+                head={"ref": payload["head"]},
+                base={"ref": payload["base"]},
+                pull_request={"url": ""},
+            )
+            return "POST /pulls", 201, item, {}
+
+        pull_match = re.fullmatch(r"/pulls/(\d+)", rest)
+        if pull_match and method == "GET":
+            return "GET /pulls/{n}", 200, repo["issues"][int(pull_match.group(1))], {}
+
+        if rest == "/branches" and method == "GET":
+            branches = [{"name": name} for name in sorted(github.branches(full_name))]
+            chunk, headers = _paged(handler, path, query, branches)
+            return "GET /branches", 200, chunk, headers
+
+        if rest == "/assignees" and method == "GET":
+            chunk, headers = _paged(handler, path, query, [{"login": login} for login in USERS])
+            return "GET /assignees", 200, chunk, headers
+
+        if rest == "/labels" and method == "GET":
+            chunk, headers = _paged(handler, path, query, list(repo["labels"].values()))
+            return "GET /labels", 200, chunk, headers
+
+        if rest == "/labels" and method == "POST":
+            repo["labels"][payload["name"]] = dict(payload)
+            return "POST /labels", 201, payload, {}
+
+    raise KeyError(f"{method} {path}")
+
+
+def _field_value_nodes(project, values):
+    nodes = []
+    fields = {field["name"]: field for field in project["fields"]}
+    for name, value in values.items():
+        field = fields[name]
+        common = {"field": {"id": field["id"], "name": name}}
+        if field["__typename"] == "ProjectV2SingleSelectField":
+            option = next(option for option in field["options"] if option["name"] == value)
+            nodes.append(dict(common, __typename="ProjectV2ItemFieldSingleSelectValue", id=f"V_{option['id']}",
+                              optionId=option["id"], name=value))
+        elif field["__typename"] == "ProjectV2IterationField":
+            nodes.append(dict(common, __typename="ProjectV2ItemFieldIterationValue", **value))
+        else:
+            nodes.append(dict(common, __typename="ProjectV2ItemFieldTextValue", text=value))
+    return nodes
+
+
+def _content(github, node_id):
+    full_name, number = github.node_index[node_id]
+    owner, name = full_name.split("/")
+    item = github.repos[full_name]["issues"][number]
+    return item, {"number": number, "repository": {"name": name, "owner": {"login": owner}}}
+
+
+def _page_of(nodes, first, after):
+    start = int(after) if after else 0
+    chunk = nodes[start:start + first]
+    end = start + len(chunk)
+    return chunk, {"hasNextPage": end < len(nodes), "endCursor": str(end)}
+
+
+def _record_node(item):
+    return {
+        "id": item["node_id"],
+        "number": item["number"],
+        "title": item["title"],
+        "body": item["body"],
+        "state": item["state"].upper(),
+        "updatedAt": item["updated_at"],
+        "comments": {"totalCount": item["comments"]},
+        "labels": {"nodes": [{"name": label["name"]} for label in item["labels"]]},
+        "assignees": {"nodes": [{"login": user["login"]} for user in item["assignees"]]},
+    }
+
+
+def _comment_page(github, node_id, after):
+    chunk, page_info = _page_of(github.comments.get(node_id, []), 100, after)
+    return {"totalCount": len(github.comments.get(node_id, [])), "pageInfo": page_info, "nodes": chunk}
+
+
+def _update_field(github, project_id, item_id, field_id, value):
+    project = github.project(project_id)
+    _, item = github.node_index[item_id]
+    if time.time() - item["added"] < github.item_visible_after:
+        raise KeyError(item_id)  # Not visible to the mutation yet
+    field = next(field for field in project["fields"] if field["id"] == field_id)
+    if "singleSelectOptionId" in value:
+        option = next(option for option in field["options"] if option["id"] == value["singleSelectOptionId"])
+        item["values"][field["name"]] = option["name"]
+    elif "iterationId" in value:
+        iteration = next(iteration for iteration in field["configuration"]["iterations"]
+                         if iteration["id"] == value["iterationId"])
+        item["values"][field["name"]] = {"iterationId": iteration["id"], "title": iteration["title"],
+                                         "startDate": iteration["startDate"]}
+    else:
+        item["values"][field["name"]] = value.get("text")
+    return {"projectV2Item": {"id": item_id}}
+
+
+def handle_graphql(github, query, variables, token=None):
+    """Serve one GraphQL document. Returns (operation name, response body)."""
+    data = {}
+    errors = []
+
+    with github.lock:
+        if "rateLimit" in query:
+            budget = github.budget(token, "graphql")
+            data["rateLimit"] = {"cost": 1, "remaining": budget["remaining"],
+                                 "resetAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(budget["reset"]))}
+
+        if "updateProjectV2ItemFieldValue" in query:
+            aliases = re.findall(r"(\w+): updateProjectV2ItemFieldValue\(input: \{projectId: \$projectId, "
+                                 r"itemId: \$(\w+), fieldId: \$(\w+), value: \$(\w+)\}\)", query)
+            if not aliases:
+                aliases = [("updateProjectV2ItemFieldValue", "itemId", "fieldId", "value")]
+            for alias, item_var, field_var, value_var in aliases:
+                try:
+                    data[alias] = _update_field(github, variables["projectId"], variables[item_var],
+                                                variables[field_var], variables[value_var])
+                except (KeyError, StopIteration):
+                    data[alias] = None
+                    errors.append({"path": [alias], "message": "Could not resolve to a node", "type": "NOT_FOUND"})
+            return ("updateProjectV2ItemFieldValue", dict({"data": data}, **({"errors": errors} if errors else {})))
+
+        if "comments(first:" in query:
+            if "nodes(ids:" in query:
+                data["nodes"] = [{"id": node_id, "comments": _comment_page(github, node_id, None)}
+                                 if node_id in github.node_index and not node_id.startswith("PVTI_") else None
+                                 for node_id in variables["ids"]]
+            for alias, id_var, cursor_var in re.findall(r"(\w+): node\(id: \$(\w+)\) \{ \.\.\. on Issue "
+                                                        r"\{ comments\(first: \d+, after: \$(\w+)\)", query):
+                data[alias] = {"comments": _comment_page(github, variables[id_var], variables[cursor_var])}
+            return "comments", {"data": data}
+
+        if "nodes(ids:" in query:
+            nodes = []
+            for node_id in variables["ids"]:
+                project_id, item = github.node_index.get(node_id, (None, None))
+                if not isinstance(item, dict):
+                    nodes.append(None)
+                    continue
+                nodes.append({"id": item["id"],
+                              "fieldValues": {"nodes": _field_value_nodes(github.project(project_id), item["values"])}})
+            data["nodes"] = nodes
+            return "nodes", {"data": data}
+
+        if "addProjectV2ItemById" in query:
+            item = github._add_project_item(variables["projectId"], variables["contentId"])
+            data["addProjectV2ItemById"] = {"item": {"id": item["id"]}}
+            return "addProjectV2ItemById", {"data": data}
+
+        if "projectsV2" in query:
+            data["repository"] = {"projectsV2": {"nodes": [{"id": project_id, "title": project_id}
+                                                           for project_id in github.projects]}}
+            return "projectsV2", {"data": data}
+
+        if "issueOrPullRequest(number:" in query:
+            repo = github.repo(f"{variables['owner']}/{variables['repo']}")
+            data["repository"] = {}
+            for alias, number in re.findall(r"(\w+): issueOrPullRequest\(number: (\d+)\)", query):
+                item = repo["issues"].get(int(number))
+                if item is None:
+                    data["repository"][alias] = None
+                    errors.append({"path": ["repository", alias], "type": "NOT_FOUND",
+                                   "message": f"Could not resolve to an issue or pull request with the number of {number}."})
+                    continue
+                data["repository"][alias] = dict(_record_node(item),
+                                                 __typename="PullRequest" if "pull_request" in item else "Issue")
+            return "issueOrPullRequest", dict({"data": data}, **({"errors": errors} if errors else {}))
+
+        if "issues(first: 100" in query:
+            repo = github.repo(f"{variables['owner']}/{variables['repo']}")
+            issues = [item for item in repo["issues"].values() if "pull_request" not in item]
+            if variables.get("since"):
+                issues = [item for item in issues if item["updated_at"] >= variables["since"]]
+            order = variables.get("orderBy") or {"field": "CREATED_AT", "direction": "ASC"}
+            sort_key = "updated_at" if order["field"] == "UPDATED_AT" else "created_at"
+            issues.sort(key=lambda item: (item[sort_key], item["number"]), reverse=order["direction"] == "DESC")
+            chunk, page_info = _page_of(issues, 100, variables.get("cursor"))
+            data["repository"] = {"issues": {"pageInfo": page_info, "nodes": [_record_node(item) for item in chunk]}}
+            return "issues", {"data": data}
+
+        if "items(first: 100" in query:
+            project = github.project(variables["projectId"])
+            chunk, page_info = _page_of(project["items"], 100, variables.get("cursor"))
+            nodes = []
+            for item in chunk:
+                _, content = _content(github, item["content"])
+                nodes.append({"id": item["id"], "content": content,
+                              "fieldValues": {"nodes": _field_value_nodes(project, item["values"])}})
+            data["node"] = {"items": {"pageInfo": page_info, "nodes": nodes}}
+            return "projectItems", {"data": data}
+
+        if "fields(first: 50)" in query:
+            data["node"] = {"fields": {"nodes": github.project(variables["projectId"])["fields"]}}
+            return "projectFields", {"data": data}
+
+        if "pullRequests(first: 100" in query:
+            full_name = f"{variables['owner']}/{variables['repo']}"
+            repo = github.repo(full_name)
+            prs = sorted((item for item in repo["issues"].values() if "pull_request" in item),
+                         key=lambda item: item["number"])
+            chunk, page_info = _page_of(prs, 100, variables.get("cursor"))
+            data["repository"] = {"pullRequests": {"pageInfo": page_info, "nodes": [{
+                "number": pr["number"],
+                "headRefName": pr["head"]["ref"],
+                "baseRefName": pr["base"]["ref"],
+                "isCrossRepository": (pr["head"].get("repo") or {}).get("full_name", full_name) != full_name,
+                "labels": {"nodes": [{"name": label["name"]} for label in pr["labels"]]},
+                "assignees": {"nodes": [{"login": user["login"]} for user in pr["assignees"]]},
+            } for pr in chunk]}}
+            return "pullRequests", {"data": data}
+
+    return "unknown", {"errors": [{"message": "Unsupported query in mock server"}]}
+
+
+def serve(github, host="127.0.0.1", port=0):
+    """Start serving `github` on a background thread and return the server."""
+    handler = type("BoundHandler", (Handler,), {"github": github})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-github", daemon=True).start()
+    return server
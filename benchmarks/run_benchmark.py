@@ -0,0 +1,163 @@
+"""Measure copy_issues() and copy_pull_requests() throughput against the local mock server.
+
+    python benchmarks/run_benchmark.py --issues 200 --prs 50 --latency 0.05
+
+Starts benchmarks/mock_github.py on a free port, fills a synthetic source
+repository and project, points the scripts at it through GITHUB_API_URL and
+reports items/sec and API calls per item. Use --json to keep the report for
+comparing runs.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.join(os.path.dirname(HERE), "scripts")
+
+sys.path.insert(0, HERE)
+from mock_github import MockGitHub, serve  # noqa: E402
+
+
+def load_script(name):
+    """Import one of the hyphenated scripts in scripts/ as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(SCRIPTS, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(github, label, items, run, verbose):
+    """Run one copy and return its timing and per-endpoint call counts."""
+    calls_before = github.calls.copy()
+    bytes_before = github.bytes_sent
+    output = io.StringIO()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else output):
+        run()
+    seconds = time.perf_counter() - start
+
+    calls = github.calls - calls_before
+    total = sum(calls.values())
+    return {
+        "name": label,
+        "items": items,
+        "seconds": round(seconds, 3),
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+        "calls": total,
+        "calls_per_item": round(total / items, 2) if items else None,
+        "bytes": github.bytes_sent - bytes_before,
+        "endpoints": dict(sorted(calls.items())),
+        "errors": output.getvalue().count("❌"),
+    }
+
+
+def print_result(result):
+    print(f"📊 {result['name']}: {result['items']} items in {result['seconds']:.1f}s "
+          f"= {result['items_per_second']} items/sec, {result['calls_per_item']} calls/item, "
+          f"{result['bytes'] / 1024:.0f} KiB served")
+    for endpoint, count in result["endpoints"].items():
+        print(f"   {endpoint}: {count}")
+    if result["errors"]:
+        print(f"   ⚠️ {result['errors']} errors reported by the script")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the copy scripts against a local mock GitHub.")
+    parser.add_argument("--issues", type=int, default=100, help="Synthetic issues in the source repo (default: %(default)s)")
+    parser.add_argument("--prs", type=int, default=20, help="Synthetic PRs in the source repo (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Seconds added to every mock response (default: %(default)s)")
+    parser.add_argument("--rate-limit", type=int, default=5000,
+                        help="Mock primary rate limit per resource and window (default: %(default)s)")
+    parser.add_argument("--rate-window", type=int, default=3600,
+                        help="Seconds before the mock rate limit resets (default: %(default)s)")
+    parser.add_argument("--secondary-limit", type=int, default=None,
+                        help="Mock content-creating requests allowed per minute (default: unlimited)")
+    parser.add_argument("--content-per-minute", type=float, default=None,
+                        help="Client-side content creation pacing (default: lifted, so the scripts' own "
+                             "throughput is measured rather than GitHub's 80/min)")
+    parser.add_argument("--item-visible-after", type=float, default=0.0,
+                        help="Seconds before a new project item accepts field updates (default: %(default)s)")
+    parser.add_argument("--tokens", type=int, default=1,
+                        help="Tokens in the client's credential pool, each with its own budget (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="copy_issues() worker threads")
+    parser.add_argument("--comments", type=int, default=0,
+                        help="Up to this many comments on each synthetic issue and PR (default: %(default)s)")
+    parser.add_argument("--lean", action="store_true", help="Run copy_issues() with lean GraphQL listing")
+    parser.add_argument("--sharded", action="store_true", help="List the source in concurrently fetched number ranges")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic data (default: %(default)s)")
+    parser.add_argument("--only", choices=["issues", "prs"], help="Run one benchmark only")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' own output")
+    args = parser.parse_args()
+
+    github = MockGitHub(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                        content_per_minute=args.secondary_limit, item_visible_after=args.item_visible_after)
+    server = serve(github)
+    workdir = tempfile.mkdtemp(prefix="github-bench-")
+
+    # Must be set before the scripts import github_client and project_schema
+    os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["GITHUB_TOKEN"] = "benchmark"
+    os.environ["GITHUB_TOKENS"] = ",".join(f"benchmark-{n}" for n in range(2, args.tokens + 1))
+    os.environ["PROJECT_SCHEMA_CACHE"] = os.path.join(workdir, "schema")
+    sys.path.insert(0, SCRIPTS)
+
+    import rate_limit
+    from metrics import metrics
+
+    if args.content_per_minute is None:
+        rate_limit.scheduler.content_bucket = rate_limit.TokenBucket(1e6, 1e6)
+    else:
+        rate_limit.scheduler.content_bucket = rate_limit.TokenBucket(args.content_per_minute / 60.0,
+                                                                     rate_limit.CONTENT_CREATION_BURST)
+
+    results = []
+    if args.only != "prs":
+        copy_issues = load_script("copy-issues")
+        source = f"{copy_issues.SOURCE_OWNER}/{copy_issues.SOURCE_REPO}"
+        github.generate(source, copy_issues.PROJECT_ID, issues=args.issues, prs=0, seed=args.seed, comments=args.comments)
+        kwargs = {"journal_path": os.path.join(workdir, "issues.sqlite"), "lean": args.lean, "sharded": args.sharded}
+        if args.workers:
+            kwargs["workers"] = args.workers
+        results.append(measure(github, "copy_issues", args.issues, lambda: copy_issues.copy_issues(**kwargs),
+                               args.verbose))
+
+    if args.only != "issues":
+        copy_prs = load_script("copy-prs")
+        source = f"{copy_prs.SOURCE_OWNER}/{copy_prs.SOURCE_REPO}"
+        dest = github.repo(f"{copy_prs.DEST_OWNER}/{copy_prs.DEST_REPO}")
+        github.generate(source, "PVT_benchmark_prs", issues=0, prs=args.prs, seed=args.seed, comments=args.comments)
+        dest["branches"] |= github.repo(source)["branches"]  # PR heads must exist in the destination
+        journal_path = os.path.join(workdir, "prs.sqlite")
+        results.append(measure(github, "copy_pull_requests", args.prs,
+                               lambda: copy_prs.copy_pull_requests(journal_path=journal_path, sharded=args.sharded), args.verbose))
+
+    server.shutdown()
+
+    for result in results:
+        print_result(result)
+    print("📊 Concurrency settled at " + ", ".join(
+        f"{name} {limit}" for name, limit in rate_limit.scheduler.concurrency_limits().items()))
+
+    report = {
+        "config": vars(args),
+        "results": results,
+        "client_metrics": metrics.summary(),
+        "rate_limit": github.rate_limit_status()["resources"],
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
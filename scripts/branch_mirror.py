@@ -0,0 +1,115 @@
+import base64
+import os
+import subprocess
+
+# Base URL repositories are cloned from and pushed to; a local directory of bare repos works too
+GITHUB_GIT_URL = os.getenv("GITHUB_GIT_URL", "https://github.com").rstrip("/")
+
+# Where source repositories are mirrored between runs
+DEFAULT_MIRROR_DIR = os.path.join(".cache", "mirrors")
+
+# Branches and the refs GitHub keeps for every PR head, even after its branch is deleted
+FETCH_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/pull/*/head:refs/pull/*/head"]
+
+
+class MirrorError(RuntimeError):
+    """Raised when a git command fails."""
+
+
+def git_url(owner, repo):
+    return f"{GITHUB_GIT_URL}/{owner}/{repo}.git"
+
+
+def _git(args, token=None, cwd=None):
+    """Run git and return its stdout, authenticating HTTPS remotes with `token`."""
+    env = None
+    if token:
+        # Passed as config through the environment, so the token is not on the command line for `ps` to show
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        env = dict(os.environ, GIT_CONFIG_COUNT="1", GIT_CONFIG_KEY_0="http.extraHeader",
+                   GIT_CONFIG_VALUE_0=f"Authorization: Basic {basic}")
+    result = subprocess.run(["git"] + args, cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise MirrorError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def head_branch(number, metadata):
+    """Return the destination branch a PR's head is pushed to.
+
+    A PR from a fork names a branch of the fork, which can share its name with
+    a source branch or another fork's, e.g. `main` or `patch-1`. Those get a
+    name of their own, pr/<number>/<head>; same-repository heads keep theirs.
+    """
+    if metadata.get("cross_repository"):
+        return f"pr/{number}/{metadata['head']}"
+    return metadata["head"]
+
+
+def remote_branches(url, token=None):
+    """Return the branch names of a remote repository, from one ls-remote."""
+    output = _git(["ls-remote", "--heads", url], token=token)
+    return {line.split("refs/heads/", 1)[1] for line in output.splitlines() if "refs/heads/" in line}
+
+
+def update_mirror(url, path, token=None):
+    """Create or refresh a bare mirror of `url`'s branches and PR head refs at `path`."""
+    if not os.path.isdir(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _git(["init", "--bare", "--quiet", path])
+        _git(["remote", "add", "origin", url], cwd=path)
+    else:
+        _git(["remote", "set-url", "origin", url], cwd=path)
+    _git(["fetch", "--quiet", "--prune", "origin"] + FETCH_REFSPECS, token=token, cwd=path)
+
+
+def mirror_branches(source_owner, source_repo, dest_owner, dest_repo, pr_metadata, token=None,
+                    mirror_dir=DEFAULT_MIRROR_DIR):
+    """Push every branch the source PRs need into the destination in one git push.
+
+    `pr_metadata` maps PR numbers to {"head", "base", ...} (see
+    get_pr_metadata() in copy-prs.py). The source is fetched into a bare
+    mirror under `mirror_dir`, which is refreshed rather than recloned on
+    later runs. Heads whose branch was deleted after merging are recreated
+    from GitHub's refs/pull/<n>/head. Heads of PRs from forks always come from
+    refs/pull/<n>/head and are pushed under head_branch()'s pr/<n>/<head>
+    name, so they never clash with a source branch or another fork's.
+    Branches already in the destination are left as they are; the rest go over
+    in a single push, so git sends one packfile instead of one API round trip
+    per branch.
+
+    Returns the set of branch names in the destination afterwards. Raises
+    MirrorError if git fails.
+    """
+    source_url = git_url(source_owner, source_repo)
+    dest_url = git_url(dest_owner, dest_repo)
+    path = os.path.join(mirror_dir, source_owner, f"{source_repo}.git")
+
+    update_mirror(source_url, path, token=token)
+    mirrored = set(_git(["for-each-ref", "--format=%(refname)"], cwd=path).split())
+    existing = remote_branches(dest_url, token=token)
+
+    # Destination branch name -> mirror ref to push to it
+    refspecs = {}
+    for number, metadata in sorted(pr_metadata.items()):
+        pull_ref = f"refs/pull/{number}/head"
+        # A fork's branch is not in the source, so only the PR ref holds its commits
+        head_refs = [pull_ref] if metadata.get("cross_repository") else [f"refs/heads/{metadata['head']}", pull_ref]
+        for branch, refs in ((metadata["base"], [f"refs/heads/{metadata['base']}"]),
+                             (metadata["head"] and head_branch(number, metadata), head_refs)):
+            if not branch or branch in existing or branch in refspecs:
+                continue
+            ref = next((ref for ref in refs if ref in mirrored), None)
+            if ref:
+                refspecs[branch] = ref
+            else:
+                print(f"⚠️ Branch '{branch}' of PR #{number} is not in {source_owner}/{source_repo}")
+
+    if not refspecs:
+        print(f"✅ All {len(existing)} branches the PRs need are already in {dest_owner}/{dest_repo}")
+        return existing
+
+    _git(["push", "--quiet", dest_url] + [f"{ref}:refs/heads/{branch}" for branch, ref in sorted(refspecs.items())],
+         token=token, cwd=path)
+    print(f"🌿 Pushed {len(refspecs)} branches to {dest_owner}/{dest_repo} in one push")
+    return existing | set(refspecs)
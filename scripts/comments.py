@@ -0,0 +1,164 @@
+from github_client import graphql_data, rest
+
+# Issues or PRs whose comments are read per GraphQL query
+COMMENT_BATCH_SIZE = 50
+
+# Comments read per thread per query; longer threads are continued with their cursor
+COMMENT_PAGE_SIZE = 100
+
+# Added above each copied comment, since it is posted by the migrating account. The login is
+# in backticks rather than @-mentioned, so a migration does not notify every original author.
+COMMENT_HEADER = "_Originally posted by `{author}` on {created_at}_\n\n"
+
+_COMMENT_FIELDS = """
+          totalCount
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          nodes {
+            author {
+              login
+            }
+            body
+            createdAt
+            url
+          }
+"""
+
+FIRST_PAGE_QUERY = """
+query CommentsFirstPage($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on Issue {
+      id
+      comments(first: %d) {%s}
+    }
+    ... on PullRequest {
+      id
+      comments(first: %d) {%s}
+    }
+  }
+}
+""" % (COMMENT_PAGE_SIZE, _COMMENT_FIELDS, COMMENT_PAGE_SIZE, _COMMENT_FIELDS)
+
+
+def _next_page_query(count):
+    """Build a query continuing `count` long threads at once, aliased t0, t1, ..."""
+    params = []
+    selections = []
+    for n in range(count):
+        params.append(f"$id{n}: ID!, $cursor{n}: String!")
+        page = f"comments(first: {COMMENT_PAGE_SIZE}, after: $cursor{n}) {{{_COMMENT_FIELDS}}}"
+        selections.append(f"  t{n}: node(id: $id{n}) {{ ... on Issue {{ {page} }} ... on PullRequest {{ {page} }} }}")
+    return "query(" + ", ".join(params) + ") {\n" + "\n".join(selections) + "\n}"
+
+
+def _comment(node):
+    return {
+        "author": (node.get("author") or {}).get("login") or "ghost",
+        "body": node.get("body") or "",
+        "created_at": node.get("createdAt"),
+        "url": node.get("url"),
+    }
+
+
+def fetch_comments(node_ids):
+    """Read every comment of many issues or PRs, keyed by node ID, oldest first.
+
+    The first page of comments for up to COMMENT_BATCH_SIZE threads comes back
+    in a single query. Threads with more than COMMENT_PAGE_SIZE comments are
+    then continued together, one aliased query per round, until every cursor is
+    exhausted, so a repository needs about one read per COMMENT_BATCH_SIZE
+    issues plus one per extra page of its longest threads. Threads that could
+    not be read are left out of the result.
+    """
+    comments = {}
+    cursors = {}
+
+    for start in range(0, len(node_ids), COMMENT_BATCH_SIZE):
+        ids = node_ids[start:start + COMMENT_BATCH_SIZE]
+        data = graphql_data({"query": FIRST_PAGE_QUERY, "variables": {"ids": ids}})
+        if data is None:
+            print(f"❌ Error fetching comments for {len(ids)} items")
+            continue
+        for node in data.get("nodes") or []:
+            if not node or "comments" not in node:
+                continue
+            connection = node["comments"]
+            comments[node["id"]] = [_comment(comment) for comment in connection["nodes"]]
+            if connection["pageInfo"]["hasNextPage"]:
+                cursors[node["id"]] = connection["pageInfo"]["endCursor"]
+
+    while cursors:
+        threads = list(cursors.items())[:COMMENT_BATCH_SIZE]
+        variables = {}
+        for n, (node_id, cursor) in enumerate(threads):
+            variables[f"id{n}"] = node_id
+            variables[f"cursor{n}"] = cursor
+
+        data = graphql_data({"query": _next_page_query(len(threads)), "variables": variables})
+        for n, (node_id, _) in enumerate(threads):
+            del cursors[node_id]
+            thread = (data or {}).get(f"t{n}")
+            if not thread or "comments" not in thread:
+                print(f"❌ Error fetching more comments for {node_id}; dropping its comments")
+                comments.pop(node_id, None)
+                continue
+            connection = thread["comments"]
+            comments[node_id] += [_comment(comment) for comment in connection["nodes"]]
+            if connection["pageInfo"]["hasNextPage"]:
+                cursors[node_id] = connection["pageInfo"]["endCursor"]
+
+    return comments
+
+
+def with_comments(items, comments_by_number):
+    """Pass `items` (issues or PRs) through, reading their comments COMMENT_BATCH_SIZE at a time.
+
+    Each item's comments are stored in `comments_by_number` under its number
+    before the item is yielded, so a listing can stream into the pipeline with
+    comments fetched in bulk alongside it.
+    """
+    batch = []
+
+    def flush():
+        fetched = fetch_comments([item["node_id"] for item in batch])
+        for item in batch:
+            if item["node_id"] in fetched:
+                comments_by_number[item["number"]] = fetched[item["node_id"]]
+        yield from batch
+        batch.clear()
+
+    for item in items:
+        if item.get("comments") == 0:
+            comments_by_number[item["number"]] = []  # The issue listing says there are none
+            yield item
+            continue
+        batch.append(item)
+        if len(batch) >= COMMENT_BATCH_SIZE:
+            yield from flush()
+
+    if batch:
+        yield from flush()
+
+
+def post_comments(owner, repo, number, comments, start=0, on_posted=None):
+    """Post `comments[start:]` on a destination issue or PR, in order.
+
+    Stops at the first failure so the thread never ends up out of order.
+    `on_posted`, if given, is called with the number of comments copied so far
+    after each one. Returns True when every comment was posted.
+    """
+    for position in range(start, len(comments)):
+        comment = comments[position]
+        body = COMMENT_HEADER.format(author=comment["author"], created_at=comment["created_at"]) + comment["body"]
+        created = rest("POST", f"/repos/{owner}/{repo}/issues/{number}/comments", expected=(201,),
+                       error=f"copying comment {position + 1} of {len(comments)} to #{number}", json={"body": body})
+        if created is None:
+            return False
+        if on_posted:
+            on_posted(position + 1)
+
+    if len(comments) > start:
+        print(f"💬 Copied {len(comments) - start} comments to #{number}")
+    return True
@@ -1,16 +1,25 @@
-import os
-import requests
+import argparse
 import json
+import math
+import threading
 import time
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-
-# GitHub API URLs
-GITHUB_API_URL = "https://api.github.com"
-GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+from comments import post_comments, with_comments
+from dedup import DestinationIndex, mark_body
+from field_batch import DEFAULT_BATCH_SIZE, FieldUpdateBatch, verify_field_values
+from github_client import GitHubError, graphql_data, paginate, post_graphql, rest, use_repositories
+from issue_records import get_issues_lean
+from sharded_listing import get_highest_number, list_sharded
+from journal import DEFAULT_JOURNAL, STEP_DONE, Journal
+from labels import LabelProvisioner, get_labels
+from metrics import metrics
+from migration_plan import (compile_translation, estimate_comment_queries, estimate_migration, get_rate_limit,
+                            print_plan, translate_value)
+from pipeline import run_pipeline
+from priority import RULE_HELP, parse_priority, prioritize
+from project_schema import invalidate_project_schema, load_project_schema
+from rate_limit import INITIAL_CONCURRENCY, MAX_CONCURRENCY
+from snapshot import SnapshotWriter, open_snapshot, write_repo_metadata
 
 # Set source and destination repositories
 SOURCE_OWNER = "furmidgeuk"
@@ -21,271 +30,69 @@ DEST_REPO = "nndcp-docs"
 # GitHub Project ID
 PROJECT_ID = "PVT_kwDOCaCuvc4Azlr2"
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json",
-}
-
-def get_issues(owner, repo):
-    """Fetch all open and closed issues (excluding PRs)."""
-    issues = []
-    page = 1
-    while True:
-        issues_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues"
-        response = requests.get(issues_url, headers=HEADERS, params={"state": "all", "per_page": 100, "page": page})
-
-        if response.status_code == 200:
-            batch = response.json()
-            if not batch:
-                break  # No more issues to fetch
-            issues.extend([issue for issue in batch if "pull_request" not in issue])  # Exclude PRs
-            page += 1
-        else:
-            print(f"❌ Error fetching issues: {response.status_code}, {response.text}")
-            break
-    
-    return issues
-
-def get_custom_fields():
-    """Fetch all custom fields for a GitHub ProjectV2."""
-    query = {
-        "query": """
-        query($projectId: ID!) {
-          node(id: $projectId) {
-            ... on ProjectV2 {
-              fields(first: 50) {
-                nodes {
-                  __typename
-                  ... on ProjectV2Field {
-                    id
-                    name
-                    dataType
-                  }
-                  ... on ProjectV2SingleSelectField {
-                    id
-                    name
-                    dataType
-                    options {
-                      id
-                      name
-                    }
-                  }
-                  ... on ProjectV2IterationField {
-                    id
-                    name
-                    dataType
-                    configuration {
-                      iterations {
-                        id
-                        title
-                        startDate
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        """,
-        "variables": {
-            "projectId": PROJECT_ID
-        }
-    }
-
-    response = requests.post(GITHUB_GRAPHQL_URL, json=query, headers=HEADERS)
-
-    try:
-        response_json = response.json()
-    except requests.exceptions.JSONDecodeError:
-        print(f"❌ Error decoding JSON response: {response.text}")
-        return {}
-
-    if response.status_code != 200:
-        print(f"❌ GitHub API error: {response.status_code}, {response.text}")
-        return {}
-
-    if "errors" in response_json:
-        print(f"❌ GraphQL query error: {response_json['errors']}")
-        return {}
-
-    if "data" not in response_json or "node" not in response_json["data"]:
-        print(f"❌ Unexpected API response: {response_json}")
-        return {}
-
-    fields = response_json["data"]["node"]["fields"]["nodes"]
-    
-    field_dict = {}
-    for field in fields:
-        # Skip empty or malformed fields
-        if not field or "id" not in field or "name" not in field or "dataType" not in field:
-            print(f"⚠️ Skipping invalid field: {field}")
-            continue
-        
-        field_data = {
-            "id": field["id"],
-            "type": field["__typename"],
-            "dataType": field["dataType"],
-        }
-        
-        # Handle single select fields
-        if field["__typename"] == "ProjectV2SingleSelectField":
-            field_data["options"] = {opt["name"]: opt["id"] for opt in field.get("options", [])}
-        
-        # Handle iteration fields
-        elif field["__typename"] == "ProjectV2IterationField":
-            iterations = {}
-            
-            for iteration in field.get("configuration", {}).get("iterations", []):
-                iterations[iteration["title"]] = {
-                    "id": iteration["id"],
-                    "startDate": iteration["startDate"]
-                }
-            
-            field_data["iterations"] = iterations
-        
-        field_dict[field["name"]] = field_data
-
-    print(f"✅ Retrieved Custom Fields: {json.dumps(field_dict, indent=2)}")
-
-    return field_dict
-
-
-def update_issue_field(item_id, field_id, value_id, field_type="singleSelect"):
-    """Update a custom field of an issue in the GitHub Project."""
-    time.sleep(2)  # Delay to prevent API rate limits
-
-    # First, check the current value of the field before updating
-    existing_value = check_issue_status(item_id, field_id)
-    if existing_value == value_id:
-        print(f"🔄 Skipping update: Field (ID: {field_id}) already has value (ID: {value_id})")
+# Worker threads per pipeline stage; None sizes each stage for the most requests its class may have
+# in flight (rate_limit.MAX_CONCURRENCY), so the scheduler's adaptive caps set the concurrency
+DEFAULT_WORKERS = None
+
+def get_issues(owner, repo, sync_state=None, lean=False, sharded=False):
+    """Stream all open and closed issues (excluding PRs) as each page arrives.
+
+    With a `sync_state` dict holding a `since` timestamp, only issues updated
+    since then are listed, most recently updated first. Its `etag` is sent with
+    the first page: a 304 means nothing changed and costs no rate limit. The
+    first page's new ETag is written back to `sync_state["etag"]`.
+
+    With `lean`, issues are listed through GraphQL as compact IssueRecords
+    instead (see issue_records.get_issues_lean()). With `sharded`, a full
+    listing is split into issue-number ranges fetched concurrently and yielded
+    in number order (see sharded_listing.list_sharded()); a sync listing is
+    small, so it is read the lean way instead.
+    """
+    if sharded and not (sync_state and sync_state.get("since")):
+        yield from list_sharded(owner, repo, "issue")
         return
 
-    value_dict = {}
-    if field_type == "singleSelect":
-        value_dict["singleSelectOptionId"] = value_id
-    elif field_type == "iteration":
-        value_dict["iterationId"] = value_id  # ✅ Correct handling for Iteration fields
-    else:
-        value_dict["text"] = value_id  # Use text value for other fields
-
-    mutation = {
-        "query": """
-        mutation($projectId: ID!, $itemId: ID!, $fieldId: ID!, $value: ProjectV2FieldValue!) {
-          updateProjectV2ItemFieldValue(input: {
-            projectId: $projectId,
-            itemId: $itemId,
-            fieldId: $fieldId,
-            value: $value
-          }) {
-            projectV2Item {
-              id
-            }
-          }
-        }
-        """,
-        "variables": {
-            "projectId": PROJECT_ID,
-            "itemId": item_id,
-            "fieldId": field_id,
-            "value": value_dict
-        }
-    }
-
-    response = requests.post(GITHUB_GRAPHQL_URL, json=mutation, headers=HEADERS)
+    if lean or sharded:
+        yield from get_issues_lean(owner, repo, sync_state=sync_state)
+        return
 
-    if response.status_code == 200:
-        print(f"✅ Updated {field_type} field (ID: {field_id}) with value (ID: {value_id}) successfully!")
-    else:
-        print(f"❌ Error updating field: {response.status_code}, {response.text}")
+    params = {"state": "all", "per_page": 100}
+    conditional = None
 
-    # Re-check if status is updated
-    check_issue_status(item_id, field_id)
+    if sync_state and sync_state.get("since"):
+        params.update(since=sync_state["since"], sort="updated", direction="desc")
+        conditional = sync_state
 
+    for issue in paginate(f"/repos/{owner}/{repo}/issues", error="fetching issues", conditional=conditional,
+                          params=params):
+        if "pull_request" not in issue:  # Exclude PRs
+            yield issue
 
-def check_issue_status(item_id, field_id):
-    """Check if a specific field (e.g., Status, Priority) was successfully updated."""
-    check_query = {
-        "query": """
-        query($itemId: ID!) {
-          node(id: $itemId) {
-            ... on ProjectV2Item {
-              fieldValues(first: 10) {
-                nodes {
-                  __typename
-                  ... on ProjectV2ItemFieldSingleSelectValue {
-                    id
-                    optionId
-                    field {
-                      ... on ProjectV2FieldCommon {
-                        id
-                        name
-                      }
-                    }
-                  }
-                  ... on ProjectV2ItemFieldTextValue {
-                    id
-                    text
-                    field {
-                      ... on ProjectV2FieldCommon {
-                        id
-                        name
-                      }
-                    }
-                  }
-                  ... on ProjectV2ItemFieldNumberValue {
-                    id
-                    number
-                    field {
-                      ... on ProjectV2FieldCommon {
-                        id
-                        name
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        """,
-        "variables": {
-            "itemId": item_id
-        }
-    }
-
-    response = requests.post(GITHUB_GRAPHQL_URL, json=check_query, headers=HEADERS)
-
-    try:
-        data = response.json()
-    except requests.exceptions.JSONDecodeError:
-        print(f"❌ Error decoding JSON response: {response.text}")
-        return None
+    if conditional and conditional["not_modified"]:
+        print(f"✅ No issues updated since {sync_state['since']}")
 
-    # ✅ Handle API errors
-    if response.status_code != 200:
-        print(f"❌ GitHub API error: {response.status_code}, {response.text}")
+def get_custom_fields(project_id=PROJECT_ID, refresh=False):
+    """Fetch all custom fields for a GitHub ProjectV2 from the shared schema cache, or None on error."""
+    schema = load_project_schema(project_id, refresh=refresh)
+    if schema is None:
         return None
 
-    if "errors" in data:
-        print(f"❌ GraphQL query error: {json.dumps(data['errors'], indent=2)}")
-        return None
+    field_dict = schema["fields"]
+    print(f"✅ Retrieved Custom Fields: {json.dumps(field_dict, indent=2)}")
 
-    if "data" not in data or "node" not in data["data"]:
-        print(f"❌ Unexpected API response: {json.dumps(data, indent=2)}")
-        return None
+    return field_dict
 
-    # ✅ Extract field values
-    for node in data["data"]["node"]["fieldValues"]["nodes"]:
-        if "field" in node and node["field"] is not None:
-            if node["field"].get("id") == field_id:
-                return node.get("optionId") or node.get("text") or node.get("number")
 
-    return None  # Field not found
+def create_issue(owner, repo, issue, source=None):
+    """Create an issue in the destination repository and return the created issue.
 
-def create_issue(owner, repo, issue):
-    """Create an issue in the destination repository and return its node_id."""
+    With `source`, the source repository as owner/repo, the body is marked with
+    the issue's origin (see dedup.mark_body()). A closed source issue is closed
+    straight after it is created, so a later run finds nothing to update.
+    """
     issue_body = issue.get("body", "") or ""
+    if source:
+        issue_body = mark_body(issue_body, source, issue["number"])
     assignees = [user["login"] for user in issue.get("assignees", [])]  # Extract assignees
     labels = [label["name"] for label in issue.get("labels", [])]  # Extract labels
 
@@ -297,19 +104,41 @@ def create_issue(owner, repo, issue):
         "assignees": assignees  # Include assignees in the new issue
     }
 
-    issues_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues"
-    response = requests.post(issues_url, json=issue_data, headers=HEADERS)
+    created_issue = rest("POST", f"/repos/{owner}/{repo}/issues", expected=(201,), error="creating issue",
+                         json=issue_data)
 
-    if response.status_code == 201:
-        created_issue = response.json()
-        issue_node_id = created_issue["node_id"]
-        print(f"✅ Issue '{issue['title']}' copied successfully. Issue Node ID: {issue_node_id}")
-        return issue_node_id
-    else:
-        print(f"❌ Error creating issue: {response.status_code}, {response.text}")
+    if created_issue is None:
         return None
 
-def add_issue_to_project(issue_node_id):
+    if issue.get("state") == "closed":
+        # Issues cannot be created closed; if this fails, the next run finds the issue and updates it
+        created_issue = rest("PATCH", f"/repos/{owner}/{repo}/issues/{created_issue['number']}",
+                             error=f"closing issue #{created_issue['number']}", json={"state": "closed"})
+        if created_issue is None:
+            return None
+
+    issue_node_id = created_issue["node_id"]
+    print(f"✅ Issue '{issue['title']}' copied successfully. Issue Node ID: {issue_node_id}")
+    return created_issue
+
+def update_issue(owner, repo, issue_number, issue, source=None):
+    """Bring an already-copied destination issue in line with its source issue."""
+    issue_data = {
+        "title": issue["title"],
+        "body": mark_body(issue.get("body"), source, issue["number"]) if source else issue.get("body", "") or "",
+        "state": issue["state"],
+        "labels": [label["name"] for label in issue.get("labels", [])],
+        "assignees": [user["login"] for user in issue.get("assignees", [])],
+    }
+
+    updated_issue = rest("PATCH", f"/repos/{owner}/{repo}/issues/{issue_number}",
+                         error=f"updating issue #{issue_number}", json=issue_data)
+
+    if updated_issue is not None:
+        print(f"🔄 Issue #{issue_number} '{issue['title']}' updated from source")
+    return updated_issue
+
+def add_issue_to_project(issue_node_id, project_id=PROJECT_ID):
     """Adds the created issue to a GitHub Project using GraphQL API and returns the item ID."""
     if not issue_node_id:
         return None
@@ -325,269 +154,750 @@ def add_issue_to_project(issue_node_id):
         }
         """,
         "variables": {
-            "projectId": PROJECT_ID,
+            "projectId": project_id,
             "contentId": issue_node_id
         }
     }
 
-    response = requests.post(GITHUB_GRAPHQL_URL, json=graphql_query, headers=HEADERS)
+    data = graphql_data(graphql_query)
 
-    if response.status_code == 200:
-        item_id = response.json()["data"]["addProjectV2ItemById"]["item"]["id"]
-        print(f"✅ Issue added to project successfully! Item ID: {item_id}")
-        return item_id
-    else:
-        print(f"❌ Error adding issue to project: {response.status_code}, {response.text}")
+    if data is None:
+        print("❌ Error adding issue to project")
         return None
+
+    item_id = data["addProjectV2ItemById"]["item"]["id"]
+    print(f"✅ Issue added to project successfully! Item ID: {item_id}")
+    return item_id
     
-def get_issue_project_fields(owner, repo, issue_number):
-    """Fetch project-specific fields for a given issue."""
-    query = {
-        "query": """
-        query($owner: String!, $repo: String!, $issueNumber: Int!) {
-          repository(owner: $owner, name: $repo) {
-            issue(number: $issueNumber) {
-              id
-              title
-              projectItems(first: 10) {
-                nodes {
-                  project {
-                    id
-                    title
+def extract_field_values(field_value_nodes, field_values=None):
+    """Turn ProjectV2 item fieldValues nodes into a field name -> value dict."""
+    if field_values is None:
+        field_values = {}
+
+    for field_value in field_value_nodes:
+        if not field_value:
+            continue
+
+        field_name = (field_value.get("field") or {}).get("name")
+
+        if not field_name:
+            continue
+
+        if field_value["__typename"] == "ProjectV2ItemFieldSingleSelectValue":
+            # For single select, use the option name
+            field_values[field_name] = field_value.get("name")
+        elif field_value["__typename"] == "ProjectV2ItemFieldTextValue":
+            field_values[field_name] = field_value.get("text")
+        elif field_value["__typename"] == "ProjectV2ItemFieldNumberValue":
+            field_values[field_name] = field_value.get("number")
+        elif field_value["__typename"] == "ProjectV2ItemFieldIterationValue":
+            # Store both the iteration ID and title for matching
+            field_values[field_name] = {
+                "id": field_value.get("iterationId"),
+                "title": field_value.get("title")
+            }
+
+    return field_values
+
+def get_project_item_field_values(project_id, owner, repo):
+    """Page through a ProjectV2's items once and index field values by issue number.
+
+    Reads the field values of 100 project items per query instead of querying
+    each issue. Only items whose content is an issue in `owner/repo` are kept.
+    Returns `(index, pages)`, where `pages` is the number of queries it took.
+    Raises GitHubError if a page cannot be read, rather than return a partial index.
+    """
+    query = """
+    query($projectId: ID!, $cursor: String) {
+      rateLimit {
+        cost
+        remaining
+        resetAt
+      }
+      node(id: $projectId) {
+        ... on ProjectV2 {
+          items(first: 100, after: $cursor) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            nodes {
+              content {
+                ... on Issue {
+                  number
+                  repository {
+                    name
+                    owner {
+                      login
+                    }
                   }
-                  fieldValues(first: 20) {
-                    nodes {
-                      __typename
-                      ... on ProjectV2ItemFieldSingleSelectValue {
-                        field {
-                          ... on ProjectV2FieldCommon {
-                            name
-                          }
-                        }
-                        optionId
+                }
+              }
+              fieldValues(first: 20) {
+                nodes {
+                  __typename
+                  ... on ProjectV2ItemFieldSingleSelectValue {
+                    field {
+                      ... on ProjectV2FieldCommon {
                         name
                       }
-                      ... on ProjectV2ItemFieldTextValue {
-                        field {
-                          ... on ProjectV2FieldCommon {
-                            name
-                          }
-                        }
-                        text
+                    }
+                    optionId
+                    name
+                  }
+                  ... on ProjectV2ItemFieldTextValue {
+                    field {
+                      ... on ProjectV2FieldCommon {
+                        name
                       }
-                      ... on ProjectV2ItemFieldNumberValue {
-                        field {
-                          ... on ProjectV2FieldCommon {
-                            name
-                          }
-                        }
-                        number
+                    }
+                    text
+                  }
+                  ... on ProjectV2ItemFieldNumberValue {
+                    field {
+                      ... on ProjectV2FieldCommon {
+                        name
                       }
-                      ... on ProjectV2ItemFieldIterationValue {
-                        field {
-                          ... on ProjectV2FieldCommon {
-                            name
-                          }
-                        }
-                        iterationId
-                        title
-                        startDate
+                    }
+                    number
+                  }
+                  ... on ProjectV2ItemFieldIterationValue {
+                    field {
+                      ... on ProjectV2FieldCommon {
+                        name
                       }
                     }
+                    iterationId
+                    title
+                    startDate
                   }
                 }
               }
             }
           }
         }
-        """,
-        "variables": {
-            "owner": owner,
-            "repo": repo,
-            "issueNumber": issue_number
-        }
+      }
     }
+    """
 
-    response = requests.post(GITHUB_GRAPHQL_URL, json=query, headers=HEADERS)
-
-    try:
-        response_json = response.json()
-        
-        # Check for GraphQL errors
-        if "errors" in response_json:
-            print(f"❌ GraphQL Errors: {json.dumps(response_json['errors'], indent=2)}")
-            return {}
-
-        issue_data = response_json.get("data", {}).get("repository", {}).get("issue")
+    index = {}
+    cursor = None
+    pages = 0
+    while True:
+        data = graphql_data({"query": query, "variables": {"projectId": project_id, "cursor": cursor}})
+        if data is None:
+            print("❌ Error fetching project items")
+            raise GitHubError(f"Could not read the items of project {project_id}")
+
+        items = (data.get("node") or {}).get("items")
+        if not items:
+            print(f"❌ Unexpected API response: {json.dumps(data, indent=2)}")
+            raise GitHubError(f"Could not read the items of project {project_id}")
+
+        pages += 1
+        for item in items["nodes"]:
+            content = (item or {}).get("content") or {}
+            repository = content.get("repository") or {}
+            if "number" not in content:
+                continue  # Draft issues and pull requests
+            if repository.get("name") != repo or repository.get("owner", {}).get("login") != owner:
+                continue
+            extract_field_values(item.get("fieldValues", {}).get("nodes", []), index.setdefault(content["number"], {}))
 
-        if not issue_data:
-            print(f"❌ No issue data found in the response: {json.dumps(response_json, indent=2)}")
-            return {}
+        if not items["pageInfo"]["hasNextPage"]:
+            break
+        cursor = items["pageInfo"]["endCursor"]
 
-        project_items = issue_data.get("projectItems", {}).get("nodes", [])
+    print(f"📦 Prefetched project fields for {len(index)} issues in {pages} requests")
+    return index, pages
 
-        if not project_items:
-            print("❌ No project items found for the issue")
-            return {}
+def get_source_project_iterations(project_id=PROJECT_ID):
+    """Get all iterations from the source project with their IDs and titles, or None on error."""
+    schema = load_project_schema(project_id)
 
-        field_values = {}
-        for project_item in project_items:
-            for field_value in project_item.get("fieldValues", {}).get("nodes", []):
-                field_name = field_value.get("field", {}).get("name")
-
-                if not field_name:
-                    continue
-
-                if field_value["__typename"] == "ProjectV2ItemFieldSingleSelectValue":
-                    # For single select, use the option name
-                    field_values[field_name] = field_value.get("name")
-                elif field_value["__typename"] == "ProjectV2ItemFieldTextValue":
-                    field_values[field_name] = field_value.get("text")
-                elif field_value["__typename"] == "ProjectV2ItemFieldNumberValue":
-                    field_values[field_name] = field_value.get("number")
-                elif field_value["__typename"] == "ProjectV2ItemFieldIterationValue":
-                    # Store both the iteration ID and title for matching
-                    field_values[field_name] = {
-                        "id": field_value.get("iterationId"),
-                        "title": field_value.get("title")
-                    }
+    if schema is None:
+        print("❌ Error fetching source iterations")
+        return None
 
-        print(f"🔍 Extracted Source Issue Fields: {json.dumps(field_values, indent=2)}")
-        return field_values
+    iteration_map = schema["iteration_titles"]
+    print(f"📅 Source Project Iterations Map: {json.dumps(iteration_map, indent=2)}")
+    return iteration_map
 
-    except Exception as e:
-        print(f"❌ Error processing issue project fields: {e}")
-        return {}
-    
-def get_source_project_iterations():
-    """Get all iterations from the source project with their IDs and titles."""
-    query = {
-        "query": """
-        query($projectId: ID!) {
-          node(id: $projectId) {
-            ... on ProjectV2 {
-              fields(first: 50) {
-                nodes {
-                  ... on ProjectV2IterationField {
-                    id
-                    name
-                    configuration {
-                      iterations {
-                        id
-                        title
-                        startDate
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
+def apply_project_fields(batch, item_id, issue, source_project_fields, target_custom_fields, source_iterations,
+                         applied=None):
+    """Queue the source issue's project field values for the destination project item.
+
+    `applied` maps field IDs to values already set on the item by an earlier run;
+    those fields are skipped.
+    """
+    applied = applied or {}
+    for field_name, field_data in target_custom_fields.items():
+        if field_name in source_project_fields:
+            source_value = source_project_fields[field_name]
+
+            # Determine the field type
+            field_id = field_data["id"]
+            field_type = field_data["type"]
+            
+            # Handle Iteration fields differently
+            if field_type == "ProjectV2IterationField":
+                # Handle differently if source_value is a dict (with title)
+                if isinstance(source_value, dict) and "title" in source_value:
+                    iteration_title = source_value["title"]
+                else:
+                    # If it's just an ID, look up the title from our map
+                    iteration_id = source_value if isinstance(source_value, str) else source_value.get("id")
+                    iteration_title = source_iterations.get(iteration_id)
+                    
+                if iteration_title:
+                    # Find the target iteration with the same title
+                    target_iterations = field_data.get("iterations", {})
+                    if iteration_title in target_iterations:
+                        target_iteration_id = target_iterations[iteration_title]["id"]
+                        if applied.get(field_id) == target_iteration_id:
+                            continue
+                        batch.add(item_id, field_id, target_iteration_id, field_type="iteration",
+                                  label=f"{field_name} on '{issue['title']}'", key=issue["number"])
+                        print(f"📝 Iteration '{iteration_title}' queued for issue '{issue['title']}'")
+                    else:
+                        print(f"⚠️ No matching iteration with title '{iteration_title}' found in target project")
+                else:
+                    print(f"⚠️ Could not determine title for iteration ID: {source_value}, skipping update")
+                    
+            # Handle Single Select Fields (e.g., Status, Priority, Size, Epic)
+            elif field_type == "ProjectV2SingleSelectField":
+                field_options = field_data.get("options", {})
+                value_id = field_options.get(source_value)
+                if value_id:
+                    if applied.get(field_id) == value_id:
+                        continue
+                    batch.add(item_id, field_id, value_id, field_type="singleSelect",
+                              label=f"{field_name} on '{issue['title']}'", key=issue["number"])
+                    print(f"📝 {field_name} '{source_value}' queued for issue '{issue['title']}'")
+                else:
+                    print(f"⚠️ Could not find {field_name} '{source_value}' in destination project")
+
+
+class IssueCopyRun:
+    """The state of one copy_issues() run and the work each of its pipeline stages does.
+
+    Each issue moves through the stages returned by stages(): fetch (a journal
+    lookup), create, comments, add to project and set fields, connected by
+    bounded queues (see pipeline.run_pipeline()). Fetch and create run on one
+    worker each, so destination numbers follow the listing and content creation
+    stays serial. The other stages get as many threads as their request class
+    may have in flight and the scheduler's adaptive caps decide how many
+    actually are (see rate_limit.AdaptiveLimit), unless `workers` fixes them.
+    """
+
+    def __init__(self, source_owner, source_repo, dest_owner, dest_repo, project_id, journal, sync=False,
+                 progress=None, on_hot_set_complete=None):
+        self.source_owner = source_owner
+        self.source_repo = source_repo
+        self.source = f"{source_owner}/{source_repo}"
+        self.dest_owner = dest_owner
+        self.dest_repo = dest_repo
+        self.project_id = project_id
+        self.journal = journal
+        self.sync_state = journal.get_sync_state("issue") if sync else None
+        self.progress = progress
+        self.on_hot_set_complete = on_hot_set_complete
+        self.lock = threading.Lock()
+
+        # Listing progress
+        self.listed = 0
+        self.listing_complete = False
+        self.latest = None
+        self.finished = 0
+        self.skipped = 0
+
+        # Source issue number -> comments, filled in as the listing is read
+        self.comments_by_number = {}
+        self.comment_failures = set()
+
+        # Hot-set issues not finished yet, filled in by prioritize()
+        self.hot = set()
+        self.hot_total = 0
+        self.started = time.time()
+
+        # Field values written by this run, per project item, for the verification pass
+        self.written = {}
+        self.item_issues = {}
+
+        # Set by prepare()
+        self.dest_index = None
+        self.label_provisioner = None
+        self.target_custom_fields = None
+        self.source_iterations = None
+        self.source_field_index = None
+        self.batch = None
+
+    def prepare(self, source_project_id, batch_size, adopt_unmarked=False, snapshot_header=None):
+        """Index the destination and read the project fields; False, after saying why, if the run cannot start."""
+        # Existing destination items, so nothing is created twice even without a journal record
+        try:
+            self.dest_index = DestinationIndex(self.dest_owner, self.dest_repo, self.source,
+                                               adopt_unmarked=adopt_unmarked)
+            self.label_provisioner = LabelProvisioner(self.dest_owner, self.dest_repo)
+        except GitHubError:
+            print("❌ Could not list the destination repository; stopping rather than risk duplicates")
+            return False
+
+        # Fetch the destination project's custom fields (one schema query, then cached)
+        self.target_custom_fields = get_custom_fields(self.project_id)
+
+        if snapshot_header:
+            # Filled in from each issue record as it is read
+            self.source_iterations = snapshot_header.get("iterations", {})
+            self.source_field_index = {}
+        else:
+            self.source_iterations = get_source_project_iterations(source_project_id)
+            # Read every source project item's field values up front instead of once per issue
+            try:
+                self.source_field_index, _ = get_project_item_field_values(source_project_id, self.source_owner,
+                                                                           self.source_repo)
+            except GitHubError:
+                pass
+
+        if None in (self.target_custom_fields, self.source_iterations, self.source_field_index):
+            # Issues copied without their fields would be marked done and never get them
+            print("❌ Could not read the project fields; stopping rather than copy issues without them")
+            return False
+
+        self.batch = FieldUpdateBatch(post_graphql, self.project_id, batch_size=batch_size,
+                                      on_applied=self._on_applied)
+        return True
+
+    def _on_applied(self, update):
+        self.journal.record_field("issue", update["key"], update["field_id"], update["value"])
+        with self.lock:
+            self.written.setdefault(update["item_id"], {})[update["field_id"]] = update["value"]
+            self.item_issues[update["item_id"]] = update["key"]
+
+    # Listing
+
+    def from_snapshot(self, records):
+        """Yield the issues of snapshot `records`, keeping their field values and comments."""
+        for record in records:
+            self.source_field_index[record["issue"]["number"]] = record["fields"]
+            if record.get("comments") is not None:
+                self.comments_by_number[record["issue"]["number"]] = record["comments"]
+            yield record["issue"]
+
+    def prioritized(self, issues, priority):
+        """Yield `issues` in the order of the `priority` rules, noting the hot set."""
+        for n, issue in enumerate(prioritize(issues, priority, self.source_field_index, hot=self.hot)):
+            if n == 0:
+                # The whole listing has been read and ranked by now
+                self.hot_total = len(self.hot)
+                print(f"📌 {len(self.hot)} issues matching '{':'.join(str(part) for part in priority[0] if part)}' "
+                      f"form the hot set")
+            yield issue
+
+    def counted(self, issues):
+        """Yield `issues`, counting them and tracking the newest update for the sync high-water mark."""
+        for issue in issues:
+            self.listed += 1
+            self.latest = max(self.latest or issue["updated_at"], issue["updated_at"])
+            yield issue
+        self.listing_complete = True
+
+    def _finish(self, number):
+        """Count an issue as finished and report progress and the hot set."""
+        if self.progress:
+            with self.lock:
+                self.finished += 1
+                self.progress(self.finished, self.listed)
+        self._finish_hot(number)
+
+    def _finish_hot(self, number):
+        with self.lock:
+            if number not in self.hot:
+                return
+            self.hot.discard(number)
+            if self.hot:
+                return
+        self.batch.flush()  # Their field updates may still be queued or being sent by another worker
+        minutes = (time.time() - self.started) / 60
+        print(f"🔥 Hot set complete: all {self.hot_total} priority issues are in {self.dest_owner}/{self.dest_repo} "
+              f"after {minutes:.1f} min; the rest of the backlog is still being copied")
+        metrics.mark_event("hot_set_complete", f"{self.source} -> {self.dest_owner}/{self.dest_repo}")
+        if self.on_hot_set_complete:
+            self.on_hot_set_complete(self.hot_total)
+
+    # Pipeline stages
+
+    def stages(self, workers=None, copy_comments=True):
+        """Return the `(name, func, workers)` stages for pipeline.run_pipeline()."""
+        stages = [
+            ("fetch", self.fetch, 1),  # One worker, so issues reach create in listing order
+            ("create", self.create, 1),
+            ("comments", self.add_comments, workers or MAX_CONCURRENCY["create"]),
+            ("project", self.add_to_project, workers or MAX_CONCURRENCY["mutation"]),
+            ("fields", self.set_fields, workers or MAX_CONCURRENCY["mutation"]),
+        ]
+        if not copy_comments:
+            del stages[2]
+        return stages
+
+    def fetch(self, issue):
+        entry = self.journal.get("issue", issue["number"]) or {}
+        if entry.get("step") == STEP_DONE and self.sync_state is None:
+            print(f"⏭️ Issue #{issue['number']} already copied as #{entry['dest_number']}, skipping")
+            self.comments_by_number.pop(issue["number"], None)
+            with self.lock:
+                self.skipped += 1
+            self._finish(issue["number"])
+            return None
+
+        # Look up source issue project fields from the prefetched index
+        source_project_fields = self.source_field_index.get(issue["number"], {})
+        print(f"🔍 Source Issue Fields: {json.dumps(source_project_fields, indent=2)}")
+        return {
+            "issue": issue,
+            "fields": source_project_fields,
+            "node_id": entry.get("dest_node_id"),
+            "item_id": entry.get("project_item_id"),
+            "dest_number": entry.get("dest_number"),
+            "update": entry.get("step") == STEP_DONE,
         }
-        """,
-        "variables": {
-            "projectId": PROJECT_ID
+
+    def create(self, work):
+        issue = work["issue"]
+        existing = self.dest_index.find(issue)
+        if existing and not work["dest_number"]:
+            # Copied before but missing from the journal, e.g. by a run with another journal
+            print(f"📌 Issue #{issue['number']} already exists as #{existing['number']}, not creating it again")
+            work.update(node_id=existing["node_id"], dest_number=existing["number"], update=True)
+            self.journal.record_created("issue", issue["number"], existing["number"], existing["node_id"])
+            self.journal.record_comments("issue", issue["number"], existing.get("comments", 0))
+
+        if work["update"]:
+            if existing and existing["number"] == work["dest_number"] and self.dest_index.is_current(existing, issue):
+                return work  # Destination already matches the source
+            self.label_provisioner.ensure(issue.get("labels", []))
+            # Already copied: propagate the source changes instead
+            updated = update_issue(self.dest_owner, self.dest_repo, work["dest_number"], issue, source=self.source)
+            return work if updated else None
+
+        if work["node_id"]:
+            return work  # Created by an earlier run
+
+        # Create issue in destination repo, with any labels it needs created first
+        self.label_provisioner.ensure(issue.get("labels", []))
+        created_issue = create_issue(self.dest_owner, self.dest_repo, issue, source=self.source)
+        if not created_issue:
+            return None
+        work["node_id"] = created_issue["node_id"]
+        work["dest_number"] = created_issue["number"]
+        self.journal.record_created("issue", issue["number"], created_issue["number"], work["node_id"])
+        self.dest_index.add(issue["number"], created_issue)
+        return work
+
+    def add_comments(self, work):
+        number = work["issue"]["number"]
+        issue_comments = self.comments_by_number.pop(number, None)
+        if issue_comments is None:
+            self.comment_failures.add(number)  # Could not be read; try again next run
+            return work
+
+        if not post_comments(self.dest_owner, self.dest_repo, work["dest_number"], issue_comments,
+                             start=self.journal.comments_copied("issue", number),
+                             on_posted=lambda copied: self.journal.record_comments("issue", number, copied)):
+            self.comment_failures.add(number)
+        return work
+
+    def add_to_project(self, work):
+        if work["item_id"]:
+            return work  # Added to the project by an earlier run
+
+        work["item_id"] = add_issue_to_project(work["node_id"], self.project_id)
+        if not work["item_id"]:
+            return None
+        self.journal.record_project_item("issue", work["issue"]["number"], work["item_id"])
+        return work
+
+    def set_fields(self, work):
+        apply_project_fields(
+            self.batch,
+            work["item_id"], work["issue"], work["fields"], self.target_custom_fields, self.source_iterations,
+            applied=self.journal.applied_fields("issue", work["issue"]["number"]),
+        )
+        self._finish(work["issue"]["number"])
+        return work["issue"]["number"]
+
+    # Wrapping up
+
+    def finish(self, copied):
+        """Write the last field updates, verify them and record which of the `copied` issues are done.
+
+        Returns the copy_issues() result.
+        """
+        failures = self.batch.flush()
+
+        # Read every written value back in bulk; mismatches are forgotten so the next run writes them again
+        mismatches = verify_field_values(graphql_data, self.written)
+        for item_id, field_id, expected, actual in mismatches:
+            number = self.item_issues[item_id]
+            print(f"⚠️ Issue #{number} field {field_id} is '{actual}', expected '{expected}'")
+            self.journal.forget_field("issue", number, field_id)
+            failures.append({"key": number, "item_id": item_id, "field_id": field_id,
+                             "value": expected, "error": "verification mismatch"})
+        if self.written and not mismatches:
+            print(f"✅ Verified {sum(len(fields) for fields in self.written.values())} field values "
+                  f"on {len(self.written)} items")
+
+        # Issues whose field updates and comments all succeeded are finished; the rest are retried next run
+        failed_numbers = {failure["key"] for failure in failures} | self.comment_failures
+        for issue_number in copied:
+            if issue_number not in failed_numbers:
+                self.journal.mark_done("issue", issue_number)
+
+        if not self.listing_complete:
+            print("⚠️ Listing source issues stopped early; rerun to pick up the rest")
+        if self.hot:
+            print(f"⚠️ Hot set incomplete: {len(self.hot)} of {self.hot_total} priority issues were not copied")
+
+        if self.sync_state is not None:
+            if self.listing_complete and len(copied) == self.listed and not failed_numbers:
+                since = self.latest or self.sync_state["since"]
+                self.journal.set_sync_state("issue", since, self.sync_state["etag"])
+                print(f"📌 Sync high-water mark set to {since}")
+            else:
+                print("⚠️ Some issues failed; the sync high-water mark was not advanced")
+
+        # Issues a previous run finished count as copied, as they do in copy_pull_requests()
+        result = {
+            "listed": self.listed,
+            "copied": len(copied) + self.skipped,
+            "field_failures": len(failures),
+            "comment_failures": len(self.comment_failures),
+            "complete": self.listing_complete,
         }
-    }
+        if not self.listed:
+            print("No issues found.")
+            return result
+
+        print(f"✅ Copied {result['copied']} of {self.listed} issues ({self.skipped} by an earlier run).")
+        if failures:
+            print(f"⚠️ {len(failures)} field updates failed and will be retried on the next run")
+        if self.comment_failures:
+            print(f"⚠️ Comments of {len(self.comment_failures)} issues were not fully copied "
+                  f"and will be retried on the next run")
+        return result
+
+
+def copy_issues(workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, journal_path=DEFAULT_JOURNAL, sync=False,
+                source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO, dest_owner=DEST_OWNER, dest_repo=DEST_REPO,
+                project_id=PROJECT_ID, source_project_id=None, progress=None, snapshot=None, copy_comments=True,
+                lean=False, sharded=False, priority=None, on_hot_set_complete=None, adopt_unmarked=False):
+    """Copy all issues, with their project fields and comments, from the source repository.
+
+    Returns {"listed", "copied", "field_failures", "comment_failures", "complete"};
+    issues finished by an earlier run count as copied. The options match the
+    command-line flags below. The stages are in IssueCopyRun; resuming and
+    syncing are journal.Journal's, adoption dedup.DestinationIndex's, field
+    writes field_batch's and ordering priority's.
+    """
+    header = None
+    if snapshot:
+        header, snapshot_issues = open_snapshot(snapshot, "issue")
+        source_owner, source_repo = header["meta"]["source"].split("/", 1)
+        if sync:
+            print("⚠️ --sync does not apply to snapshot imports; copying every issue not already done")
+            sync = False
+
+    source = f"{source_owner}/{source_repo}"
+    use_repositories(*([] if snapshot else [source]), f"{dest_owner}/{dest_repo}")
+    journal = Journal(journal_path, source, f"{dest_owner}/{dest_repo}")
+    run = IssueCopyRun(source_owner, source_repo, dest_owner, dest_repo, project_id, journal, sync=sync,
+                       progress=progress, on_hot_set_complete=on_hot_set_complete)
+    if not run.prepare(source_project_id or project_id, batch_size, adopt_unmarked=adopt_unmarked,
+                       snapshot_header=header):
+        journal.close()
+        return {"listed": 0, "copied": 0, "field_failures": 0, "comment_failures": 0, "complete": False}
+
+    if snapshot:
+        issues = run.from_snapshot(snapshot_issues)
+    else:
+        issues = get_issues(source_owner, source_repo, sync_state=run.sync_state, lean=lean, sharded=sharded)
+    if priority:
+        issues = run.prioritized(issues, priority)
+    if copy_comments and not snapshot:
+        issues = with_comments(issues, run.comments_by_number)
+
+    copied = run_pipeline(run.counted(issues), run.stages(workers, copy_comments))
+    result = run.finish(copied)
+    journal.close()
+    return result
+
+
+def export_issues(path, source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO, project_id=PROJECT_ID):
+    """Export a source repository's issues to a compressed JSONL snapshot at `path`.
+
+    The snapshot holds the repository's labels and assignable users, the
+    project's fields and iteration map and, for every issue, the issue itself
+    with its project field values and comments. copy_issues(snapshot=path) replays it later,
+    as often as needed, without reading the source again. Returns the number
+    of issues exported, or None if the export failed.
+    """
+    use_repositories(f"{source_owner}/{source_repo}")
+    schema = load_project_schema(project_id)
+    if schema is None:
+        print("❌ Error fetching source project schema, nothing exported")
+        return None
 
-    response = requests.post(GITHUB_GRAPHQL_URL, json=query, headers=HEADERS)
-    
-    if response.status_code != 200:
-        print(f"❌ Error fetching source iterations: {response.status_code}, {response.text}")
-        return {}
-    
-    data = response.json()
-    
-    if "errors" in data:
-        print(f"❌ GraphQL errors: {json.dumps(data['errors'], indent=2)}")
-        return {}
-    
-    iteration_map = {}
-    
+    comments_by_number = {}
     try:
-        for field in data["data"]["node"]["fields"]["nodes"]:
-            if field is None:
-                continue
-                
-            if "configuration" in field and "iterations" in field["configuration"]:
-                for iteration in field["configuration"]["iterations"]:
-                    iteration_map[iteration["id"]] = iteration["title"]
-    except KeyError as e:
-        print(f"❌ Error parsing iterations: {e}")
-    
-    print(f"📅 Source Project Iterations Map: {json.dumps(iteration_map, indent=2)}")
-    return iteration_map
+        source_field_index, _ = get_project_item_field_values(project_id, source_owner, source_repo)
+        with SnapshotWriter(path, "issues", f"{source_owner}/{source_repo}", project_id) as writer:
+            writer.write("project_schema", schema["fields"])
+            writer.write("iterations", schema["iteration_titles"])
+            write_repo_metadata(writer, source_owner, source_repo)
+            for issue in with_comments(get_issues(source_owner, source_repo), comments_by_number):
+                writer.write("issue", {
+                    "issue": issue,
+                    "fields": source_field_index.get(issue["number"], {}),
+                    "comments": comments_by_number.pop(issue["number"], None),
+                })
+    except GitHubError:
+        print("❌ Export stopped early; nothing was written")
+        return None
 
-def copy_issues():
-    """Copy all issues and preserve all custom fields from the source project."""
-    issues = get_issues(SOURCE_OWNER, SOURCE_REPO)
+    exported = writer.counts.get("issue", 0)
+    print(f"✅ Exported {exported} issues from {source_owner}/{source_repo} to {path}")
+    return exported
 
-    if not issues:
-        print("No issues found.")
-        return
 
-    # Fetch project custom fields for both source and destination
+def plan_issues(workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, copy_comments=True):
+    """Report what copy_issues() would do, and what it would cost, without writing anything.
+
+    Reads both project schemas once, compiles the source -> target translation
+    table for fields, options and iterations, lists every value that will not
+    map, and estimates REST calls, GraphQL cost and wall time from the current
+    rate-limit budgets. The estimate covers the comments the listing reports
+    (unless `copy_comments` is off), the destination issue index and label
+    listing, and the labels that will be created.
+    """
+    use_repositories(f"{SOURCE_OWNER}/{SOURCE_REPO}", f"{DEST_OWNER}/{DEST_REPO}")
+    try:
+        # Issues and PRs share one number sequence, so this bounds the destination index listing
+        dest_index_pages = max(1, math.ceil(get_highest_number(DEST_OWNER, DEST_REPO) / 100))
+        dest_labels = {label["name"].lower() for label in get_labels(DEST_OWNER, DEST_REPO)}
+    except GitHubError:
+        print(f"❌ Could not read {DEST_OWNER}/{DEST_REPO}; no plan made")
+        return None
+
     source_custom_fields = get_custom_fields()  # Source project fields
     target_custom_fields = get_custom_fields()  # Destination project fields
-    
-    # Get source iteration ID to title mapping
     source_iterations = get_source_project_iterations()
-
-    for issue in issues:
-        # Extract source issue project fields
-        source_project_fields = get_issue_project_fields(SOURCE_OWNER, SOURCE_REPO, issue["number"])
-        print(f"🔍 Source Issue Fields: {json.dumps(source_project_fields, indent=2)}")
-
-        # Create issue in destination repo
-        issue_node_id = create_issue(DEST_OWNER, DEST_REPO, issue)
-        if issue_node_id:
-            # Add issue to project
-            item_id = add_issue_to_project(issue_node_id)
-
-            if item_id:
-                time.sleep(2)  # Ensure GitHub API processes the issue addition
-
-                for field_name, field_data in target_custom_fields.items():
-                    if field_name in source_project_fields:
-                        source_value = source_project_fields[field_name]
-
-                        # Determine the field type
-                        field_id = field_data["id"]
-                        field_type = field_data["type"]
-                        
-                        # Handle Iteration fields differently
-                        if field_type == "ProjectV2IterationField":
-                            # Handle differently if source_value is a dict (with title)
-                            if isinstance(source_value, dict) and "title" in source_value:
-                                iteration_title = source_value["title"]
-                            else:
-                                # If it's just an ID, look up the title from our map
-                                iteration_id = source_value if isinstance(source_value, str) else source_value.get("id")
-                                iteration_title = source_iterations.get(iteration_id)
-                                
-                            if iteration_title:
-                                # Find the target iteration with the same title
-                                target_iterations = field_data.get("iterations", {})
-                                if iteration_title in target_iterations:
-                                    target_iteration_id = target_iterations[iteration_title]["id"]
-                                    update_issue_field(item_id, field_id, target_iteration_id, field_type="iteration")
-                                    print(f"✅ Iteration '{iteration_title}' applied to issue '{issue['title']}'")
-                                else:
-                                    print(f"⚠️ No matching iteration with title '{iteration_title}' found in target project")
-                            else:
-                                print(f"⚠️ Could not determine title for iteration ID: {source_value}, skipping update")
-                                
-                        # Handle Single Select Fields (e.g., Status, Priority, Size, Epic)
-                        elif field_type == "ProjectV2SingleSelectField":
-                            field_options = field_data.get("options", {})
-                            value_id = field_options.get(source_value)
-                            if value_id:
-                                update_issue_field(item_id, field_id, value_id, field_type="singleSelect")
-                                print(f"✅ {field_name} '{source_value}' applied to issue '{issue['title']}'")
-                            else:
-                                print(f"⚠️ Could not find {field_name} '{source_value}' in destination project")
-
+    try:
+        source_field_index, prefetch_pages = get_project_item_field_values(PROJECT_ID, SOURCE_OWNER, SOURCE_REPO)
+    except GitHubError:
+        source_field_index = None
+    if None in (source_custom_fields, target_custom_fields, source_iterations, source_field_index):
+        print("❌ Could not read the project fields; no plan made")
+        return None
+    table = compile_translation(source_custom_fields, target_custom_fields)
+
+    issues = 0
+    field_updates = 0
+    unmapped_values = []
+    comment_counts = []
+    missing_labels = set()
+    for issue in get_issues(SOURCE_OWNER, SOURCE_REPO):
+        issues += 1
+        if copy_comments:
+            comment_counts.append(issue.get("comments", 0))
+        missing_labels.update(label["name"].lower() for label in issue.get("labels", [])
+                              if label["name"].lower() not in dest_labels)
+        source_project_fields = source_field_index.get(issue["number"], {})
+        for field_name, entry in table.items():
+            if field_name not in source_project_fields or entry["type"] not in (
+                "ProjectV2SingleSelectField", "ProjectV2IterationField"
+            ):
+                continue
+            value_name, target_id = translate_value(entry, source_project_fields[field_name], source_iterations)
+            if target_id:
+                field_updates += 1
+            else:
+                unmapped_values.append((issue["number"], field_name, value_name))
+
+    budgets = get_rate_limit()
+    estimate = estimate_migration(
+        issues,
+        field_updates,
+        batch_size,
+        workers or INITIAL_CONCURRENCY["mutation"],  # Adaptive caps start here and only grow if GitHub keeps up
+        budgets,
+        listing_pages=max(1, math.ceil(issues / 100)),
+        prefetch_pages=prefetch_pages,
+        comments=sum(comment_counts),
+        comment_queries=estimate_comment_queries(comment_counts),
+        setup_pages=dest_index_pages + max(1, math.ceil(len(dest_labels) / 100)),
+        label_creates=len(missing_labels),
+    )
+    print_plan(table, unmapped_values, issues, field_updates, estimate, budgets)
+    return estimate
+
+
+def priority_rules(spec):
+    """argparse type for --priority, so a bad rule is reported with the rule list rather than a generic error."""
+    try:
+        return parse_priority(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 if __name__ == "__main__":
-    copy_issues()
+    parser = argparse.ArgumentParser(description="Copy issues and project fields between repositories.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Fix the worker threads per pipeline stage. By default each stage is sized for the "
+                             "most requests it may have in flight, and the scheduler's adaptive caps raise "
+                             "concurrency while GitHub keeps up and cut it on secondary limits or rising latency")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Field updates per GraphQL mutation (default: %(default)s)")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL,
+                        help="SQLite journal used to resume interrupted runs (default: %(default)s)")
+    parser.add_argument("--sync", action="store_true",
+                        help="Only copy or update issues changed since the last sync")
+    parser.add_argument("--refresh-schema", action="store_true",
+                        help="Ignore the cached project schema and fetch it again")
+    parser.add_argument("--plan", action="store_true",
+                        help="Report the field mapping and estimated cost without copying anything")
+    parser.add_argument("--skip-comments", action="store_true",
+                        help="Do not copy issue comments")
+    parser.add_argument("--lean", action="store_true",
+                        help="List source issues through GraphQL, fetching only the fields the copy uses")
+    parser.add_argument("--sharded", action="store_true",
+                        help="List source issues in number ranges fetched concurrently (implies --lean)")
+    parser.add_argument("--priority", type=priority_rules, metavar="RULES",
+                        help="Copy issues in priority order. " + RULE_HELP)
+    parser.add_argument("--adopt-unmarked", action="store_true",
+                        help="Adopt and update destination issues with the same title and body that this tool "
+                             "did not mark as copied, e.g. ones copied by an older version")
+    parser.add_argument("--export", metavar="PATH",
+                        help="Write the source issues to a compressed JSONL snapshot instead of copying them")
+    parser.add_argument("--import", dest="import_path", metavar="PATH",
+                        help="Copy issues from a snapshot written by --export instead of the source repository")
+    parser.add_argument("--metrics-json",
+                        help="Write per-endpoint call metrics and rate-limit budgets to this JSON file at the end")
+    parser.add_argument("--metrics-textfile",
+                        help="Keep a Prometheus textfile with the same metrics up to date during the run")
+    args = parser.parse_args()
+    metrics.configure(textfile=args.metrics_textfile)
+    if args.refresh_schema:
+        invalidate_project_schema(PROJECT_ID)
+    try:
+        if args.plan:
+            plan_issues(workers=args.workers and max(1, args.workers), batch_size=args.batch_size,
+                        copy_comments=not args.skip_comments)
+        elif args.export:
+            export_issues(args.export)
+        else:
+            copy_issues(workers=args.workers and max(1, args.workers), batch_size=args.batch_size, journal_path=args.journal,
+                        sync=args.sync, snapshot=args.import_path, copy_comments=not args.skip_comments,
+                        lean=args.lean, sharded=args.sharded, priority=args.priority,
+                        adopt_unmarked=args.adopt_unmarked)
+    finally:
+        metrics.finish(json_path=args.metrics_json)
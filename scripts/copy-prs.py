@@ -1,13 +1,15 @@
-import os
-import requests
-from dotenv import load_dotenv
+import argparse
 
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-
-# GitHub API URL
-GITHUB_API_URL = "https://api.github.com"
+from branch_mirror import DEFAULT_MIRROR_DIR, MirrorError, head_branch, mirror_branches
+from comments import post_comments, with_comments
+from dedup import DestinationIndex, mark_body
+from credentials import CredentialError
+from github_client import GitHubError, credential_pool, graphql_data, paginate, rest, use_repositories
+from journal import DEFAULT_JOURNAL, STEP_DONE, Journal
+from labels import LabelProvisioner
+from metrics import metrics
+from sharded_listing import list_sharded
+from snapshot import SnapshotWriter, open_snapshot, write_repo_metadata
 
 # Set source and destination repositories
 SOURCE_OWNER = "furmidgeuk"
@@ -15,155 +17,489 @@ SOURCE_REPO = "github-testing"
 DEST_OWNER = "furmidgeuk"
 DEST_REPO = "nndcp-docs"
 
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json",
-}
+def get_pull_requests(owner, repo, sync_state=None, sharded=False):
+    """Stream all open and closed pull requests as each page arrives.
+
+    With a `sync_state` dict holding a `since` timestamp, only PRs updated since
+    then are listed. The pulls endpoint has no `since` filter, so these come from
+    the issues endpoint, which lists PRs too. Its `etag` is sent with the first
+    page and the new one written back, as in copy-issues.py.
+
+    With `sharded`, a full listing is split into PR-number ranges fetched
+    concurrently and yielded in number order as compact IssueRecords (see
+    sharded_listing.list_sharded()).
+    """
+    if sync_state and sync_state.get("since"):
+        params = {"state": "all", "per_page": 100, "since": sync_state["since"], "sort": "updated", "direction": "desc"}
+        for issue in paginate(f"/repos/{owner}/{repo}/issues", error="fetching PRs", conditional=sync_state,
+                              params=params):
+            if "pull_request" in issue:  # Keep only PRs
+                yield issue
+        if sync_state["not_modified"]:
+            print(f"✅ No PRs updated since {sync_state['since']}")
+        return
+
+    if sharded:
+        yield from list_sharded(owner, repo, "pr")
+        return
+
+    yield from paginate(f"/repos/{owner}/{repo}/pulls", error="fetching PRs",
+                        params={"state": "all", "per_page": 100})
+
+def get_existing_branches(owner, repo):
+    """Fetch all existing branches in the destination repository as a set. Raises GitHubError if that fails."""
+    branches = paginate(f"/repos/{owner}/{repo}/branches", error="fetching branches", params={"per_page": 100})
+    return {branch["name"] for branch in branches}
+
+def get_pr_metadata(owner, repo):
+    """Fetch head/base branches, labels and assignees for every PR in bulk.
 
-def get_pull_requests(owner, repo):
-    """Fetch all open and closed pull requests."""
-    prs = []
-    page = 1
+    Pages through the repository's pullRequests connection 100 PRs at a time and
+    returns a PR number -> {"head", "base", "cross_repository", "labels",
+    "assignees"} dict, where `cross_repository` is True for PRs from forks, replacing
+    the three per-PR REST reads of get_pr_details(), get_pr_labels() and
+    get_pr_assignees().
+    """
+    query = """
+    query($owner: String!, $repo: String!, $cursor: String) {
+      repository(owner: $owner, name: $repo) {
+        pullRequests(first: 100, after: $cursor, states: [OPEN, CLOSED, MERGED]) {
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          nodes {
+            number
+            headRefName
+            baseRefName
+            isCrossRepository
+            labels(first: 100) {
+              nodes {
+                name
+              }
+            }
+            assignees(first: 100) {
+              nodes {
+                login
+              }
+            }
+          }
+        }
+      }
+    }
+    """
+
+    metadata = {}
+    cursor = None
     while True:
-        prs_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls"
-        response = requests.get(prs_url, headers=HEADERS, params={"state": "all", "per_page": 100, "page": page})
-
-        if response.status_code == 200:
-            batch = response.json()
-            if not batch:
-                break  # No more PRs to fetch
-            prs.extend(batch)
-            page += 1
-        else:
-            print(f"❌ Error fetching PRs: {response.status_code}, {response.text}")
+        data = graphql_data({"query": query, "variables": {"owner": owner, "repo": repo, "cursor": cursor}})
+        pull_requests = ((data or {}).get("repository") or {}).get("pullRequests")
+        if pull_requests is None:
+            print("❌ Error fetching PR metadata")
             break
-    
-    return prs
 
-def get_existing_branches(owner, repo):
-    """Fetch all existing branches in the destination repository."""
-    branches_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/branches"
-    response = requests.get(branches_url, headers=HEADERS)
+        for node in pull_requests["nodes"]:
+            metadata[node["number"]] = {
+                "head": node["headRefName"],
+                "base": node["baseRefName"],
+                "cross_repository": node["isCrossRepository"],
+                "labels": [label["name"] for label in node["labels"]["nodes"]],
+                "assignees": [assignee["login"] for assignee in node["assignees"]["nodes"]],
+            }
 
-    if response.status_code == 200:
-        return [branch["name"] for branch in response.json()]
-    else:
-        print(f"❌ Error fetching branches: {response.status_code}, {response.text}")
-        return []
+        if not pull_requests["pageInfo"]["hasNextPage"]:
+            break
+        cursor = pull_requests["pageInfo"]["endCursor"]
+
+    print(f"📦 Loaded metadata for {len(metadata)} PRs")
+    return metadata
 
 def get_pr_details(owner, repo, pr_number):
     """Fetch additional PR details like head and base branches."""
-    pr_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr_number}"
-    response = requests.get(pr_url, headers=HEADERS)
-
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"❌ Error fetching PR details for #{pr_number}: {response.status_code}, {response.text}")
-        return None
+    return rest("GET", f"/repos/{owner}/{repo}/pulls/{pr_number}", error=f"fetching PR details for #{pr_number}")
 
 def get_pr_labels(owner, repo, pr_number):
     """Fetch labels for a specific PR."""
-    labels_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{pr_number}/labels"
-    response = requests.get(labels_url, headers=HEADERS)
-    
-    if response.status_code == 200:
-        return [label["name"] for label in response.json()]
-    else:
-        print(f"❌ Error fetching labels for PR #{pr_number}: {response.status_code}, {response.text}")
-        return []
+    labels = rest("GET", f"/repos/{owner}/{repo}/issues/{pr_number}/labels", error=f"fetching labels for PR #{pr_number}")
+    return [label["name"] for label in labels or []]
 
 def get_pr_assignees(owner, repo, pr_number):
     """Fetch assignees for a specific PR."""
     # Using the issues endpoint to get assignees since PR is also an issue
-    issue_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{pr_number}"
-    response = requests.get(issue_url, headers=HEADERS)
-    
-    if response.status_code == 200:
-        return [assignee["login"] for assignee in response.json().get("assignees", [])]
-    else:
-        print(f"❌ Error fetching assignees for PR #{pr_number}: {response.status_code}, {response.text}")
-        return []
+    issue = rest("GET", f"/repos/{owner}/{repo}/issues/{pr_number}", error=f"fetching assignees for PR #{pr_number}")
+    return [assignee["login"] for assignee in (issue or {}).get("assignees", [])]
 
-def add_labels_to_pr(owner, repo, pr_number, labels):
-    """Add labels to a pull request."""
-    if not labels:
-        return
-        
-    labels_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{pr_number}/labels"
-    response = requests.post(labels_url, json={"labels": labels}, headers=HEADERS)
-    
-    if response.status_code == 200:
-        print(f"✅ Labels added to PR #{pr_number}: {', '.join(labels)}")
-    else:
-        print(f"❌ Error adding labels to PR #{pr_number}: {response.status_code}, {response.text}")
+def set_pr_labels_and_assignees(owner, repo, pr_number, labels, assignees, state="open"):
+    """Set a pull request's labels and assignees, and close it if `state` is "closed", in one call.
 
-def add_assignees_to_pr(owner, repo, pr_number, assignees):
-    """Add assignees to a pull request."""
-    if not assignees:
-        return
-        
-    assignees_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues/{pr_number}/assignees"
-    response = requests.post(assignees_url, json={"assignees": assignees}, headers=HEADERS)
-    
-    if response.status_code == 201:
-        print(f"✅ Assignees added to PR #{pr_number}: {', '.join(assignees)}")
-    else:
-        print(f"❌ Error adding assignees to PR #{pr_number}: {response.status_code}, {response.text}")
+    The pulls endpoint cannot take labels or assignees when a PR is created, nor
+    create it closed, but the issues endpoint sets all three at once. Returns
+    True on success.
+    """
+    data = {"labels": labels, "assignees": assignees}
+    if state == "closed":
+        data["state"] = "closed"
+    elif not labels and not assignees:
+        return True
+
+    response = rest("PATCH", f"/repos/{owner}/{repo}/issues/{pr_number}",
+                    error=f"setting labels and assignees on PR #{pr_number}", json=data)
+
+    if response is None:
+        return False
+    print(f"✅ Labels ({', '.join(labels) or 'none'}) and assignees ({', '.join(assignees) or 'none'}) "
+          f"set on {state} PR #{pr_number}")
+    return True
+
+def update_pull_request(owner, repo, pr_number, pr, labels, assignees, source=None):
+    """Bring an already-copied destination PR in line with its source PR."""
+    pr_data = {
+        "title": pr["title"],
+        "body": mark_body(pr.get("body"), source, pr["number"]) if source else pr.get("body", "") or "",
+        "state": pr["state"],
+        "labels": labels,
+        "assignees": assignees,
+    }
+
+    # The issues endpoint updates a PR's title, body, state, labels and assignees in one call
+    updated_pr = rest("PATCH", f"/repos/{owner}/{repo}/issues/{pr_number}",
+                      error=f"updating PR #{pr_number}", json=pr_data)
+
+    if updated_pr is not None:
+        print(f"🔄 PR #{pr_number} '{pr['title']}' updated from source")
+    return updated_pr is not None
+
+def get_pr_source_metadata(pr_number, pr_metadata, source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO):
+    """Return a PR's head/base, labels and assignees, from `pr_metadata` when it has them."""
+    if pr_metadata and pr_number in pr_metadata:
+        return pr_metadata[pr_number]
+
+    # Not in the bulk load (e.g. opened since): fall back to per-PR reads
+    pr_details = get_pr_details(source_owner, source_repo, pr_number)
+    if not pr_details:
+        return None
 
-def create_pull_request(owner, repo, pr):
-    """Create a pull request in the destination repository with labels and assignees."""
+    # A deleted fork leaves no head repository
+    head_repo = (pr_details["head"].get("repo") or {}).get("full_name")
+    return {
+        "head": pr_details["head"]["ref"],
+        "base": pr_details["base"]["ref"],
+        "cross_repository": head_repo != f"{source_owner}/{source_repo}",
+        "labels": get_pr_labels(source_owner, source_repo, pr_number),
+        "assignees": get_pr_assignees(source_owner, source_repo, pr_number),
+    }
+
+def create_pull_request(owner, repo, pr, journal=None, sync=False, pr_metadata=None, existing_branches=None,
+                        source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO, dest_index=None, label_provisioner=None):
+    """Create a pull request in the destination repository with labels, assignees and state.
+
+    With a `journal`, PRs already copied by an earlier run are skipped, and PRs
+    created without their labels and assignees only have those re-applied. With
+    `sync`, already-copied PRs are updated from the source instead of skipped.
+    `pr_metadata` (from get_pr_metadata()) and `existing_branches` are loaded
+    once per run; without them each PR is looked up individually.
+
+    With a `dest_index` (a dedup.DestinationIndex of the destination), the PR
+    body is marked with its origin, a PR that already exists in the destination
+    is adopted instead of created again, and an already-copied PR is only
+    updated when it differs from its source. With a `label_provisioner`
+    (a labels.LabelProvisioner), missing labels are created with their source
+    colour and description before they are applied.
+    Returns True when the PR was copied, updated or already done.
+    """
     pr_number = pr["number"]
-    pr_details = get_pr_details(SOURCE_OWNER, SOURCE_REPO, pr_number)
+    source = f"{source_owner}/{source_repo}" if dest_index else None
+    entry = (journal.get("pr", pr_number) if journal else None) or {}
+    if entry.get("step") == STEP_DONE and not sync:
+        print(f"⏭️ PR #{pr_number} already copied as #{entry['dest_number']}, skipping")
+        return True
+
+    existing = dest_index.find(pr) if dest_index else None
+    if existing and not entry.get("dest_number"):
+        # Copied before but missing from the journal, e.g. by a run with another journal
+        print(f"📌 PR #{pr_number} already exists as #{existing['number']}, not creating it again")
+        if journal:
+            journal.record_created("pr", pr_number, existing["number"], existing["node_id"])
+            journal.mark_done("pr", pr_number)
+            journal.record_comments("pr", pr_number, existing.get("comments", 0))
+        entry = {"dest_number": existing["number"], "step": STEP_DONE}
+
+    pr_details = get_pr_source_metadata(pr_number, pr_metadata, source_owner, source_repo)
 
     if not pr_details:
         print(f"⚠️ Skipping PR #{pr_number} - could not retrieve details.")
-        return
+        return False
+
+    # Get labels and assignees from source PR
+    labels = pr_details["labels"]
+    assignees = pr_details["assignees"]
+    if label_provisioner and labels:
+        label_provisioner.ensure(pr.get("labels") or [{"name": name} for name in labels])
+
+    if entry.get("step") == STEP_DONE:
+        if existing and existing["number"] == entry["dest_number"] and dest_index.is_current(
+                existing, pr, labels=labels, assignees=assignees):
+            return True  # Destination already matches the source
+        return update_pull_request(owner, repo, entry["dest_number"], pr, labels, assignees, source=source)
 
     # Extract head and base branches
-    source_branch = pr_details["head"]["ref"]
-    base_branch = pr_details["base"]["ref"]
+    source_branch = pr_details["head"]
+    base_branch = pr_details["base"]
+
+    if existing_branches is None:
+        try:
+            existing_branches = get_existing_branches(owner, repo)
+        except GitHubError:
+            print(f"⚠️ Skipping PR #{pr_number} - could not list the branches of {owner}/{repo}.")
+            return False
+
+    # A fork's head is under its own name if it was mirrored
+    if pr_details.get("cross_repository") and head_branch(pr_number, pr_details) in existing_branches:
+        source_branch = head_branch(pr_number, pr_details)
 
     # Check if base branch exists in the destination repo
-    existing_branches = get_existing_branches(owner, repo)
     if base_branch not in existing_branches:
         print(f"⚠️ Base branch '{base_branch}' not found in {owner}/{repo}. Defaulting to 'main'.")
         base_branch = "main"  # Set default base branch
 
-    # Get labels and assignees from source PR
-    labels = get_pr_labels(SOURCE_OWNER, SOURCE_REPO, pr_number)
-    assignees = get_pr_assignees(SOURCE_OWNER, SOURCE_REPO, pr_number)
+    if entry.get("dest_number"):
+        # Created by an earlier run that stopped before labels and assignees were applied
+        if not set_pr_labels_and_assignees(owner, repo, entry["dest_number"], labels, assignees, pr["state"]):
+            return False
+        journal.mark_done("pr", pr_number)
+        return True
 
     pr_data = {
         "title": pr["title"],
-        "body": pr.get("body", "") or "",  # Ensure body is a string
+        "body": mark_body(pr.get("body"), source, pr_number) if source else pr.get("body", "") or "",
         "head": source_branch,  # Source branch
         "base": base_branch,  # Target branch
     }
 
-    prs_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls"
-    response = requests.post(prs_url, json=pr_data, headers=HEADERS)
+    created_pr = rest("POST", f"/repos/{owner}/{repo}/pulls", expected=(201,), error="creating PR", json=pr_data)
 
-    if response.status_code == 201:
-        new_pr_number = response.json()["number"]
+    if created_pr is not None:
+        new_pr_number = created_pr["number"]
         print(f"✅ Pull request '{pr['title']}' copied successfully as PR #{new_pr_number}.")
+        if journal:
+            journal.record_created("pr", pr_number, new_pr_number, created_pr["node_id"])
+        if dest_index:
+            dest_index.add(pr_number, created_pr)
         
-        # Add labels and assignees to the new PR
-        add_labels_to_pr(owner, repo, new_pr_number, labels)
-        add_assignees_to_pr(owner, repo, new_pr_number, assignees)
+        # Add labels and assignees to the new PR, closing it if the source is; if this fails, the next run retries it
+        if not set_pr_labels_and_assignees(owner, repo, new_pr_number, labels, assignees, pr["state"]):
+            return False
+        if journal:
+            journal.mark_done("pr", pr_number)
+        return True
+
+    return False
+
+def copy_pull_requests(journal_path=DEFAULT_JOURNAL, sync=False, source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO,
+                       dest_owner=DEST_OWNER, dest_repo=DEST_REPO, progress=None, snapshot=None, copy_comments=True,
+                       sharded=False, mirror=False, mirror_dir=DEFAULT_MIRROR_DIR, adopt_unmarked=False):
+    """Copy all PRs from source to destination repository with labels and assignees.
+
+    Progress is recorded in the SQLite journal at `journal_path`, so a rerun
+    resumes where the previous one stopped. With `sync`, only PRs updated since
+    the previous sync are listed and already-copied ones are updated in place.
+    PRs are created as each listing page arrives, one at a time, so destination
+    numbers follow the source; for them the scheduler's adaptive concurrency
+    caps only act as a throttle.
+
+    The repositories default to the constants at the top of this file.
+    `progress`, if given, is called with the number of PRs finished and listed
+    so far after each one. Returns {"listed", "copied", "complete"}.
+
+    With `snapshot`, the path of a file written by export_pull_requests(), the
+    source PRs and their metadata are read from it instead of the API.
+
+    With `copy_comments`, each PR's conversation comments are read in bulk
+    alongside the listing and posted once the PR exists; a PR only counts as
+    copied when all of them are. Review comments are not copied.
+
+    With `sharded`, the source listing is split into number ranges fetched
+    concurrently (see get_pull_requests()).
+
+    With `mirror`, every head and base branch the PRs need is pushed from a
+    local bare mirror of the source (kept under `mirror_dir`) to the
+    destination in one git push before any PR is created, and the resulting
+    branch list replaces the destination branch listing. See
+    branch_mirror.mirror_branches().
+
+    With `adopt_unmarked`, destination PRs this tool did not mark as copied are
+    adopted when their title and body match (see dedup.DestinationIndex).
+    """
+    if snapshot:
+        header, snapshot_prs = open_snapshot(snapshot, "pr")
+        source_owner, source_repo = header["meta"]["source"].split("/", 1)
+        if sync:
+            print("⚠️ --sync does not apply to snapshot imports; copying every PR not already done")
+            sync = False
+
+    use_repositories(*([] if snapshot else [f"{source_owner}/{source_repo}"]), f"{dest_owner}/{dest_repo}")
+    journal = Journal(journal_path, f"{source_owner}/{source_repo}", f"{dest_owner}/{dest_repo}")
+    sync_state = journal.get_sync_state("pr") if sync else None
+
+    # Existing destination items, so nothing is created twice even without a journal record
+    try:
+        dest_index = DestinationIndex(dest_owner, dest_repo, f"{source_owner}/{source_repo}",
+                                      adopt_unmarked=adopt_unmarked)
+        label_provisioner = LabelProvisioner(dest_owner, dest_repo)
+    except GitHubError:
+        print("❌ Could not list the destination repository; stopping rather than risk duplicates")
+        journal.close()
+        return {"listed": 0, "copied": 0, "complete": False}
+
+    # Read-only lookups are done once for the whole run instead of once per PR
+    pr_metadata = {} if snapshot else get_pr_metadata(source_owner, source_repo)
+
+    if mirror:
+        if snapshot:
+            # Every PR's branches are needed before the first one is created, so read them ahead
+            for record in open_snapshot(snapshot, "pr")[1]:
+                if record["metadata"]:
+                    pr_metadata[record["pr"]["number"]] = record["metadata"]
+        try:
+            _, token = credential_pool().authorize("core", dest_owner)  # The push needs write access
+            existing_branches = mirror_branches(source_owner, source_repo, dest_owner, dest_repo, pr_metadata,
+                                                token=token, mirror_dir=mirror_dir)
+        except (MirrorError, CredentialError) as e:
+            print(f"❌ Error mirroring branches: {e}")
+            journal.close()
+            return {"listed": 0, "copied": 0, "complete": False}
     else:
-        print(f"❌ Error creating PR: {response.status_code}, {response.text}")
+        try:
+            existing_branches = get_existing_branches(dest_owner, dest_repo)
+        except GitHubError:
+            print(f"❌ Could not list the branches of {dest_owner}/{dest_repo}")
+            journal.close()
+            return {"listed": 0, "copied": 0, "complete": False}
+
+    # Source PR number -> comments, filled in as the listing is read
+    comments_by_number = {}
+
+    def snapshot_prs_with_metadata():
+        for record in snapshot_prs:
+            if record["metadata"]:
+                pr_metadata[record["pr"]["number"]] = record["metadata"]
+            if record.get("comments") is not None:
+                comments_by_number[record["pr"]["number"]] = record["comments"]
+            yield record["pr"]
 
-def copy_pull_requests():
-    """Copy all PRs from source to destination repository with labels and assignees."""
-    prs = get_pull_requests(SOURCE_OWNER, SOURCE_REPO)
-    
-    if not prs:
+    def copy_pr_comments(pr_number):
+        pr_comments = comments_by_number.pop(pr_number, None)
+        if pr_comments is None:
+            print(f"⚠️ Comments of PR #{pr_number} could not be read; they will be copied on the next run")
+            return False
+        dest_number = journal.get("pr", pr_number)["dest_number"]
+        return post_comments(dest_owner, dest_repo, dest_number, pr_comments,
+                             start=journal.comments_copied("pr", pr_number),
+                             on_posted=lambda posted: journal.record_comments("pr", pr_number, posted))
+
+    listed = 0
+    copied = 0
+    latest = None
+    complete = True
+    try:
+        if snapshot:
+            prs = snapshot_prs_with_metadata()
+        else:
+            prs = get_pull_requests(source_owner, source_repo, sync_state=sync_state, sharded=sharded)
+            if copy_comments:
+                prs = with_comments(prs, comments_by_number)
+        for pr in prs:
+            listed += 1
+            latest = max(latest or pr["updated_at"], pr["updated_at"])
+            if create_pull_request(dest_owner, dest_repo, pr, journal=journal, sync=sync,
+                                   pr_metadata=pr_metadata, existing_branches=existing_branches,
+                                   source_owner=source_owner, source_repo=source_repo, dest_index=dest_index,
+                                   label_provisioner=label_provisioner) \
+                    and (not copy_comments or copy_pr_comments(pr["number"])):
+                copied += 1
+            if progress:
+                progress(listed, listed)
+    except GitHubError:
+        complete = False
+        print("⚠️ Listing source PRs stopped early; rerun to pick up the rest")
+
+    if not listed:
         print("No PRs found.")
-        return
 
-    for pr in prs:
-        create_pull_request(DEST_OWNER, DEST_REPO, pr)
+    if sync:
+        if complete and copied == listed:
+            since = latest or sync_state["since"]
+            journal.set_sync_state("pr", since, sync_state["etag"])
+            print(f"📌 Sync high-water mark set to {since}")
+        else:
+            print("⚠️ Some PRs failed; the sync high-water mark was not advanced")
+    journal.close()
+    return {"listed": listed, "copied": copied, "complete": complete}
+
+def export_pull_requests(path, source_owner=SOURCE_OWNER, source_repo=SOURCE_REPO):
+    """Export a source repository's PRs to a compressed JSONL snapshot at `path`.
+
+    The snapshot holds the repository's labels and assignable users and, for
+    every PR, the PR itself with its head/base branches, labels, assignees and
+    comments.
+    copy_pull_requests(snapshot=path) replays it later without reading the
+    source again. Returns the number of PRs exported, or None if the export failed.
+    """
+    use_repositories(f"{source_owner}/{source_repo}")
+    pr_metadata = get_pr_metadata(source_owner, source_repo)
+    comments_by_number = {}
+
+    try:
+        with SnapshotWriter(path, "prs", f"{source_owner}/{source_repo}") as writer:
+            write_repo_metadata(writer, source_owner, source_repo)
+            for pr in with_comments(get_pull_requests(source_owner, source_repo), comments_by_number):
+                writer.write("pr", {
+                    "pr": pr,
+                    "metadata": pr_metadata.get(pr["number"]),
+                    "comments": comments_by_number.pop(pr["number"], None),
+                })
+    except GitHubError:
+        print("❌ Export stopped early; nothing was written")
+        return None
+
+    exported = writer.counts.get("pr", 0)
+    print(f"✅ Exported {exported} PRs from {source_owner}/{source_repo} to {path}")
+    return exported
 
 if __name__ == "__main__":
-    copy_pull_requests()
+    parser = argparse.ArgumentParser(description="Copy pull requests between repositories.")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL,
+                        help="SQLite journal used to resume interrupted runs (default: %(default)s)")
+    parser.add_argument("--sync", action="store_true",
+                        help="Only copy or update PRs changed since the last sync")
+    parser.add_argument("--skip-comments", action="store_true",
+                        help="Do not copy PR comments")
+    parser.add_argument("--sharded", action="store_true",
+                        help="List source PRs in number ranges fetched concurrently")
+    parser.add_argument("--mirror-branches", action="store_true",
+                        help="Push the branches the PRs need from a local mirror of the source before creating them")
+    parser.add_argument("--mirror-dir", default=DEFAULT_MIRROR_DIR,
+                        help="Where source repositories are mirrored (default: %(default)s)")
+    parser.add_argument("--adopt-unmarked", action="store_true",
+                        help="Adopt and update destination PRs with the same title and body that this tool "
+                             "did not mark as copied, e.g. ones copied by an older version")
+    parser.add_argument("--export", metavar="PATH",
+                        help="Write the source PRs to a compressed JSONL snapshot instead of copying them")
+    parser.add_argument("--import", dest="import_path", metavar="PATH",
+                        help="Copy PRs from a snapshot written by --export instead of the source repository")
+    parser.add_argument("--metrics-json",
+                        help="Write per-endpoint call metrics and rate-limit budgets to this JSON file at the end")
+    parser.add_argument("--metrics-textfile",
+                        help="Keep a Prometheus textfile with the same metrics up to date during the run")
+    args = parser.parse_args()
+    metrics.configure(textfile=args.metrics_textfile)
+    try:
+        if args.export:
+            export_pull_requests(args.export)
+        else:
+            copy_pull_requests(journal_path=args.journal, sync=args.sync, snapshot=args.import_path,
+                               copy_comments=not args.skip_comments, sharded=args.sharded,
+                               mirror=args.mirror_branches, mirror_dir=args.mirror_dir,
+                               adopt_unmarked=args.adopt_unmarked)
+    finally:
+        metrics.finish(json_path=args.metrics_json)
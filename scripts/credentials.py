@@ -0,0 +1,252 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+import requests
+
+# Refresh installation tokens this many seconds before GitHub expires them
+REFRESH_MARGIN = 300
+
+# Seconds a credential is left out of rotation after it fails to authenticate
+FAILED_CREDENTIAL_COOLDOWN = 60
+
+# Lifetime of the JWT used to request installation tokens; GitHub allows at most 10 minutes
+APP_JWT_LIFETIME = 540
+
+
+class CredentialError(RuntimeError):
+    """Raised when no usable credential is available or a token cannot be minted."""
+
+
+def app_jwt(app_id, private_key):
+    """Sign the RS256 JWT a GitHub App uses to authenticate as itself.
+
+    PyJWT is only needed for GitHub App authentication, so it is imported here
+    rather than at module level.
+    """
+    try:
+        import jwt
+    except ImportError:
+        raise CredentialError("GitHub App authentication needs PyJWT: pip install 'PyJWT[crypto]'")
+
+    now = int(time.time())
+    # Backdate iat to allow for clock drift, as GitHub recommends
+    payload = {"iat": now - 60, "exp": now + APP_JWT_LIFETIME, "iss": str(app_id)}
+    return jwt.encode(payload, private_key, algorithm="RS256")
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class Credential(ABC):
+    """A token plus the rate-limit budgets GitHub last reported for it."""
+
+    def __init__(self, name, owner=None):
+        self.name = name
+        self.owner = owner.lower() if owner else None  # Account the credential can see; None for any
+        self.budgets = {}
+        self.uses = 0
+        self.failed_until = 0
+
+    @abstractmethod
+    def token(self):
+        """Return the token to send, minting or refreshing it if needed."""
+
+    def remaining(self, resource):
+        """Requests left for `resource`, treating an unknown or reset budget as unlimited."""
+        budget = self.budgets.get(resource)
+        if not budget or budget["remaining"] is None or (budget["reset"] and budget["reset"] <= time.time()):
+            return float("inf")
+        return budget["remaining"]
+
+
+class TokenCredential(Credential):
+    """A personal access token or any other fixed token."""
+
+    def __init__(self, token, name=None):
+        super().__init__(name or f"token …{token[-4:]}")
+        self._token = token
+
+    def token(self):
+        return self._token
+
+
+class AppInstallationCredential(Credential):
+    """Installation access tokens minted from a GitHub App's private key.
+
+    Each installation token has its own rate limit, which grows with the size
+    of the organization, and expires after an hour. A new one is minted
+    REFRESH_MARGIN seconds before the current one expires. `make_jwt` signs
+    the App JWT and defaults to app_jwt(). An installation only sees the
+    repositories of the account it is installed on, `owner`, when that is known.
+    """
+
+    def __init__(self, api_url, app_id, private_key, installation_id, make_jwt=app_jwt, owner=None):
+        super().__init__(f"app {app_id} installation {installation_id}", owner)
+        self.api_url = api_url.rstrip("/")
+        self.app_id = app_id
+        self.private_key = private_key
+        self.installation_id = installation_id
+        self.make_jwt = make_jwt
+        self._token = None
+        self.expires_at = 0
+        self.lock = threading.Lock()
+
+    def token(self):
+        with self.lock:
+            if self._token is None or self.expires_at - time.time() < REFRESH_MARGIN:
+                self._token, self.expires_at = self._mint()
+            return self._token
+
+    def _mint(self):
+        response = requests.post(
+            f"{self.api_url}/app/installations/{self.installation_id}/access_tokens",
+            headers={
+                "Authorization": f"Bearer {self.make_jwt(self.app_id, self.private_key)}",
+                "Accept": "application/vnd.github.v3+json",
+            },
+        )
+        if response.status_code != 201:
+            raise CredentialError(f"Error minting token for {self.name}: {response.status_code}, {response.text}")
+
+        data = response.json()
+        print(f"🔑 Minted installation token for {self.name}, expires {data['expires_at']}")
+        return data["token"], _parse_timestamp(data["expires_at"])
+
+
+def repo_installation(api_url, app_id, private_key, owner, repo, make_jwt=app_jwt):
+    """Return `(installation_id, account)` of the GitHub App installation that can see `owner/repo`."""
+    response = requests.get(
+        f"{api_url.rstrip('/')}/repos/{owner}/{repo}/installation",
+        headers={
+            "Authorization": f"Bearer {make_jwt(app_id, private_key)}",
+            "Accept": "application/vnd.github.v3+json",
+        },
+    )
+    if response.status_code != 200:
+        raise CredentialError(f"App {app_id} is not installed on {owner}/{repo}: {response.status_code}, "
+                              f"{response.text}")
+    data = response.json()
+    return data["id"], data["account"]["login"]
+
+
+class CredentialPool:
+    """Spreads requests over several credentials by remaining rate-limit budget.
+
+    Every request goes to the credential with the most budget left for its
+    resource ("core" or "graphql"); ties go to the least used one. Requests for
+    a known owner only go to credentials that can see that owner's
+    repositories. Budgets are learnt from the `X-RateLimit-*` headers of each
+    response.
+    """
+
+    def __init__(self, credentials, app=None):
+        self.credentials = list(credentials)
+        self.app = app  # (api_url, app_id, private_key) whose installations are looked up per owner
+        self.owners = set()  # Owners whose installation has been looked up
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def add_repositories(self, repos):
+        """Add the App installation that can see each `owner/repo`, looking each owner up once."""
+        if not self.app:
+            return
+        for full_name in repos:
+            owner, repo = full_name.split("/")
+            with self.lock:
+                if owner.lower() in self.owners:
+                    continue
+                self.owners.add(owner.lower())
+            try:
+                installation_id, account = repo_installation(*self.app, owner, repo)
+            except (CredentialError, requests.exceptions.RequestException) as e:
+                print(f"⚠️ {e}")
+                continue
+            with self.lock:
+                if not any(isinstance(c, AppInstallationCredential) and c.installation_id == installation_id
+                           for c in self.credentials):
+                    self.credentials.append(AppInstallationCredential(*self.app, installation_id, owner=account))
+
+    def select(self, resource, owner=None):
+        """Return the credential to use for the next request against `resource`.
+
+        With `owner`, credentials limited to another account are skipped. Without
+        one, credentials that can see any account are preferred.
+        """
+        with self.lock:
+            now = time.time()
+            usable = [credential for credential in self.credentials if credential.failed_until <= now]
+            if not usable:
+                raise CredentialError("No usable GitHub credentials")
+            if owner:
+                scoped = [c for c in usable if c.owner in (None, owner.lower())]
+            else:
+                scoped = [c for c in usable if c.owner is None]
+            credential = max(scoped or usable, key=lambda c: (c.remaining(resource), -c.uses))
+            credential.uses += 1
+            return credential
+
+    def authorize(self, resource, owner=None):
+        """Return `(credential, token)`, skipping credentials whose token cannot be minted."""
+        while True:
+            credential = self.select(resource, owner)
+            try:
+                return credential, credential.token()
+            except (CredentialError, requests.exceptions.RequestException) as e:
+                print(f"❌ {e}")
+                self.disable(credential)
+
+    def disable(self, credential):
+        """Leave a credential out of rotation for FAILED_CREDENTIAL_COOLDOWN seconds."""
+        with self.lock:
+            credential.failed_until = time.time() + FAILED_CREDENTIAL_COOLDOWN
+
+    def update(self, credential, response, resource):
+        """Record the budget a response reported for the credential that sent it."""
+        headers = response.headers
+        if response.status_code == 401:
+            print(f"⚠️ {credential.name} was rejected, leaving it out for {FAILED_CREDENTIAL_COOLDOWN}s")
+            self.disable(credential)
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self.lock:
+            credential.budgets[resource] = {
+                "remaining": int(headers["X-RateLimit-Remaining"]),
+                "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                "reset": int(headers.get("X-RateLimit-Reset", 0)),
+            }
+
+    def wait_time(self, resource):
+        """Seconds until some credential has budget for `resource`; 0 if one has it now."""
+        with self.lock:
+            if any(credential.remaining(resource) > 0 for credential in self.credentials):
+                return 0
+            return min(credential.budgets[resource]["reset"] for credential in self.credentials) - time.time() + 1
+
+
+def build_credential_pool(api_url, token=None, extra_tokens="", app_id=None, private_key=None,
+                          installation_ids=""):
+    """Build the pool from a token, a comma-separated list of extra tokens and an optional GitHub App.
+
+    With `app_id` and `private_key`, one credential is added per installation in
+    `installation_ids`. When that is empty, installations are added later by
+    CredentialPool.add_repositories() for the repositories a run touches.
+    """
+    tokens = [value.strip() for value in [token or ""] + extra_tokens.split(",")]
+    credentials = [TokenCredential(value) for value in tokens if value]
+
+    app = None
+    if app_id and private_key:
+        ids = [value.strip() for value in installation_ids.split(",") if value.strip()]
+        credentials += [AppInstallationCredential(api_url, app_id, private_key, installation_id)
+                        for installation_id in ids]
+        if not ids:
+            app = (api_url, app_id, private_key)
+
+    return CredentialPool(credentials, app)
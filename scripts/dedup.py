@@ -0,0 +1,108 @@
+import hashlib
+import json
+import re
+import threading
+
+from github_client import paginate
+from issue_records import IssueRecord
+
+# Appended to every copied body so the destination item can be traced back to its source
+SOURCE_MARKER = "<!-- copied from {source}#{number} -->"
+
+_MARKER_PATTERN = re.compile(r"(?:\r?\n\r?\n)?<!-- copied from (\S+)#(\d+) -->\s*$")
+
+
+def mark_body(body, source, number):
+    """Return `body` with the marker naming source item `source#number` appended."""
+    body = body or ""
+    marker = SOURCE_MARKER.format(source=source, number=number)
+    return f"{body}\n\n{marker}" if body else marker
+
+
+def split_marker(body):
+    """Return `(body, source, number)`, with `source` and `number` None for an unmarked body."""
+    body = body or ""
+    match = _MARKER_PATTERN.search(body)
+    if not match:
+        return body, None, None
+    return body[:match.start()], match.group(1), int(match.group(2))
+
+
+def fingerprint(title, body, source_number):
+    """Hash an item's title, body (without marker) and source number."""
+    return hashlib.sha256(json.dumps([title, body or "", source_number]).encode()).hexdigest()
+
+
+def _names(values, key):
+    return sorted(value[key] if isinstance(value, dict) else value for value in values or [])
+
+
+class DestinationIndex:
+    """Every issue and PR already in a destination repository, from one listing.
+
+    Items copied from `source` are found by the marker in their body, so a
+    create can be turned into a skip or an update in O(1) even when the journal
+    has no record of it. Items are kept as compact IssueRecords rather than
+    their REST JSON. Raises GitHubError if the listing fails.
+
+    Unmarked items were not made by this tool and are left alone, unless
+    `adopt_unmarked` is set, e.g. for items copied before markers were added.
+    Then an unmarked item is matched by title and body, but only when no other
+    unmarked item has the same title and body, and each one is adopted by at
+    most one source item.
+    """
+
+    def __init__(self, owner, repo, source, adopt_unmarked=False):
+        self.source = source
+        self.by_source = {}
+        self.by_content = {}
+        self.lock = threading.Lock()
+
+        listed = 0
+        listing = paginate(f"/repos/{owner}/{repo}/issues", error="listing destination issues and PRs",
+                           params={"state": "all", "per_page": 100, "sort": "created", "direction": "asc"})
+        for item in listing:
+            listed += 1
+            item = IssueRecord.from_rest(item)
+            body, item_source, number = split_marker(item.body)
+            if item_source == source:
+                self.by_source.setdefault(number, item)
+            elif item_source is None and adopt_unmarked:
+                key = fingerprint(item["title"], body, None)
+                # Ambiguous when several unmarked items look alike, so none of them is adopted
+                self.by_content[key] = None if key in self.by_content else item
+
+        print(f"📦 Indexed {listed} existing items in {owner}/{repo}")
+
+    def find(self, source_item):
+        """Return the destination item copied from `source_item`, or None."""
+        with self.lock:
+            item = self.by_source.get(source_item["number"])
+            if item is None:
+                # Claimed, so a second source item with the same title and body is created instead
+                item = self.by_content.pop(fingerprint(source_item["title"], source_item.get("body"), None), None)
+                if item is not None:
+                    self.by_source[source_item["number"]] = item
+            return item
+
+    def add(self, source_number, dest_item):
+        with self.lock:
+            self.by_source[source_number] = dest_item
+
+    def is_current(self, dest_item, source_item, labels=None, assignees=None):
+        """Whether `dest_item` already has the source item's title, body, state, labels and assignees.
+
+        `labels` and `assignees` default to the source item's own.
+        """
+        body, _, number = split_marker(dest_item.get("body"))
+        if number != source_item["number"]:
+            return False  # Unmarked: the update adds the marker
+        return (
+            fingerprint(dest_item["title"], body, number)
+            == fingerprint(source_item["title"], source_item.get("body"), source_item["number"])
+            and dest_item["state"] == source_item["state"]
+            and _names(dest_item.get("labels"), "name") == _names(
+                source_item.get("labels") if labels is None else labels, "name")
+            and _names(dest_item.get("assignees"), "login") == _names(
+                source_item.get("assignees") if assignees is None else assignees, "login")
+        )
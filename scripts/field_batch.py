@@ -0,0 +1,248 @@
+import threading
+import time
+
+# Number of field updates packed into one GraphQL mutation document
+DEFAULT_BATCH_SIZE = 50
+
+# Retries for updates whose project item GitHub does not know about yet, and the first wait (doubles each time)
+NOT_FOUND_RETRIES = 3
+NOT_FOUND_DELAY = 1
+
+# Project items read per verification query
+VERIFY_PAGE_SIZE = 100
+
+VERIFY_QUERY = """
+query VerifyFieldValues($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on ProjectV2Item {
+      id
+      fieldValues(first: 20) {
+        nodes {
+          __typename
+          ... on ProjectV2ItemFieldSingleSelectValue {
+            field {
+              ... on ProjectV2FieldCommon {
+                id
+              }
+            }
+            optionId
+          }
+          ... on ProjectV2ItemFieldIterationValue {
+            field {
+              ... on ProjectV2FieldCommon {
+                id
+              }
+            }
+            iterationId
+          }
+          ... on ProjectV2ItemFieldTextValue {
+            field {
+              ... on ProjectV2FieldCommon {
+                id
+              }
+            }
+            text
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def field_value_input(value, field_type):
+    """Build the ProjectV2FieldValue input for a field update."""
+    if field_type == "singleSelect":
+        return {"singleSelectOptionId": value}
+    if field_type == "iteration":
+        return {"iterationId": value}
+    return {"text": value}  # Use text value for other fields
+
+
+def is_not_found(error):
+    """Return True for a GraphQL error saying a node does not exist (yet)."""
+    return error.get("type") == "NOT_FOUND" or "could not resolve to" in error.get("message", "").lower()
+
+
+def build_field_update_mutation(project_id, updates):
+    """Pack field updates into one aliased mutation.
+
+    Returns `(payload, aliases)`, where `aliases` maps each alias (`u0`, `u1`, ...)
+    back to the update it was built from.
+    """
+    params = ["$projectId: ID!"]
+    selections = []
+    variables = {"projectId": project_id}
+    aliases = {}
+
+    for n, update in enumerate(updates):
+        alias = f"u{n}"
+        aliases[alias] = update
+        params.append(f"$item{n}: ID!, $field{n}: ID!, $value{n}: ProjectV2FieldValue!")
+        selections.append(
+            f"  {alias}: updateProjectV2ItemFieldValue(input: {{projectId: $projectId, "
+            f"itemId: $item{n}, fieldId: $field{n}, value: $value{n}}}) {{ projectV2Item {{ id }} }}"
+        )
+        variables[f"item{n}"] = update["item_id"]
+        variables[f"field{n}"] = update["field_id"]
+        variables[f"value{n}"] = field_value_input(update["value"], update["field_type"])
+
+    query = "mutation(" + ", ".join(params) + ") {\n" + "\n".join(selections) + "\n}"
+    return {"query": query, "variables": variables}, aliases
+
+
+class FieldUpdateBatch:
+    """Collects project field updates and writes them in aliased batch mutations.
+
+    `post` sends a GraphQL payload and returns the `requests` response. Updates from
+    any number of items and fields are queued with `add()`; a mutation is sent each
+    time `batch_size` updates are pending and on `flush()`. Failures are mapped back
+    to the item and field they came from and kept in `failures`; `on_applied`, if
+    given, is called with each update that succeeded.
+
+    An item added to a project moments ago can briefly be unknown to the field
+    mutation. Updates failing with "not found" are retried up to NOT_FOUND_RETRIES
+    times with a short backoff; any other error is final.
+
+    Batches being sent by other threads are counted in `sending`, so flush()
+    can wait until every update queued before it has been written.
+    """
+
+    def __init__(self, post, project_id, batch_size=DEFAULT_BATCH_SIZE, on_applied=None):
+        self.post = post
+        self.project_id = project_id
+        self.batch_size = max(1, batch_size)
+        self.on_applied = on_applied
+        self.pending = []
+        self.failures = []
+        self.sending = 0
+        self.lock = threading.Condition()
+
+    def add(self, item_id, field_id, value, field_type="singleSelect", label=None, key=None):
+        """Queue a field update, sending a batch once enough are pending.
+
+        `key` is passed back untouched on the update dict, so callers can tell
+        which of their own records a success or failure belongs to.
+        """
+        update = {
+            "item_id": item_id,
+            "field_id": field_id,
+            "value": value,
+            "field_type": field_type,
+            "label": label or field_id,
+            "key": key,
+        }
+        with self.lock:
+            self.pending.append(update)
+            if len(self.pending) < self.batch_size:
+                return
+            batch, self.pending = self.pending, []
+            self.sending += 1
+        self._send_batch(batch)
+
+    def flush(self):
+        """Send any pending updates, wait for batches other threads are sending, and return the accumulated failures."""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if batch:
+                self.sending += 1
+        if batch:
+            self._send_batch(batch)
+        with self.lock:
+            while self.sending:
+                self.lock.wait()
+        return self.failures
+
+    def _send_batch(self, batch):
+        try:
+            self._send(batch)
+        finally:
+            with self.lock:
+                self.sending -= 1
+                self.lock.notify_all()
+
+    def _send(self, batch, attempt=0):
+        payload, aliases = build_field_update_mutation(self.project_id, batch)
+        response = self.post(payload)
+
+        try:
+            response_json = response.json()
+        except ValueError:
+            response_json = {}
+
+        if response.status_code != 200 or "data" not in response_json:
+            print(f"❌ Error sending batch of {len(batch)} field updates: {response.status_code}, {response.text}")
+            self._record(batch, f"HTTP {response.status_code}")
+            return
+
+        # Map per-alias errors back to the item and field they came from
+        failed = {}
+        not_found = []
+        for error in response_json.get("errors", []):
+            path = error.get("path") or []
+            if path and path[0] in aliases:
+                failed[path[0]] = error.get("message", "unknown error")
+                if is_not_found(error) and attempt < NOT_FOUND_RETRIES:
+                    not_found.append(path[0])
+
+        data = response_json.get("data") or {}
+        for alias, update in aliases.items():
+            if alias not in failed and not data.get(alias):
+                failed[alias] = "no result returned"
+
+        for alias, message in failed.items():
+            if alias in not_found:
+                continue
+            update = aliases[alias]
+            print(f"❌ Error updating {update['label']} on item {update['item_id']}: {message}")
+            self._record([update], message)
+
+        if self.on_applied:
+            for alias, update in aliases.items():
+                if alias not in failed:
+                    self.on_applied(update)
+
+        print(f"✅ Applied {len(batch) - len(failed)} of {len(batch)} field updates in one mutation")
+
+        if not_found:
+            delay = NOT_FOUND_DELAY * (2 ** attempt)
+            print(f"⏳ {len(not_found)} project items not found yet, retrying in {delay}s")
+            time.sleep(delay)
+            self._send([aliases[alias] for alias in not_found], attempt + 1)
+
+    def _record(self, updates, message):
+        with self.lock:
+            for update in updates:
+                self.failures.append(dict(update, error=message))
+
+
+def verify_field_values(query, expected, page_size=VERIFY_PAGE_SIZE):
+    """Compare the field values project items actually hold with the ones written.
+
+    `expected` maps project item ID -> {field ID: value}; `query` sends a GraphQL
+    payload and returns its `data` or None, like github_client.graphql_data().
+    Items are read `page_size` at a time, so a whole run is checked in a handful
+    of queries rather than one per item. Returns a list of
+    `(item_id, field_id, expected_value, actual_value)` mismatches, with None as
+    the actual value of items that could not be read.
+    """
+    mismatches = []
+    item_ids = list(expected)
+    for start in range(0, len(item_ids), page_size):
+        ids = item_ids[start:start + page_size]
+        data = query({"query": VERIFY_QUERY, "variables": {"ids": ids}})
+        nodes = {node["id"]: node for node in (data or {}).get("nodes") or [] if node}
+
+        for item_id in ids:
+            actual = {}
+            for value in ((nodes.get(item_id) or {}).get("fieldValues") or {}).get("nodes", []):
+                field_id = ((value or {}).get("field") or {}).get("id")
+                if field_id:
+                    actual[field_id] = value.get("optionId") or value.get("iterationId") or value.get("text")
+
+            for field_id, value in expected[item_id].items():
+                if actual.get(field_id) != value:
+                    mismatches.append((item_id, field_id, value, actual.get(field_id)))
+
+    return mismatches
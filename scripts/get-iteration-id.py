@@ -1,94 +1,35 @@
-import requests
-import os
+import argparse
 import json
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-
-# GitHub API URL
-GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+from project_schema import load_project_schema
 
 # Target GitHub Project ID
 PROJECT_ID = "PVT_kwDOCaCuvc4Azlr2"
 
-# Headers for GitHub API authentication
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json",
-}
-
-def get_target_iterations():
-    """Fetch all iterations in the target GitHub ProjectV2."""
-    query = {
-        "query": """
-        query($projectId: ID!) {
-          node(id: $projectId) {
-            ... on ProjectV2 {
-              fields(first: 50) {
-                nodes {
-                  __typename
-                  ... on ProjectV2IterationField {
-                    id
-                    name
-                    dataType
-                    configuration {
-                      iterations {
-                        id
-                        title
-                        startDate
-                      }
-                    }
-                  }
-                }
-              }
-            }
-          }
-        }
-        """,
-        "variables": {
-            "projectId": PROJECT_ID
-        }
-    }
-
-    response = requests.post(GITHUB_GRAPHQL_URL, json=query, headers=HEADERS)
-
-    try:
-        response_json = response.json()
-    except requests.exceptions.JSONDecodeError:
-        print(f"❌ Error decoding JSON response: {response.text}")
-        return {}
-
-    if response.status_code != 200:
-        print(f"❌ GitHub API error: {response.status_code}, {response.text}")
-        return {}
-
-    if "errors" in response_json:
-        print(f"❌ GraphQL query error: {response_json['errors']}")
-        return {}
-
-    if "data" not in response_json or "node" not in response_json["data"]:
-        print(f"❌ Unexpected API response: {response_json}")
+def get_target_iterations(refresh=False):
+    """Fetch all iterations in the target GitHub ProjectV2 from the shared schema cache."""
+    schema = load_project_schema(PROJECT_ID, refresh=refresh)
+    if schema is None:
         return {}
 
     # Extract iteration field and details
-    fields = response_json["data"]["node"]["fields"]["nodes"]
-    
-    iteration_field = next((field for field in fields if field["__typename"] == "ProjectV2IterationField"), None)
+    iteration_field = next(
+        (field for field in schema["fields"].values() if field["type"] == "ProjectV2IterationField"), None
+    )
 
     if not iteration_field:
         print("❌ No Iteration Field found in the target project.")
         return {}
 
-    # Extract iterations
-    iterations = iteration_field.get("configuration", {}).get("iterations", [])
-
-    iteration_map = {iteration["title"]: iteration["id"] for iteration in iterations}
+    iteration_map = {title: iteration["id"] for title, iteration in iteration_field["iterations"].items()}
 
     print(f"✅ Retrieved Iteration Mapping:\n{json.dumps(iteration_map, indent=2)}")
     return iteration_map
 
 
 if __name__ == "__main__":
-    get_target_iterations()
+    parser = argparse.ArgumentParser(description="Print the iterations of the target project.")
+    parser.add_argument("--refresh-schema", action="store_true",
+                        help="Ignore the cached project schema and fetch it again")
+    args = parser.parse_args()
+    get_target_iterations(refresh=args.refresh_schema)
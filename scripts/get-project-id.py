@@ -1,26 +1,13 @@
-import os
-import requests
-import json
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-
-# GitHub API URLs
-GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+from github_client import graphql_data, use_repositories
+from project_schema import load_project_schema
 
 # GitHub Organization and Repo
 ORG_NAME = "furmidgeuk"  # Update with your org or username
 REPO_NAME = "nndcp-docs"  # Update with your repository name
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json",
-}
-
 def get_project_id():
     """Fetch the project ID for the given repository."""
+    use_repositories(f"{ORG_NAME}/{REPO_NAME}")
     query = {
         "query": """
         query {
@@ -36,10 +23,10 @@ def get_project_id():
         """ % (ORG_NAME, REPO_NAME)
     }
 
-    response = requests.post(GITHUB_GRAPHQL_URL, json=query, headers=HEADERS)
+    data = graphql_data(query)
 
-    if response.status_code == 200:
-        projects = response.json()["data"]["repository"]["projectsV2"]["nodes"]
+    if data is not None:
+        projects = data["repository"]["projectsV2"]["nodes"]
         if projects:
             project_id = projects[0]["id"]  # Assuming the first project is the target one
             print(f"✅ Found Project ID: {project_id}")
@@ -47,10 +34,15 @@ def get_project_id():
         else:
             print("❌ No projects found in this repository.")
     else:
-        print(f"❌ Error fetching project ID: {response.status_code}, {response.text}")
+        print("❌ Error fetching project ID")
 
     return None
 
 # Example usage:
 if __name__ == "__main__":
     project_id = get_project_id()
+    if project_id:
+        # Warm the shared schema cache so the copy scripts can skip the schema query
+        schema = load_project_schema(project_id, refresh=True)
+        if schema:
+            print(f"📂 Cached schema for {len(schema['fields'])} fields")
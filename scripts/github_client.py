@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from credentials import build_credential_pool
+from metrics import metrics
+from rate_limit import resource_for, scheduler
+
+# Load environment variables
+load_dotenv()
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+# Optional extra credentials: more tokens, and a GitHub App whose installation tokens are minted as needed
+GITHUB_TOKENS = os.getenv("GITHUB_TOKENS", "")
+GH_APP_ID = os.getenv("GH_APP_ID")
+GH_PRIVATE_KEY = os.getenv("GH_PRIVATE_KEY")
+GH_PRIVATE_KEY_PATH = os.getenv("GH_PRIVATE_KEY_PATH")
+GH_INSTALLATION_ID = os.getenv("GH_INSTALLATION_ID", "")
+
+# GitHub API URLs (GITHUB_API_URL can point the scripts at GitHub Enterprise or a local stand-in).
+# GitHub Enterprise Server serves REST under /api/v3 but GraphQL at /api/graphql; GITHUB_GRAPHQL_URL
+# overrides the GraphQL endpoint, which must end in /graphql, for any other layout.
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL") or (
+    f"{GITHUB_API_URL[:-len('/v3')]}/graphql" if GITHUB_API_URL.endswith("/api/v3") else f"{GITHUB_API_URL}/graphql"
+)
+
+# Keep-alive connections held open per host
+POOL_SIZE = 32
+
+
+class GitHubError(RuntimeError):
+    """Raised when a paginated listing cannot be completed."""
+
+
+# Authorization is added per request by the credential pool
+HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "Accept-Encoding": "gzip",
+}
+
+
+def _make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+# One pooled session per process, so connections are reused across calls and threads
+session = _make_session()
+
+# Adaptive concurrency caps are reported with the rest of the metrics
+for _limit in scheduler.concurrency.values():
+    _limit.on_change = metrics.record_concurrency
+    metrics.record_concurrency(_limit.name, int(_limit.limit))
+
+_credential_pool = None
+_credential_lock = threading.Lock()
+
+
+def credential_pool():
+    """Return the process-wide credential pool, building it on first use.
+
+    It holds GITHUB_TOKEN, any comma-separated GITHUB_TOKENS and, when GH_APP_ID
+    and GH_PRIVATE_KEY (or GH_PRIVATE_KEY_PATH) are set, the App's installation
+    tokens for GH_INSTALLATION_ID or, when that is unset, for the owners passed
+    to use_repositories(). The rate-limit scheduler only waits when every
+    credential has run out of budget.
+    """
+    global _credential_pool
+    with _credential_lock:
+        if _credential_pool is None:
+            private_key = GH_PRIVATE_KEY
+            if not private_key and GH_PRIVATE_KEY_PATH:
+                with open(GH_PRIVATE_KEY_PATH) as f:
+                    private_key = f.read()
+            _credential_pool = build_credential_pool(GITHUB_API_URL, GITHUB_TOKEN, GITHUB_TOKENS, GH_APP_ID,
+                                                     private_key, GH_INSTALLATION_ID)
+            scheduler.pool = _credential_pool
+            if len(_credential_pool) > 1:
+                print(f"🔑 Using {len(_credential_pool)} credentials")
+        return _credential_pool
+
+
+def use_repositories(*full_names):
+    """Add the GitHub App installations that can see each `owner/repo` to the credential pool."""
+    credential_pool().add_repositories(full_names)
+
+
+def _owner_of(url, payload):
+    """Return the account a request is for, from its REST path or its GraphQL `owner` variable."""
+    match = re.search(r"/(?:repos|orgs|users)/([^/]+)", urlparse(url).path)
+    if match:
+        return match.group(1)
+    return ((payload or {}).get("variables") or {}).get("owner")
+
+
+def api_url(path):
+    """Return an absolute API URL for a path such as `/repos/{owner}/{repo}/issues`."""
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    return f"{GITHUB_API_URL}/{path.lstrip('/')}"
+
+
+def _send(method, url, headers=None, **kwargs):
+    """Send one HTTP attempt with the credential that has the most budget left, and record it in the metrics."""
+    pool = credential_pool()
+    resource = resource_for(url)
+    headers = dict(headers or {})
+    credential = None
+    if len(pool):
+        credential, token = pool.authorize(resource, _owner_of(url, kwargs.get("json")))
+        headers["Authorization"] = f"Bearer {token}"
+
+    start = time.perf_counter()
+    response = session.request(method, url, headers=headers, **kwargs)
+    metrics.record_response(method, url, kwargs.get("json"), response, time.perf_counter() - start)
+    if credential:
+        pool.update(credential, response, resource)
+    return response
+
+
+def request(method, path, **kwargs):
+    """Send a request through the shared session and rate-limit scheduler."""
+    return scheduler.request(method, api_url(path), send=_send, **kwargs)
+
+
+def rest(method, path, expected=(200,), error=None, **kwargs):
+    """Call a REST endpoint and return the decoded JSON body.
+
+    Returns None, after printing the response, when the status code is not in
+    `expected` or the body is not JSON. `error` describes the call in that message,
+    e.g. "creating issue".
+    """
+    response = request(method, path, **kwargs)
+    description = error or f"calling {method} {path}"
+
+    if response.status_code not in expected:
+        print(f"❌ Error {description}: {response.status_code}, {response.text}")
+        return None
+
+    if not response.content:
+        return {}
+
+    try:
+        return response.json()
+    except requests.exceptions.JSONDecodeError:
+        print(f"❌ Error decoding JSON response while {description}: {response.text}")
+        return None
+
+
+def paginate(path, error=None, conditional=None, **kwargs):
+    """Yield the items of a paginated REST listing as each page arrives.
+
+    Follows `Link: rel="next"` headers, so only one page is held in memory at a
+    time. A failed page raises GitHubError rather than ending the listing early.
+
+    With a `conditional` dict, its `etag` is sent as If-None-Match on the first
+    page. A 304 Not Modified, which does not count against the rate limit, ends
+    the listing and sets `conditional["not_modified"]`; otherwise the first page's
+    new ETag is written back to `conditional["etag"]`.
+    """
+    description = error or f"listing {path}"
+    url = path
+    first_page = True
+
+    while url:
+        headers = {}
+        if first_page and conditional and conditional.get("etag"):
+            headers["If-None-Match"] = conditional["etag"]
+
+        response = request("GET", url, headers=headers, **kwargs)
+
+        if first_page and conditional is not None:
+            conditional["not_modified"] = response.status_code == 304
+            if conditional["not_modified"]:
+                return
+            conditional["etag"] = response.headers.get("ETag")
+
+        if response.status_code != 200:
+            print(f"❌ Error {description}: {response.status_code}, {response.text}")
+            raise GitHubError(f"Error {description}: {response.status_code}")
+
+        yield from response.json()
+
+        # The next link already carries the query string
+        url = response.links.get("next", {}).get("url")
+        kwargs.pop("params", None)
+        first_page = False
+
+
+def post_graphql(payload):
+    """Send a GraphQL payload and return the raw response."""
+    return request("POST", GITHUB_GRAPHQL_URL, json=payload)
+
+
+def graphql(payload):
+    """Send a GraphQL payload and return the decoded body, errors included.
+
+    Returns None, after printing the response, on HTTP or JSON decoding errors.
+    """
+    response = post_graphql(payload)
+
+    try:
+        response_json = response.json()
+    except requests.exceptions.JSONDecodeError:
+        print(f"❌ Error decoding JSON response: {response.text}")
+        return None
+
+    if response.status_code != 200:
+        print(f"❌ GitHub API error: {response.status_code}, {response.text}")
+        return None
+
+    return response_json
+
+
+def graphql_data(payload):
+    """Send a GraphQL payload and return its `data`, or None if the query failed."""
+    response_json = graphql(payload)
+    if response_json is None:
+        return None
+
+    if "errors" in response_json:
+        print(f"❌ GraphQL query error: {json.dumps(response_json['errors'], indent=2)}")
+        return None
+
+    if not response_json.get("data"):
+        print(f"❌ Unexpected API response: {json.dumps(response_json, indent=2)}")
+        return None
+
+    return response_json["data"]
@@ -0,0 +1,152 @@
+import sys
+
+from github_client import GitHubError, graphql_data
+from labels import get_labels
+
+# Only the issue or PR fields the copy uses
+RECORD_FIELDS = """
+        id
+        number
+        title
+        body
+        state
+        updatedAt
+        comments {
+          totalCount
+        }
+        labels(first: 100) {
+          nodes {
+            name
+          }
+        }
+        assignees(first: 20) {
+          nodes {
+            login
+          }
+        }
+"""
+
+# Pull requests are a separate connection, so none are listed
+LEAN_ISSUES_QUERY = """
+query($owner: String!, $repo: String!, $cursor: String, $since: DateTime, $orderBy: IssueOrder) {
+  repository(owner: $owner, name: $repo) {
+    issues(first: 100, after: $cursor, filterBy: {since: $since}, orderBy: $orderBy) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {%s}
+    }
+  }
+}
+""" % RECORD_FIELDS
+
+# GraphQL states as the REST API reports them; merged PRs are closed there
+REST_STATES = {"OPEN": "open", "CLOSED": "closed", "MERGED": "closed"}
+
+
+class IssueRecord:
+    """The parts of an issue the copy needs, in a fraction of the memory of its REST JSON.
+
+    Label names and assignee logins are interned tuples, and label colours and
+    descriptions live once in a table shared by every record of a listing.
+    Records answer the same `record["title"]` and `record.get("labels")` reads
+    as a REST issue dict, so either can flow through the copy pipeline.
+    """
+
+    __slots__ = ("number", "node_id", "title", "body", "state", "updated_at", "comments", "label_names",
+                 "assignee_logins", "label_table")
+
+    def __init__(self, number, node_id, title, body, state, updated_at, comments, label_names, assignee_logins,
+                 label_table=None):
+        self.number = number
+        self.node_id = node_id
+        self.title = title
+        self.body = body
+        self.state = sys.intern(state)
+        self.updated_at = updated_at
+        self.comments = comments
+        self.label_names = tuple(sys.intern(name) for name in label_names)
+        self.assignee_logins = tuple(sys.intern(login) for login in assignee_logins)
+        self.label_table = label_table if label_table is not None else {}
+
+    @classmethod
+    def from_node(cls, node, label_table):
+        """Build a record from an issue or PR node selecting RECORD_FIELDS."""
+        return cls(
+            node["number"], node["id"], node["title"], node["body"] or "", REST_STATES[node["state"]],
+            node["updatedAt"], node["comments"]["totalCount"],
+            [label["name"] for label in node["labels"]["nodes"]],
+            [user["login"] for user in node["assignees"]["nodes"]],
+            label_table,
+        )
+
+    @classmethod
+    def from_rest(cls, item, label_table=None):
+        """Build a record from a REST issue or PR, keeping only what the copy uses."""
+        return cls(
+            item["number"], item["node_id"], item["title"], item.get("body") or "", item["state"],
+            item["updated_at"], item.get("comments", 0),
+            [label["name"] for label in item.get("labels", [])],
+            [user["login"] for user in item.get("assignees", [])],
+            label_table,
+        )
+
+    def __getitem__(self, key):
+        if key == "labels":
+            return [self.label_table.get(name) or {"name": name} for name in self.label_names]
+        if key == "assignees":
+            return [{"login": login} for login in self.assignee_logins]
+        if key in self.__slots__ and key not in ("label_names", "assignee_logins", "label_table"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """Return the record as a REST-shaped issue dict, e.g. for writing to a snapshot."""
+        return {key: self[key] for key in ("number", "node_id", "title", "body", "state", "updated_at", "comments",
+                                           "labels", "assignees")}
+
+
+def get_issues_lean(owner, repo, sync_state=None):
+    """Stream a repository's issues as IssueRecords, listed through GraphQL.
+
+    A lean alternative to get_issues() in copy-issues.py: the query selects
+    only the fields the copy uses and never returns pull requests, so pages
+    are a fraction of the size. Issues come in the same order as get_issues(),
+    newest first, or most recently updated first with a `sync_state` holding a
+    `since` timestamp. GraphQL has no ETags, so `sync_state["etag"]` is left as
+    it is. Raises GitHubError if a page cannot be read, as paginate() does.
+    """
+    # Label colours and descriptions, read once instead of on every issue
+    label_table = {label["name"]: label for label in get_labels(owner, repo)}
+
+    variables = {"owner": owner, "repo": repo, "cursor": None, "orderBy": {"field": "CREATED_AT", "direction": "DESC"}}
+    if sync_state and sync_state.get("since"):
+        variables.update(since=sync_state["since"], orderBy={"field": "UPDATED_AT", "direction": "DESC"})
+
+    while True:
+        data = graphql_data({"query": LEAN_ISSUES_QUERY, "variables": variables})
+        issues = ((data or {}).get("repository") or {}).get("issues")
+        if issues is None:
+            print(f"❌ Error fetching issues from {owner}/{repo}")
+            raise GitHubError(f"Error fetching issues from {owner}/{repo}")
+
+        for node in issues["nodes"]:
+            yield IssueRecord.from_node(node, label_table)
+
+        if not issues["pageInfo"]["hasNextPage"]:
+            return
+        variables["cursor"] = issues["pageInfo"]["endCursor"]
@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+import time
+
+# Default location of the migration journal, relative to the working directory
+DEFAULT_JOURNAL = "migration-journal.sqlite"
+
+# Steps an item moves through, in order
+STEP_CREATED = "created"
+STEP_IN_PROJECT = "in_project"
+STEP_DONE = "done"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    source_number INTEGER NOT NULL,
+    dest_number INTEGER,
+    dest_node_id TEXT,
+    project_item_id TEXT,
+    step TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, pair, source_number)
+);
+CREATE TABLE IF NOT EXISTS fields (
+    kind TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    source_number INTEGER NOT NULL,
+    field_id TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (kind, pair, source_number, field_id)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    kind TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    source_number INTEGER NOT NULL,
+    copied INTEGER NOT NULL,
+    PRIMARY KEY (kind, pair, source_number)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    since TEXT,
+    etag TEXT,
+    PRIMARY KEY (kind, pair)
+);
+"""
+
+
+class Journal:
+    """Persistent record of what a migration has already copied.
+
+    Each source issue or PR is keyed by its kind ("issue" or "pr"), the
+    source -> destination repository pair and its source number, and remembers
+    the destination number, node ID, project item ID, the last completed step,
+    the project fields already applied and how many comments were copied.
+    Reruns read it to skip finished work and resume partial items from where
+    they stopped. `--sync` runs also keep their high-water mark and listing
+    ETag here.
+    """
+
+    def __init__(self, path, source, dest):
+        self.path = path
+        self.pair = f"{source}->{dest}"
+        self.lock = threading.Lock()
+        # Several pairs may share one journal file, so wait out each other's write locks
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+
+    def get(self, kind, source_number):
+        """Return the journal entry for an item as a dict, or None if it was never started."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT * FROM items WHERE kind = ? AND pair = ? AND source_number = ?",
+                (kind, self.pair, source_number),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def entries(self, kind):
+        """Return every journal entry of a kind for this repository pair, keyed by source number."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT * FROM items WHERE kind = ? AND pair = ?", (kind, self.pair)
+            ).fetchall()
+        return {row["source_number"]: dict(row) for row in rows}
+
+    def record_created(self, kind, source_number, dest_number, dest_node_id):
+        """Record that an item was created in the destination repository."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO items (kind, pair, source_number, dest_number, dest_node_id, step, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, self.pair, source_number, dest_number, dest_node_id, STEP_CREATED, time.time()),
+            )
+
+    def record_project_item(self, kind, source_number, project_item_id):
+        """Record that an item was added to the destination project."""
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE items SET project_item_id = ?, step = ?, updated_at = ? "
+                "WHERE kind = ? AND pair = ? AND source_number = ?",
+                (project_item_id, STEP_IN_PROJECT, time.time(), kind, self.pair, source_number),
+            )
+
+    def record_field(self, kind, source_number, field_id, value):
+        """Record that a project field value was applied to an item."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO fields (kind, pair, source_number, field_id, value) VALUES (?, ?, ?, ?, ?)",
+                (kind, self.pair, source_number, field_id, value),
+            )
+
+    def forget_field(self, kind, source_number, field_id):
+        """Forget an applied field value, so the next run writes it again."""
+        with self.lock, self.db:
+            self.db.execute(
+                "DELETE FROM fields WHERE kind = ? AND pair = ? AND source_number = ? AND field_id = ?",
+                (kind, self.pair, source_number, field_id),
+            )
+
+    def applied_fields(self, kind, source_number):
+        """Return the field ID -> value map already applied to an item."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT field_id, value FROM fields WHERE kind = ? AND pair = ? AND source_number = ?",
+                (kind, self.pair, source_number),
+            ).fetchall()
+        return {row["field_id"]: row["value"] for row in rows}
+
+    def comments_copied(self, kind, source_number):
+        """Return how many of an item's comments have been copied, oldest first."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT copied FROM comments WHERE kind = ? AND pair = ? AND source_number = ?",
+                (kind, self.pair, source_number),
+            ).fetchone()
+        return row["copied"] if row else 0
+
+    def record_comments(self, kind, source_number, copied):
+        """Record that the first `copied` comments of an item have been copied."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO comments (kind, pair, source_number, copied) VALUES (?, ?, ?, ?)",
+                (kind, self.pair, source_number, copied),
+            )
+
+    def mark_done(self, kind, source_number):
+        """Record that every step for an item has completed."""
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE items SET step = ?, updated_at = ? WHERE kind = ? AND pair = ? AND source_number = ?",
+                (STEP_DONE, time.time(), kind, self.pair, source_number),
+            )
+
+    def get_sync_state(self, kind):
+        """Return the `since` high-water mark and listing ETag of the last completed sync."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT since, etag FROM sync_state WHERE kind = ? AND pair = ?", (kind, self.pair)
+            ).fetchone()
+        return {"since": row["since"], "etag": row["etag"]} if row else {"since": None, "etag": None}
+
+    def set_sync_state(self, kind, since, etag):
+        """Store the high-water mark and listing ETag once a sync has completed."""
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_state (kind, pair, since, etag) VALUES (?, ?, ?, ?)",
+                (kind, self.pair, since, etag),
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,52 @@
+import threading
+
+from github_client import paginate, rest
+
+# Colour GitHub gives labels created without one
+DEFAULT_LABEL_COLOR = "ededed"
+
+
+def get_labels(owner, repo):
+    """Return a repository's labels as {"name", "color", "description"} dicts."""
+    labels = paginate(f"/repos/{owner}/{repo}/labels", error="fetching labels", params={"per_page": 100})
+    return [
+        {"name": label["name"], "color": label.get("color"), "description": label.get("description")}
+        for label in labels
+    ]
+
+
+class LabelProvisioner:
+    """Creates the labels copied items need in the destination, each one once.
+
+    The destination's labels are listed once when the provisioner is made
+    (raising GitHubError if that fails). ensure() is then called with an
+    item's source labels before the item is written, and creates whichever
+    are missing with their source colour and description. Without it, GitHub
+    creates unknown labels implicitly with a default colour and no description.
+    """
+
+    def __init__(self, owner, repo):
+        self.owner = owner
+        self.repo = repo
+        # Label names are case-insensitive on GitHub
+        self.known = {label["name"].lower() for label in get_labels(owner, repo)}
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def ensure(self, labels):
+        """Create any of `labels`, source label dicts with a `name`, missing from the destination."""
+        with self.lock:
+            for label in labels:
+                if label["name"].lower() in self.known:
+                    continue
+                # Only tried once: if it fails, the item write still creates it implicitly
+                self.known.add(label["name"].lower())
+
+                label_data = {"name": label["name"], "color": label.get("color") or DEFAULT_LABEL_COLOR}
+                if label.get("description"):
+                    label_data["description"] = label["description"]
+                created = rest("POST", f"/repos/{self.owner}/{self.repo}/labels", expected=(201,),
+                               error=f"creating label '{label['name']}'", json=label_data)
+                if created is not None:
+                    self.created += 1
+                    print(f"🏷️ Created label '{label['name']}' in {self.owner}/{self.repo}")
@@ -0,0 +1,295 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from urllib.parse import urlparse
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Minimum seconds between Prometheus textfile rewrites during a run
+TEXTFILE_INTERVAL = 15
+
+# Budget samples kept for the JSON summary
+MAX_BUDGET_SAMPLES = 10000
+
+# Top-level GraphQL fields that only wrap the interesting one, e.g. node { ... on ProjectV2 { items } }
+_WRAPPER_FIELDS = {"node", "repository", "organization", "user", "viewer"}
+
+
+def rest_endpoint(method, url):
+    """Return a REST call's endpoint with owner, repo and numbers replaced by placeholders."""
+    path = urlparse(url).path
+    path = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{owner}/{repo}", path)
+    path = re.sub(r"/\d+(?=/|$)", "/{n}", path)
+    return f"{method.upper()} {path}"
+
+
+def graphql_operation(query):
+    """Name a GraphQL document by its kind and operation name, e.g. `query CommentsFirstPage`.
+
+    Anonymous documents are named by their root field instead. Aliases are
+    resolved to the field they call, `rateLimit` is ignored and wrapper fields
+    such as `node` and `repository` are followed one level down, so a project
+    items page is reported as `query node.items`.
+    """
+    query = re.sub(r"#[^\n]*", "", query or "")
+    kind = "mutation" if query.lstrip().startswith("mutation") else "query"
+    named = re.match(r"\s*(?:query|mutation)\s+(\w+)", query)
+    if named:
+        return f"{kind} {named.group(1)}"
+
+    fields = []
+    brace = paren = 0
+    tokens = re.finditer(r"\.\.\.\s*on\s+\w+|\w+\s*:\s*\w+|\w+|[{}()]", query)
+    for token in tokens:
+        text = token.group()
+        if paren and text in "{}":
+            continue  # Input object literal in an argument list
+        if text == "(":
+            paren += 1
+        elif text == ")":
+            paren -= 1
+        elif text == "{":
+            brace += 1
+        elif text == "}":
+            brace -= 1
+            if fields and fields[-1][0] > brace:
+                break  # Left the first root field
+        elif paren == 0 and brace >= 1 and not text.startswith("..."):
+            name = text.split(":")[-1].strip()
+            if brace == 1 and name == "rateLimit":
+                continue
+            if (not fields and brace == 1) or (fields and fields[-1][1] in _WRAPPER_FIELDS and brace > fields[-1][0]):
+                fields.append((brace, name))
+                if name not in _WRAPPER_FIELDS:
+                    break
+
+    return f"{kind} {'.'.join(name for _, name in fields) or 'unknown'}"
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    return len(body.encode() if isinstance(body, str) else body)
+
+
+def _wire_size(response):
+    """Bytes of a response body as transferred, i.e. still gzip-compressed when it was sent that way."""
+    try:
+        return response.raw.tell()
+    except AttributeError:
+        return len(response.content)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class Metrics:
+    """Per-endpoint call counts, latency, bytes and status codes, plus rate-limit budgets over time.
+
+    REST calls are keyed by method and path template, GraphQL calls by
+    operation. Every HTTP attempt is recorded, retries included. Budgets are
+    sampled from the `X-RateLimit-*` headers of each response.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.endpoints = {}
+        self.budgets = {}
+        self.budget_samples = deque(maxlen=MAX_BUDGET_SAMPLES)
+        self.events = {}
+        self.concurrency = {}
+        self.textfile = None
+        self.textfile_written = 0
+
+    def configure(self, textfile=None):
+        """Rewrite a Prometheus textfile at `textfile` as the run progresses."""
+        self.textfile = textfile
+
+    def record(self, endpoint, seconds, status, sent, received, headers=None):
+        """Record one HTTP call."""
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {
+                "count": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "statuses": Counter(),
+                "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+            })
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["bytes_sent"] += sent
+            stats["bytes_received"] += received
+            stats["statuses"][status] += 1
+            stats["buckets"][next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                                  len(LATENCY_BUCKETS))] += 1
+
+            if headers and "X-RateLimit-Remaining" in headers:
+                resource = headers.get("X-RateLimit-Resource", "graphql" if endpoint.startswith(("query", "mutation")) else "core")
+                budget = {
+                    "remaining": int(headers["X-RateLimit-Remaining"]),
+                    "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                    "reset": int(headers.get("X-RateLimit-Reset", 0)),
+                }
+                if self.budgets.get(resource) != budget:
+                    self.budget_samples.append(dict(budget, resource=resource, time=round(time.time(), 3)))
+                self.budgets[resource] = budget
+
+            due = self.textfile and time.time() - self.textfile_written >= TEXTFILE_INTERVAL
+            if due:
+                self.textfile_written = time.time()
+
+        if due:
+            self.write_prometheus(self.textfile)
+
+    def mark_event(self, event, pair):
+        """Record that a migration milestone, such as "hot_set_complete", was reached for a repository pair.
+
+        The textfile, if any, is rewritten straight away so alerts and dashboards see it.
+        """
+        with self.lock:
+            self.events[(event, pair)] = time.time()
+        if self.textfile:
+            self.write_prometheus(self.textfile)
+
+    def record_concurrency(self, request_class, limit):
+        """Record the adaptive cap on requests in flight for a request class."""
+        with self.lock:
+            self.concurrency[request_class] = limit
+
+    def record_response(self, method, url, payload, response, seconds):
+        """Record a `requests` response, naming GraphQL calls by operation."""
+        if urlparse(url).path.rstrip("/").endswith("/graphql"):
+            endpoint = graphql_operation((payload or {}).get("query"))
+        else:
+            endpoint = rest_endpoint(method, url)
+        sent = _body_size(response.request.body) if response.request is not None else 0
+        self.record(endpoint, seconds, response.status_code, sent, _wire_size(response), response.headers)
+
+    def summary(self):
+        """Return every metric as a JSON-serialisable dict."""
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                endpoints[endpoint] = {
+                    "count": stats["count"],
+                    "seconds": round(stats["seconds"], 3),
+                    "mean_seconds": round(stats["seconds"] / stats["count"], 3),
+                    "max_seconds": round(stats["max_seconds"], 3),
+                    "bytes_sent": stats["bytes_sent"],
+                    "bytes_received": stats["bytes_received"],
+                    "statuses": {str(status): count for status, count in sorted(stats["statuses"].items())},
+                    "latency_buckets": {
+                        str(bound): count for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats["buckets"])
+                    },
+                }
+            return {
+                "started": self.started,
+                "seconds": round(time.time() - self.started, 3),
+                "calls": sum(stats["count"] for stats in self.endpoints.values()),
+                "endpoints": endpoints,
+                "budgets": {resource: dict(budget) for resource, budget in self.budgets.items()},
+                "budget_samples": list(self.budget_samples),
+                "concurrency": dict(sorted(self.concurrency.items())),
+                "events": [{"event": event, "pair": pair, "time": round(reached, 3)}
+                           for (event, pair), reached in sorted(self.events.items())],
+            }
+
+    def write_json(self, path):
+        """Write the summary to a JSON file."""
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"📊 Metrics summary written to {path}")
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP github_api_requests_total GitHub API calls by endpoint and status code.",
+            "# TYPE github_api_requests_total counter",
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            budgets = sorted(self.budgets.items())
+            events = sorted(self.events.items())
+            concurrency = sorted(self.concurrency.items())
+
+            for endpoint, stats in endpoints:
+                for status, count in sorted(stats["statuses"].items()):
+                    lines.append(f'github_api_requests_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+
+            lines += [
+                "# HELP github_api_request_duration_seconds GitHub API call latency by endpoint.",
+                "# TYPE github_api_request_duration_seconds histogram",
+            ]
+            for endpoint, stats in endpoints:
+                label = _label(endpoint)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats["buckets"]):
+                    cumulative += count
+                    lines.append(f'github_api_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'github_api_request_duration_seconds_sum{{endpoint="{label}"}} {stats["seconds"]:.6f}')
+                lines.append(f'github_api_request_duration_seconds_count{{endpoint="{label}"}} {stats["count"]}')
+
+            lines += [
+                "# HELP github_api_bytes_total Bytes sent and received by endpoint, as transferred (before decompression).",
+                "# TYPE github_api_bytes_total counter",
+            ]
+            for endpoint, stats in endpoints:
+                label = _label(endpoint)
+                lines.append(f'github_api_bytes_total{{endpoint="{label}",direction="sent"}} {stats["bytes_sent"]}')
+                lines.append(f'github_api_bytes_total{{endpoint="{label}",direction="received"}} {stats["bytes_received"]}')
+
+            lines += [
+                "# HELP github_rate_limit_remaining Requests or points left in the current rate-limit window.",
+                "# TYPE github_rate_limit_remaining gauge",
+            ]
+            lines += [f'github_rate_limit_remaining{{resource="{resource}"}} {budget["remaining"]}' for resource, budget in budgets]
+            lines += [
+                "# HELP github_rate_limit_limit Size of the rate-limit window.",
+                "# TYPE github_rate_limit_limit gauge",
+            ]
+            lines += [f'github_rate_limit_limit{{resource="{resource}"}} {budget["limit"]}' for resource, budget in budgets]
+            lines += [
+                "# HELP github_rate_limit_reset_timestamp_seconds When the rate-limit window resets.",
+                "# TYPE github_rate_limit_reset_timestamp_seconds gauge",
+            ]
+            lines += [f'github_rate_limit_reset_timestamp_seconds{{resource="{resource}"}} {budget["reset"]}' for resource, budget in budgets]
+            lines += [
+                "# HELP github_api_concurrency_limit Adaptive cap on requests in flight by request class.",
+                "# TYPE github_api_concurrency_limit gauge",
+            ]
+            lines += [f'github_api_concurrency_limit{{class="{name}"}} {limit}' for name, limit in concurrency]
+            lines += [
+                "# HELP migration_event_timestamp_seconds When a migration milestone was reached for a repository pair.",
+                "# TYPE migration_event_timestamp_seconds gauge",
+            ]
+            lines += [f'migration_event_timestamp_seconds{{event="{_label(event)}",pair="{_label(pair)}"}} {reached:.3f}'
+                      for (event, pair), reached in events]
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically rewrite a Prometheus textfile, as node_exporter's textfile collector expects."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def finish(self, json_path=None):
+        """Write the final textfile and, with `json_path`, the JSON summary."""
+        if self.textfile:
+            self.write_prometheus(self.textfile)
+        if json_path:
+            self.write_json(json_path)
+
+
+# Shared by every script in the process, like the rate-limit scheduler
+metrics = Metrics()
@@ -0,0 +1,230 @@
+import argparse
+import importlib.util
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from journal import DEFAULT_JOURNAL
+from metrics import metrics
+from priority import parse_priority
+from rate_limit import scheduler
+
+# Repository pairs migrated at the same time by default
+DEFAULT_PARALLEL = 4
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 30
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(name):
+    """Import a hyphenated script from this directory, e.g. copy-issues.py, as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(SCRIPTS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_manifest(path):
+    """Read a migration manifest and return its pairs with the defaults applied.
+
+    The manifest is a JSON object with a `pairs` list and optional `defaults`:
+
+        {
+          "defaults": {"project": "PVT_...", "workers": 4, "issues": true, "prs": true},
+          "pairs": [
+            {"source": "org/repo-a", "dest": "new-org/repo-a"},
+            {"source": "org/repo-b", "dest": "new-org/repo-b", "project": "PVT_...",
+             "source_project": "PVT_...", "prs": false}
+          ]
+        }
+
+    `project` is the destination project, `source_project` the project the
+    field values are read from (by default the same one). `lean` lists issues
+    through GraphQL as compact records and `sharded` lists issues and PRs in
+    concurrently fetched number ranges (see sharded_listing.list_sharded()).
+    `mirror_branches` pushes the branches PRs need before creating them (see
+    copy_pull_requests()).
+    `priority` is a rule string such as "open,recent" ordering the issue copy
+    (see priority.parse_priority()). `adopt_unmarked` adopts destination items
+    this tool did not mark as copied (see dedup.DestinationIndex). Returns None, after
+    printing the problem, if the manifest is invalid.
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error reading manifest {path}: {e}")
+        return None
+
+    defaults = {"workers": None, "batch_size": None, "lean": False, "sharded": False, "mirror_branches": False,
+                "priority": None, "adopt_unmarked": False, "issues": True, "prs": True, "project": None, "source_project": None}
+    defaults.update(manifest.get("defaults", {}))
+
+    pairs = []
+    for number, entry in enumerate(manifest.get("pairs", []), 1):
+        pair = dict(defaults, **entry)
+        if any("/" not in str(pair.get(key, "")) for key in ("source", "dest")):
+            print(f"❌ Manifest pair {number} needs 'source' and 'dest' as owner/repo: {entry}")
+            return None
+        if pair["issues"] and not pair["project"]:
+            print(f"❌ Manifest pair {number} copies issues but has no 'project': {entry}")
+            return None
+        try:
+            pair["priority"] = parse_priority(pair["priority"]) if pair["priority"] else None
+        except ValueError as e:
+            print(f"❌ Manifest pair {number}: {e}")
+            return None
+        pair["name"] = f"{pair['source']} -> {pair['dest']}"
+        pairs.append(pair)
+
+    if not pairs:
+        print(f"❌ Manifest {path} lists no pairs")
+        return None
+    return pairs
+
+
+class Progress:
+    """Per-pair progress shared between the migration threads and the reporter."""
+
+    def __init__(self, pairs):
+        self.lock = threading.Lock()
+        self.pairs = {pair["name"]: {"state": "queued", "issues": None, "prs": None, "hot_set": None, "error": None}
+                      for pair in pairs}
+
+    def set(self, name, **values):
+        with self.lock:
+            self.pairs[name].update(values)
+
+    def counter(self, name, kind):
+        """Return a `progress(finished, listed)` callback for one pair and kind."""
+        return lambda finished, listed: self.set(name, **{kind: (finished, listed)})
+
+    def report(self):
+        with self.lock:
+            pairs = {name: dict(status) for name, status in self.pairs.items()}
+
+        print("📈 Migration progress:")
+        for name, status in pairs.items():
+            parts = [status["state"]]
+            for kind in ("issues", "prs"):
+                if status[kind]:
+                    parts.append(f"{kind} {status[kind][0]}/{status[kind][1]}")
+            if status["hot_set"] is not None:
+                parts.append(f"hot set of {status['hot_set']} complete")
+            if status["error"]:
+                parts.append(status["error"])
+            print(f"   {name}: {', '.join(parts)}")
+
+        budgets = scheduler.snapshot()
+        print("   Budget: " + ", ".join(
+            f"{resource} {budget['remaining']}/{budget['limit']}" for resource, budget in budgets.items()
+            if budget["remaining"] is not None
+        ))
+        print("   Concurrency: " + ", ".join(
+            f"{name} {limit}" for name, limit in scheduler.concurrency_limits().items()
+        ))
+
+
+def migrate_pair(pair, copy_issues_script, copy_prs_script, progress, journal_path, sync):
+    """Copy the issues and PRs of one manifest pair."""
+    name = pair["name"]
+    source_owner, source_repo = pair["source"].split("/", 1)
+    dest_owner, dest_repo = pair["dest"].split("/", 1)
+    progress.set(name, state="running")
+    results = {}
+
+    try:
+        if pair["issues"]:
+            options = {key: pair[key] for key in ("workers", "batch_size", "lean", "sharded", "adopt_unmarked")
+                       if pair[key]}
+            results["issues"] = copy_issues_script.copy_issues(
+                journal_path=journal_path, sync=sync,
+                source_owner=source_owner, source_repo=source_repo,
+                dest_owner=dest_owner, dest_repo=dest_repo,
+                project_id=pair["project"], source_project_id=pair["source_project"],
+                progress=progress.counter(name, "issues"), priority=pair["priority"],
+                on_hot_set_complete=lambda count: progress.set(name, hot_set=count), **options,
+            )
+        if pair["prs"]:
+            results["prs"] = copy_prs_script.copy_pull_requests(
+                journal_path=journal_path, sync=sync,
+                source_owner=source_owner, source_repo=source_repo,
+                dest_owner=dest_owner, dest_repo=dest_repo,
+                progress=progress.counter(name, "prs"), sharded=pair["sharded"], mirror=pair["mirror_branches"],
+                adopt_unmarked=pair["adopt_unmarked"],
+            )
+    except Exception as e:
+        print(f"❌ Error migrating {name}: {e}")
+        progress.set(name, state="failed", error=str(e))
+        return results
+
+    complete = all(
+        result["complete"] and result["copied"] == result["listed"]
+        and not result.get("field_failures") and not result.get("comment_failures")
+        for result in results.values()
+    )
+    progress.set(name, state="done" if complete else "incomplete")
+    return results
+
+
+def migrate_repos(pairs, parallel=DEFAULT_PARALLEL, journal_path=DEFAULT_JOURNAL, sync=False):
+    """Migrate every manifest pair, `parallel` pairs at a time.
+
+    All pairs run in this process, so they share one rate-limit scheduler and
+    draw on the same REST and GraphQL budgets and content-creation pacing. The
+    journal records each pair separately, so an interrupted run resumes every
+    pair where it stopped. Progress is reported every PROGRESS_INTERVAL seconds.
+    """
+    copy_issues_script = load_script("copy-issues")
+    copy_prs_script = load_script("copy-prs")
+    progress = Progress(pairs)
+
+    finished = threading.Event()
+
+    def reporter():
+        while not finished.wait(PROGRESS_INTERVAL):
+            progress.report()
+
+    threading.Thread(target=reporter, name="progress", daemon=True).start()
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = {
+            pair["name"]: executor.submit(migrate_pair, pair, copy_issues_script, copy_prs_script, progress,
+                                          journal_path, sync)
+            for pair in pairs
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    finished.set()
+
+    progress.report()
+    print(f"✅ Migrated {len(pairs)} repository pairs in {(time.time() - started) / 60:.1f} min")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy issues and PRs for every repository pair in a manifest.")
+    parser.add_argument("manifest", help="JSON manifest listing source -> destination repository and project pairs")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL,
+                        help="Repository pairs migrated at the same time (default: %(default)s)")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL,
+                        help="SQLite journal used to resume interrupted runs (default: %(default)s)")
+    parser.add_argument("--sync", action="store_true",
+                        help="Only copy or update issues and PRs changed since the last sync")
+    parser.add_argument("--metrics-json",
+                        help="Write per-endpoint call metrics and rate-limit budgets to this JSON file at the end")
+    parser.add_argument("--metrics-textfile",
+                        help="Keep a Prometheus textfile with the same metrics up to date during the run")
+    args = parser.parse_args()
+    metrics.configure(textfile=args.metrics_textfile)
+
+    manifest_pairs = load_manifest(args.manifest)
+    if manifest_pairs:
+        try:
+            migrate_repos(manifest_pairs, parallel=max(1, args.parallel), journal_path=args.journal, sync=args.sync)
+        finally:
+            metrics.finish(json_path=args.metrics_json)
@@ -0,0 +1,172 @@
+import math
+import time
+
+from comments import COMMENT_BATCH_SIZE, COMMENT_PAGE_SIZE
+from field_batch import VERIFY_PAGE_SIZE
+from github_client import rest
+from rate_limit import CONTENT_CREATION_PER_MINUTE
+
+# Typical round trip of one API call, in seconds, used for wall time estimates
+ESTIMATED_LATENCY = 0.5
+
+
+def get_rate_limit():
+    """Return the current REST ("core") and GraphQL budgets. This call is not rate limited."""
+    data = rest("GET", "/rate_limit", error="fetching rate limit")
+    if data is None:
+        return {}
+    resources = data.get("resources", {})
+    return {resource: resources[resource] for resource in ("core", "graphql") if resource in resources}
+
+
+def compile_translation(source_fields, target_fields):
+    """Build the source -> target translation table for project fields.
+
+    Returns field name -> {"type", "source_id", "target_id", "values", "unmapped"},
+    where `values` maps single select option names or iteration titles in the
+    source project to their IDs in the target project, and `unmapped` lists the
+    source names that have no counterpart. Fields only the target has are kept
+    with empty maps so the caller can see them.
+    """
+    table = {}
+    for name, target in target_fields.items():
+        source = source_fields.get(name) or {}
+        entry = {
+            "type": target["type"],
+            "source_id": source.get("id"),
+            "target_id": target["id"],
+            "values": {},
+            "unmapped": [],
+        }
+
+        if target["type"] == "ProjectV2SingleSelectField":
+            source_names = source.get("options", {})
+            target_ids = target.get("options", {})
+        elif target["type"] == "ProjectV2IterationField":
+            source_names = source.get("iterations", {})
+            target_ids = {title: iteration["id"] for title, iteration in target.get("iterations", {}).items()}
+        else:
+            source_names, target_ids = {}, {}
+
+        for value_name in source_names:
+            if value_name in target_ids:
+                entry["values"][value_name] = target_ids[value_name]
+            else:
+                entry["unmapped"].append(value_name)
+
+        table[name] = entry
+    return table
+
+
+def translate_value(entry, source_value, source_iterations):
+    """Resolve one source field value through a translation table entry.
+
+    Returns `(source_name, target_id)`; `target_id` is None when the value will
+    not map, mirroring the warnings copy_issues() prints mid-run.
+    """
+    if entry["type"] == "ProjectV2IterationField":
+        if isinstance(source_value, dict) and "title" in source_value:
+            title = source_value["title"]
+        else:
+            iteration_id = source_value if isinstance(source_value, str) else (source_value or {}).get("id")
+            title = source_iterations.get(iteration_id)
+        if not title:
+            return source_value, None  # Could not determine the iteration's title
+        return title, entry["values"].get(title)
+
+    if entry["type"] == "ProjectV2SingleSelectField":
+        return source_value, entry["values"].get(source_value)
+
+    return source_value, None
+
+
+def estimate_comment_queries(comment_counts):
+    """Estimate the GraphQL reads comments.fetch_comments() needs for threads of `comment_counts` comments."""
+    threads = [count for count in comment_counts if count]
+    extra_pages = sum(math.ceil(count / COMMENT_PAGE_SIZE) - 1 for count in threads)
+    return math.ceil(len(threads) / COMMENT_BATCH_SIZE) + math.ceil(extra_pages / COMMENT_BATCH_SIZE)
+
+
+def estimate_migration(issues, field_updates, batch_size, workers, budgets, listing_pages,
+                       prefetch_pages, comments=0, comment_queries=0, setup_pages=0, label_creates=0):
+    """Estimate the API calls, GraphQL cost and wall time of a copy_issues() run.
+
+    `budgets` is the output of get_rate_limit(). `comments` are posted after
+    `comment_queries` reads (see estimate_comment_queries()). `setup_pages` are
+    the REST pages read before copying starts - the destination issue index and
+    label listing - and `label_creates` the labels created in the destination.
+    Content-creating requests are paced at GitHub's secondary limit, reads,
+    comments and project adds are spread over `workers` threads, and any budget
+    shortfall adds the wait until it resets.
+    """
+    mutation_batches = math.ceil(field_updates / batch_size) if field_updates else 0
+    # List, set up, create labels, then one create per issue and one POST per comment
+    rest_calls = listing_pages + setup_pages + label_creates + issues + comments
+    verify_pages = math.ceil(issues / VERIFY_PAGE_SIZE) if field_updates else 0
+    # Project items, the schema unless cached, comments, verification
+    graphql_queries = prefetch_pages + 1 + comment_queries + verify_pages
+    graphql_mutations = issues + mutation_batches  # One add-to-project per issue, plus field batches
+    graphql_points = graphql_queries + issues + field_updates
+
+    content_writes = label_creates + issues + comments + graphql_mutations
+    content_seconds = content_writes / CONTENT_CREATION_PER_MINUTE * 60
+    latency_seconds = (
+        (label_creates + issues) * ESTIMATED_LATENCY  # Labels and issues are created serially
+        + (rest_calls - label_creates - issues + graphql_queries + graphql_mutations) * ESTIMATED_LATENCY / workers
+    )
+
+    wait_seconds = 0
+    now = time.time()
+    for resource, needed in (("core", rest_calls), ("graphql", graphql_points)):
+        budget = budgets.get(resource)
+        if not budget or needed <= budget["remaining"]:
+            continue
+        shortfall = needed - budget["remaining"]
+        wait_seconds = max(
+            wait_seconds,
+            max(budget["reset"] - now, 0) + (shortfall // budget["limit"]) * 3600,
+        )
+
+    return {
+        "rest_calls": rest_calls,
+        "graphql_queries": graphql_queries,
+        "graphql_mutations": graphql_mutations,
+        "graphql_points": graphql_points,
+        "content_writes": content_writes,
+        "comments": comments,
+        "label_creates": label_creates,
+        "seconds": max(content_seconds, latency_seconds) + wait_seconds,
+        "budget_wait_seconds": wait_seconds,
+    }
+
+
+def print_plan(table, unmapped_values, issues, field_updates, estimate, budgets):
+    """Print a migration plan produced by copy-issues.py --plan."""
+    print("🗺️ Field translation table:")
+    for name, entry in table.items():
+        if entry["source_id"] is None:
+            print(f"   {name}: only exists in the target project, nothing to copy")
+            continue
+        print(f"   {name} ({entry['type']}): {len(entry['values'])} values map")
+        for value_name in entry["unmapped"]:
+            print(f"      ⚠️ '{value_name}' has no match in the target project")
+
+    if unmapped_values:
+        print(f"⚠️ {len(unmapped_values)} issue field values will not be copied:")
+        for issue_number, field_name, value_name in unmapped_values:
+            print(f"   #{issue_number} {field_name}: '{value_name}'")
+    else:
+        print("✅ Every issue field value maps to the target project")
+
+    for resource, budget in budgets.items():
+        print(f"📊 {resource} budget: {budget['remaining']}/{budget['limit']} remaining")
+
+    print(f"📋 {issues} issues, {estimate['comments']} comments, {field_updates} field updates, "
+          f"{estimate['label_creates']} labels to create")
+    print(f"   REST calls: {estimate['rest_calls']}")
+    print(f"   GraphQL queries: {estimate['graphql_queries']}, mutations: {estimate['graphql_mutations']}, "
+          f"~{estimate['graphql_points']} points")
+    print(f"   Content-creating requests: {estimate['content_writes']}")
+    if estimate["budget_wait_seconds"]:
+        print(f"   ⏳ Includes {estimate['budget_wait_seconds'] / 60:.0f} min waiting for rate limits to reset")
+    print(f"⏱️ Estimated wall time: {estimate['seconds'] / 60:.1f} min")
@@ -0,0 +1,82 @@
+import queue
+import threading
+
+# Sentinel pushed down the queues once a stage has no more work
+_DONE = object()
+
+
+def run_pipeline(items, stages, queue_size=100):
+    """Run items through a list of stages, each with its own bounded worker pool.
+
+    `stages` is a list of `(name, func, workers)` tuples. Each `func` receives the
+    value returned by the previous stage and returns the value handed to the next
+    one, or None to drop the item. An item only enters a stage once the previous
+    stage has finished with it, so per-item ordering always holds. Queues between
+    stages are bounded, so a slow stage applies back-pressure instead of buffering
+    the whole repository in memory.
+
+    Returns the values produced by the final stage.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    threads = []
+
+    def feed():
+        try:
+            for item in items:
+                queues[0].put(item)
+        except Exception as e:
+            print(f"❌ Error reading pipeline input: {e}")
+        finally:
+            for _ in range(stages[0][2]):
+                queues[0].put(_DONE)
+
+    def make_worker(index, name, func):
+        in_queue = queues[index]
+        out_queue = queues[index + 1]
+        next_workers = stages[index + 1][2] if index + 1 < len(stages) else 1
+        remaining = {"workers": stages[index][2]}
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                item = in_queue.get()
+                if item is _DONE:
+                    break
+                try:
+                    result = func(item)
+                except Exception as e:
+                    print(f"❌ Error in {name} stage: {e}")
+                    continue
+                if result is not None:
+                    out_queue.put(result)
+
+            # The last worker out tells the next stage that no more work is coming
+            with lock:
+                remaining["workers"] -= 1
+                last = remaining["workers"] == 0
+            if last:
+                for _ in range(next_workers):
+                    out_queue.put(_DONE)
+
+        return work
+
+    threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+    for index, (name, func, workers) in enumerate(stages):
+        work = make_worker(index, name, func)
+        for n in range(workers):
+            threads.append(threading.Thread(target=work, name=f"pipeline-{name}-{n}", daemon=True))
+
+    for thread in threads:
+        thread.start()
+
+    results = []
+    while True:
+        item = queues[-1].get()
+        if item is _DONE:
+            break
+        results.append(item)
+
+    for thread in threads:
+        thread.join()
+
+    return results
@@ -0,0 +1,85 @@
+import time
+from datetime import datetime
+
+# Project field the `status:` rule reads
+STATUS_FIELD = "Status"
+
+RULE_HELP = ("Comma-separated rules, most important first: 'open' (open before closed), 'recent' (most recently "
+             "updated first), 'recent:<days>' (updated in the last <days> days first), 'label:<name>' and "
+             "'status:<project status>'. Items matching the first rule are the hot set.")
+
+
+def parse_priority(spec):
+    """Turn a rule string such as "open,label:bug,recent" into a list of (kind, value) rules.
+
+    Raises ValueError for an unknown or malformed rule.
+    """
+    rules = []
+    for rule in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, value = rule.partition(":")
+        if kind == "open" and not value:
+            rules.append(("open", None))
+        elif kind == "recent" and not value:
+            rules.append(("recent", None))
+        elif kind == "recent" and value.isdigit():
+            rules.append(("recent", int(value)))
+        elif kind in ("label", "status") and value:
+            rules.append((kind, value))
+        else:
+            raise ValueError(f"Unknown priority rule '{rule}'. {RULE_HELP}")
+    return rules
+
+
+def _updated(item):
+    return datetime.fromisoformat(item["updated_at"].replace("Z", "+00:00")).timestamp()
+
+
+def _matches(kind, value, item, fields, now):
+    if kind == "open":
+        return item["state"] == "open"
+    if kind == "recent":
+        return now - _updated(item) <= value * 86400
+    if kind == "label":
+        return any(label["name"] == value for label in item.get("labels", []))
+    return fields.get(STATUS_FIELD) == value
+
+
+def priority_key(item, rules, fields=None, now=None):
+    """Sort key putting items that match earlier rules first; `fields` are the item's project field values."""
+    fields = fields or {}
+    now = now or time.time()
+    key = []
+    for kind, value in rules:
+        if kind == "recent" and value is None:
+            key.append(-_updated(item))
+        else:
+            key.append(0 if _matches(kind, value, item, fields, now) else 1)
+    return tuple(key)
+
+
+def is_hot(item, rules, fields=None, now=None):
+    """Whether an item matches the first rule. A plain 'recent' rule orders items but has no hot set."""
+    if not rules or rules[0] == ("recent", None):
+        return False
+    kind, value = rules[0]
+    return _matches(kind, value, item, fields or {}, now or time.time())
+
+
+def prioritize(items, rules, field_index=None, hot=None):
+    """Yield `items` in priority order, adding the numbers of hot-set items to `hot`.
+
+    Ordering needs the whole listing, so it is read before the first item is
+    yielded; ties keep the listing order. `field_index` maps item numbers to
+    project field values and may be filled while the listing is read, as a
+    snapshot import does.
+    """
+    listed = list(items)
+    if field_index is None:
+        field_index = {}
+    now = time.time()
+    keyed = sorted(((priority_key(item, rules, field_index.get(item["number"]), now), n, item)
+                    for n, item in enumerate(listed)), key=lambda entry: entry[:2])
+    if hot is not None:
+        hot.update(item["number"] for item in listed if is_hot(item, rules, field_index.get(item["number"]), now))
+    for _, _, item in keyed:
+        yield item
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+from github_client import graphql_data
+
+# Where cached project schemas are stored, one JSON file per project
+CACHE_DIR = os.getenv("PROJECT_SCHEMA_CACHE", os.path.join(".cache", "project-schema"))
+
+# Seconds a cached schema is trusted before it is fetched again
+DEFAULT_TTL = 3600
+
+SCHEMA_QUERY = """
+query($projectId: ID!) {
+  node(id: $projectId) {
+    ... on ProjectV2 {
+      fields(first: 50) {
+        nodes {
+          __typename
+          ... on ProjectV2Field {
+            id
+            name
+            dataType
+          }
+          ... on ProjectV2SingleSelectField {
+            id
+            name
+            dataType
+            options {
+              id
+              name
+            }
+          }
+          ... on ProjectV2IterationField {
+            id
+            name
+            dataType
+            configuration {
+              iterations {
+                id
+                title
+                startDate
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Schemas already loaded by this process, keyed by project ID
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _cache_path(project_id):
+    return os.path.join(CACHE_DIR, f"{project_id}.json")
+
+
+def build_schema(project_id, fields):
+    """Turn ProjectV2 field nodes into a schema with precomputed lookup maps.
+
+    `fields` maps field name -> {"id", "type", "dataType"} plus `options`
+    (option name -> ID) for single select fields and `iterations`
+    (title -> {"id", "startDate"}) for iteration fields. `option_names` and
+    `iteration_titles` map option and iteration IDs back to their names.
+    """
+    schema = {
+        "project_id": project_id,
+        "fetched_at": time.time(),
+        "fields": {},
+        "option_names": {},
+        "iteration_titles": {},
+    }
+
+    for field in fields:
+        # Skip empty or malformed fields
+        if not field or "id" not in field or "name" not in field or "dataType" not in field:
+            print(f"⚠️ Skipping invalid field: {field}")
+            continue
+
+        field_data = {
+            "id": field["id"],
+            "type": field["__typename"],
+            "dataType": field["dataType"],
+        }
+
+        # Handle single select fields
+        if field["__typename"] == "ProjectV2SingleSelectField":
+            field_data["options"] = {opt["name"]: opt["id"] for opt in field.get("options", [])}
+            for name, option_id in field_data["options"].items():
+                schema["option_names"][option_id] = name
+
+        # Handle iteration fields
+        elif field["__typename"] == "ProjectV2IterationField":
+            iterations = {}
+
+            for iteration in field.get("configuration", {}).get("iterations", []):
+                iterations[iteration["title"]] = {
+                    "id": iteration["id"],
+                    "startDate": iteration["startDate"]
+                }
+                schema["iteration_titles"][iteration["id"]] = iteration["title"]
+
+            field_data["iterations"] = iterations
+
+        schema["fields"][field["name"]] = field_data
+
+    return schema
+
+
+def fetch_project_schema(project_id):
+    """Query a ProjectV2's fields, options and iterations and build its schema."""
+    data = graphql_data({"query": SCHEMA_QUERY, "variables": {"projectId": project_id}})
+    if data is None:
+        return None
+
+    if not data.get("node"):
+        print(f"❌ Unexpected API response: {data}")
+        return None
+
+    return build_schema(project_id, data["node"]["fields"]["nodes"])
+
+
+def load_project_schema(project_id, ttl=DEFAULT_TTL, refresh=False):
+    """Return a project's schema from memory, the on-disk cache or the API, in that order.
+
+    Cached schemas older than `ttl` seconds, or any cached schema when `refresh`
+    is set, are fetched again. Returns None if the schema could not be fetched.
+    """
+    with _lock:
+        schema = _loaded.get(project_id)
+        if schema and not refresh and time.time() - schema["fetched_at"] < ttl:
+            return schema
+
+        path = _cache_path(project_id)
+        if not refresh and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    schema = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable schema cache {path}: {e}")
+                schema = None
+            if schema and time.time() - schema["fetched_at"] < ttl:
+                _loaded[project_id] = schema
+                print(f"📂 Using cached schema for project {project_id}")
+                return schema
+
+        schema = fetch_project_schema(project_id)
+        if schema is None:
+            return None
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(schema, f, indent=2)
+        _loaded[project_id] = schema
+        return schema
+
+
+def invalidate_project_schema(project_id=None):
+    """Drop the cached schema for one project, or for every project."""
+    with _lock:
+        project_ids = [project_id] if project_id else list(_loaded)
+        if not project_id and os.path.isdir(CACHE_DIR):
+            project_ids += [name[:-len(".json")] for name in os.listdir(CACHE_DIR) if name.endswith(".json")]
+
+        for pid in set(project_ids):
+            _loaded.pop(pid, None)
+            path = _cache_path(pid)
+            if os.path.exists(path):
+                os.remove(path)
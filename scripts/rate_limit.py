@@ -0,0 +1,327 @@
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+# GitHub's documented secondary limit for content-creating requests
+CONTENT_CREATION_PER_MINUTE = 80
+
+# Largest burst of content-creating requests allowed before pacing kicks in
+CONTENT_CREATION_BURST = 10
+
+# Retries for 403/429 secondary-limit responses before giving up
+MAX_RETRIES = 5
+
+# First backoff when GitHub sends no Retry-After header; doubles on each retry
+BASE_BACKOFF = 60
+
+# Requests in flight at the start of a run and at most, per class: REST GETs, GraphQL
+# queries, REST creates and edits, and GraphQL mutations. GraphQL queries are their own
+# class because a 100-alias query takes far longer than a REST GET, so sharing one
+# latency baseline would read the mix as rising latency. Reads stop at the client's
+# keep-alive pool size (github_client.POOL_SIZE).
+INITIAL_CONCURRENCY = {"read": 8, "query": 4, "create": 2, "mutation": 2}
+MAX_CONCURRENCY = {"read": 32, "query": 16, "create": 16, "mutation": 16}
+
+# Multiplier applied to a class's concurrency on a secondary rate limit, and on rising latency
+SECONDARY_LIMIT_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.8
+
+# Latency counts as rising once its short-term average exceeds the baseline by this factor
+LATENCY_TOLERANCE = 2.0
+
+# Weights of each new sample in the short-term and baseline latency averages
+FAST_LATENCY_WEIGHT = 0.3
+BASELINE_LATENCY_WEIGHT = 0.02
+
+
+class TokenBucket:
+    """Simple blocking token bucket."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take tokens from the bucket, sleeping until enough are available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """Caps requests in flight, adjusting the cap with AIMD (additive increase, multiplicative decrease).
+
+    Each completed request that used the whole window raises the cap by
+    1/cap, about one more request per round trip, while latency stays
+    stable. A secondary rate limit cuts it by SECONDARY_LIMIT_BACKOFF, and
+    latency rising above LATENCY_TOLERANCE times its baseline by
+    LATENCY_BACKOFF. Responses to requests sent before the last cut do not cut
+    it again, so one burst of 403s halves the cap once rather than once per
+    request.
+    """
+
+    def __init__(self, name, initial, maximum, on_change=None):
+        self.name = name
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.in_flight = 0
+        self.fast_latency = None
+        self.baseline_latency = None
+        self.cut_at = 0.0
+        self.on_change = on_change
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot; returns a ticket to pass to release()."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            return {"start": time.monotonic(), "saturated": self.in_flight >= int(self.limit)}
+
+    def release(self, ticket, secondary_limited=False):
+        """Free a slot and adjust the cap from how the request went."""
+        latency = time.monotonic() - ticket["start"]
+        with self.condition:
+            self.in_flight -= 1
+            before = int(self.limit)
+            reason = None
+
+            if secondary_limited:
+                reason = "a secondary rate limit"
+                factor = SECONDARY_LIMIT_BACKOFF
+            else:
+                if self.baseline_latency is None:
+                    self.fast_latency = self.baseline_latency = latency
+                else:
+                    self.fast_latency += FAST_LATENCY_WEIGHT * (latency - self.fast_latency)
+                    self.baseline_latency += BASELINE_LATENCY_WEIGHT * (latency - self.baseline_latency)
+                if self.fast_latency > LATENCY_TOLERANCE * self.baseline_latency:
+                    reason = "rising latency"
+                    factor = LATENCY_BACKOFF
+
+            if reason and ticket["start"] >= self.cut_at:
+                self.limit = max(1.0, self.limit * factor)
+                self.cut_at = time.monotonic()
+                if reason == "rising latency":
+                    # Settle on the slower latency rather than cutting again on every response
+                    self.baseline_latency = self.fast_latency
+            elif not reason and ticket["saturated"]:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+            after = int(self.limit)
+            self.condition.notify_all()
+
+        if after < before:
+            print(f"⏳ Cut {self.name} concurrency from {before} to {after} after {reason}")
+        if after != before and self.on_change:
+            self.on_change(self.name, after)
+
+
+class RateLimitScheduler:
+    """Paces GitHub API requests using the budgets GitHub reports back.
+
+    The REST ("core") and GraphQL budgets are tracked separately from the
+    `X-RateLimit-*` headers and from any `rateLimit { cost remaining resetAt }`
+    object a GraphQL query selects. Requests only sleep when a budget is exhausted;
+    content-creating requests additionally pass through a token bucket sized to
+    GitHub's secondary limits. 403/429 secondary-limit responses are retried
+    after `Retry-After`, or with exponential backoff when it is missing.
+
+    Requests in flight are capped per class - REST reads, GraphQL queries, REST
+    creates and GraphQL mutations - by an AdaptiveLimit each, so every run finds
+    how much concurrency GitHub tolerates. The caps only limit the threads
+    making requests; callers that should run at the discovered rate start up
+    to MAX_CONCURRENCY threads for the class and let the cap hold the rest back.
+
+    When `pool` is a CredentialPool of several credentials, budgets are tracked
+    per credential and requests only wait once every credential has run out.
+    """
+
+    def __init__(self, content_per_minute=CONTENT_CREATION_PER_MINUTE, burst=CONTENT_CREATION_BURST,
+                 max_retries=MAX_RETRIES):
+        self.budgets = {
+            "core": {"limit": None, "remaining": None, "reset": None},
+            "graphql": {"limit": None, "remaining": None, "reset": None},
+        }
+        self.content_bucket = TokenBucket(content_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.concurrency = {
+            name: AdaptiveLimit(name, INITIAL_CONCURRENCY[name], MAX_CONCURRENCY[name])
+            for name in INITIAL_CONCURRENCY
+        }
+        self.lock = threading.Lock()
+        self.pool = None  # CredentialPool, when requests are spread over several credentials
+
+    def request(self, method, url, send=None, **kwargs):
+        """Send a request, waiting for budget and retrying rate-limit responses.
+
+        `send` performs the HTTP call (e.g. a `requests.Session.request`) and
+        defaults to `requests.request`.
+        """
+        send = send or requests.request
+        resource = resource_for(url)
+        creates_content = is_content_creation(method, resource, kwargs.get("json"))
+        limit = self.concurrency[request_class(method, resource, kwargs.get("json"))]
+
+        for attempt in range(self.max_retries + 1):
+            self.wait_for_budget(resource)
+            if creates_content:
+                self.content_bucket.acquire()
+
+            ticket = limit.acquire()
+            try:
+                response = send(method, url, **kwargs)
+            except Exception:
+                limit.release(ticket)
+                raise
+            limit.release(ticket, secondary_limited=is_secondary_limited(response))
+            self.update(response, resource)
+
+            delay = self.retry_delay(response, resource, attempt)
+            if delay is None or attempt == self.max_retries:
+                return response
+
+            print(f"⏳ Rate limited ({response.status_code}) on {method} {url}, retrying in {delay:.0f}s")
+            time.sleep(delay)
+
+        return response
+
+    def wait_for_budget(self, resource):
+        """Sleep until the budget resets if it has been used up."""
+        if self.pool is not None and len(self.pool) > 1:
+            # Budgets are per credential, so only wait when all of them are spent
+            wait = self.pool.wait_time(resource)
+            if wait > 0:
+                print(f"⏳ {resource} rate limit exhausted on every credential, sleeping {wait:.0f}s until reset")
+                time.sleep(wait)
+            return
+
+        with self.lock:
+            budget = self.budgets[resource]
+            if budget["remaining"] is None or budget["remaining"] > 0 or not budget["reset"]:
+                return
+            wait = budget["reset"] - time.time() + 1
+
+        if wait > 0:
+            print(f"⏳ {resource} rate limit exhausted, sleeping {wait:.0f}s until reset")
+            time.sleep(wait)
+
+        with self.lock:
+            # Let the next response re-populate the budget
+            budget["remaining"] = None
+
+    def update(self, response, resource=None):
+        """Record the budget reported by a response."""
+        headers = response.headers
+        resource = headers.get("X-RateLimit-Resource", resource)
+        if resource not in self.budgets:
+            return
+
+        with self.lock:
+            budget = self.budgets[resource]
+            if "X-RateLimit-Remaining" in headers:
+                budget["remaining"] = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Limit" in headers:
+                budget["limit"] = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Reset" in headers:
+                budget["reset"] = int(headers["X-RateLimit-Reset"])
+
+        if resource == "graphql" and b'"rateLimit"' in response.content:
+            try:
+                rate_limit = (response.json().get("data") or {}).get("rateLimit")
+            except ValueError:
+                rate_limit = None
+            if rate_limit:
+                self.update_graphql(rate_limit)
+
+    def update_graphql(self, rate_limit):
+        """Record a GraphQL `rateLimit { cost remaining resetAt }` object."""
+        with self.lock:
+            budget = self.budgets["graphql"]
+            if rate_limit.get("remaining") is not None:
+                budget["remaining"] = rate_limit["remaining"]
+            if rate_limit.get("resetAt"):
+                reset_at = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00"))
+                budget["reset"] = int(reset_at.timestamp())
+
+    def retry_delay(self, response, resource, attempt):
+        """Return how long to wait before retrying a response, or None if it should not be retried."""
+        if response.status_code not in (403, 429) and not is_graphql_rate_limited(response, resource):
+            return None
+
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+
+        if response.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in response.headers:
+            if self.pool is not None and len(self.pool) > 1:
+                return self.pool.wait_time(resource)  # Retry straight away on another credential if one has budget
+            return max(int(response.headers["X-RateLimit-Reset"]) - time.time() + 1, 1)
+
+        if response.status_code == 403 and "secondary rate limit" not in response.text.lower():
+            return None  # A genuine permissions error
+
+        return BASE_BACKOFF * (2 ** attempt)
+
+    def snapshot(self):
+        """Return a copy of the current budgets."""
+        with self.lock:
+            return {resource: dict(budget) for resource, budget in self.budgets.items()}
+
+    def concurrency_limits(self):
+        """Return the current cap on requests in flight for each request class."""
+        return {name: int(limit.limit) for name, limit in self.concurrency.items()}
+
+
+def resource_for(url):
+    """Return the rate-limit resource a URL is billed against."""
+    return "graphql" if url.rstrip("/").endswith("/graphql") else "core"
+
+
+def is_content_creation(method, resource, payload):
+    """Return True for requests that count against the content-creation secondary limit."""
+    if resource == "graphql":
+        query = (payload or {}).get("query", "")
+        return query.lstrip().startswith("mutation")
+    return method.upper() in ("POST", "PATCH", "PUT", "DELETE")
+
+
+def request_class(method, resource, payload):
+    """Return the concurrency class of a request: "read" or "create" (REST), "query" or "mutation" (GraphQL)."""
+    if resource == "graphql":
+        return "mutation" if is_content_creation(method, resource, payload) else "query"
+    return "create" if is_content_creation(method, resource, payload) else "read"
+
+
+def is_secondary_limited(response):
+    """Return True for a 403/429 secondary rate limit, as opposed to a spent budget or a permissions error."""
+    if response.status_code not in (403, 429) or response.headers.get("X-RateLimit-Remaining") == "0":
+        return False
+    return "Retry-After" in response.headers or "secondary rate limit" in response.text.lower()
+
+
+def is_graphql_rate_limited(response, resource):
+    """Return True for a GraphQL 200 response that reports a RATE_LIMITED error."""
+    if resource != "graphql" or response.status_code != 200 or b"RATE_LIMITED" not in response.content:
+        return False
+    try:
+        errors = response.json().get("errors") or []
+    except ValueError:
+        return False
+    return any(error.get("type") == "RATE_LIMITED" for error in errors)
+
+
+# Shared by every script in the process so all requests draw on the same budgets
+scheduler = RateLimitScheduler()
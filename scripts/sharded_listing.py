@@ -0,0 +1,109 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import GitHubError, graphql, rest
+from issue_records import RECORD_FIELDS, IssueRecord
+from labels import get_labels
+from rate_limit import MAX_CONCURRENCY
+
+# Issue numbers looked up per GraphQL query
+SHARD_SIZE = 100
+
+# Threads fetching shards by default; the scheduler's adaptive cap on GraphQL queries decides how many are in flight
+DEFAULT_SHARD_WORKERS = MAX_CONCURRENCY["query"]
+
+# GraphQL type of each kind of item; issues and PRs share one number sequence
+ITEM_TYPENAMES = {"issue": "Issue", "pr": "PullRequest"}
+
+
+def get_highest_number(owner, repo):
+    """Return the number of a repository's newest issue or PR, or 0 if it has none.
+
+    Issues transferred in later get a higher number but keep their creation
+    date, so this is where a listing starts probing rather than a hard limit.
+    """
+    newest = rest("GET", f"/repos/{owner}/{repo}/issues", error="finding the newest issue",
+                  params={"state": "all", "sort": "created", "direction": "desc", "per_page": 1})
+    if newest is None:
+        raise GitHubError(f"Error finding the newest issue in {owner}/{repo}")
+    return newest[0]["number"] if newest else 0
+
+
+def _shard_query(numbers):
+    """Build a query looking up every number in `numbers`, aliased n<number>."""
+    lookups = [
+        f"    n{number}: issueOrPullRequest(number: {number}) {{\n      __typename\n"
+        f"      ... on Issue {{{RECORD_FIELDS}}}\n      ... on PullRequest {{{RECORD_FIELDS}}}\n    }}"
+        for number in numbers
+    ]
+    return ("query($owner: String!, $repo: String!) {\n  repository(owner: $owner, name: $repo) {\n"
+            + "\n".join(lookups) + "\n  }\n}")
+
+
+def _fetch_shard(owner, repo, numbers, typename, label_table):
+    """Return `(records, found)`: the shard's items of `typename`, and whether any number in it exists."""
+    response_json = graphql({"query": _shard_query(numbers), "variables": {"owner": owner, "repo": repo}})
+    if response_json is None:
+        raise GitHubError(f"Error listing #{numbers[0]}-#{numbers[-1]} of {owner}/{repo}")
+
+    # Numbers of deleted or transferred items are reported as NOT_FOUND; anything else is a failure
+    errors = [error for error in response_json.get("errors", []) if error.get("type") != "NOT_FOUND"]
+    repository = (response_json.get("data") or {}).get("repository")
+    if errors or repository is None:
+        print(f"❌ Error listing #{numbers[0]}-#{numbers[-1]} of {owner}/{repo}: {errors or response_json}")
+        raise GitHubError(f"Error listing #{numbers[0]}-#{numbers[-1]} of {owner}/{repo}")
+
+    nodes = [repository.get(f"n{number}") for number in numbers]
+    records = [IssueRecord.from_node(node, label_table) for node in nodes if (node or {}).get("__typename") == typename]
+    return records, any(nodes)
+
+
+def list_sharded(owner, repo, kind="issue", workers=DEFAULT_SHARD_WORKERS):
+    """Stream a repository's issues or PRs as IssueRecords in number order, fetching shards concurrently.
+
+    Issues and PRs share one number sequence, so the range up to the newest
+    number is split into shards of SHARD_SIZE numbers, each looked up with
+    one aliased GraphQL query. Up to `workers` shards are in flight at once, as
+    many as the scheduler's adaptive cap on GraphQL queries allows, but
+    results are yielded strictly in number order, and no more than twice
+    `workers` shards are held ahead of the consumer. Every request still goes
+    through the shared rate-limit scheduler. `kind` is "issue" or "pr".
+
+    The newest number is taken from the most recently created item, which
+    misses issues transferred in later. Shards past it are therefore read one
+    at a time until one holds no issue or PR at all.
+    Raises GitHubError if a shard cannot be read.
+    """
+    typename = ITEM_TYPENAMES[kind]
+    highest = get_highest_number(owner, repo)
+    # Label colours and descriptions, read once instead of on every item
+    label_table = {label["name"]: label for label in get_labels(owner, repo)}
+
+    shards = (list(range(start, min(start + SHARD_SIZE, highest + 1)))
+              for start in range(1, highest + 1, SHARD_SIZE))
+    print(f"📦 Listing {owner}/{repo} #1-#{highest} in {-(-highest // SHARD_SIZE)} shards, {workers} at a time")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard") as executor:
+        pending = deque()
+        try:
+            for numbers in shards:
+                pending.append(executor.submit(_fetch_shard, owner, repo, numbers, typename, label_table))
+                if len(pending) < 2 * workers:
+                    continue
+                yield from pending.popleft().result()[0]
+            while pending:
+                yield from pending.popleft().result()[0]
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # Transferred-in issues are numbered past the newest created one
+    start = highest + 1
+    while True:
+        records, found = _fetch_shard(owner, repo, list(range(start, start + SHARD_SIZE)), typename, label_table)
+        yield from records
+        if not found:
+            return
+        if start == highest + 1:
+            print(f"📦 Found items past #{highest} in {owner}/{repo}, e.g. transferred issues; reading on")
+        start += SHARD_SIZE
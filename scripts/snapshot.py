@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import time
+
+from github_client import paginate
+from labels import get_labels
+
+# Bumped whenever the record layout changes incompatibly
+SNAPSHOT_VERSION = 1
+
+# Record types holding one issue or PR each; everything written before them is header data
+ITEM_TYPES = ("issue", "pr")
+
+# The `kind` a snapshot's meta record gives for each item type
+SNAPSHOT_KINDS = {"issue": "issues", "pr": "prs"}
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing its header, has an unsupported version or holds the wrong kind of item."""
+
+
+class SnapshotWriter:
+    """Writes a gzip-compressed JSONL snapshot of a source repository.
+
+    Every line is a `{"type": ..., "data": ...}` record. The first is a `meta`
+    record naming the kind of snapshot, the source repository and project;
+    header records such as `labels`, `assignees`, `project_schema` and
+    `iterations` should be written before the `issue` or `pr` records. The file
+    is written under a temporary name and only moved into place by close(), so
+    an interrupted export never looks complete.
+    """
+
+    def __init__(self, path, kind, source, project_id=None):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.counts = {}
+        self.file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        self.write("meta", {
+            "version": SNAPSHOT_VERSION,
+            "kind": kind,
+            "source": source,
+            "project_id": project_id,
+            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        })
+
+    def write(self, record_type, data):
+        self.file.write(json.dumps({"type": record_type, "data": data}, separators=(",", ":")) + "\n")
+        self.counts[record_type] = self.counts.get(record_type, 0) + 1
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_snapshot(path):
+    """Yield the `(type, data)` records of a snapshot, checking its meta record first."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        first = f.readline()
+        meta = json.loads(first) if first else {}
+        if meta.get("type") != "meta":
+            raise SnapshotError(f"{path} is not a snapshot: it has no meta record")
+        if meta["data"].get("version") != SNAPSHOT_VERSION:
+            raise SnapshotError(f"{path} has snapshot version {meta['data'].get('version')}, "
+                                f"expected {SNAPSHOT_VERSION}")
+        yield "meta", meta["data"]
+
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["type"], record["data"]
+
+
+def open_snapshot(path, item_type):
+    """Return `(header, items)` for a snapshot.
+
+    `header` maps each header record type (`meta`, `labels`, ...) to its data.
+    `items` lazily yields the data of every `item_type` record, so issues and
+    PRs are streamed from disk rather than loaded all at once. Raises
+    SnapshotError if the snapshot holds another kind of item, e.g. PRs when
+    issues are asked for.
+    """
+    records = read_snapshot(path)
+    header = {}
+    first_item = None
+    for record_type, data in records:
+        if record_type in ITEM_TYPES:
+            first_item = (record_type, data)
+            break
+        header[record_type] = data
+
+    kind = header["meta"].get("kind")
+    if kind != SNAPSHOT_KINDS[item_type]:
+        raise SnapshotError(f"{path} is a snapshot of {kind}, not {SNAPSHOT_KINDS[item_type]}")
+
+    def items():
+        if first_item and first_item[0] == item_type:
+            yield first_item[1]
+        for record_type, data in records:
+            if record_type == item_type:
+                yield data
+
+    return header, items()
+
+
+def write_repo_metadata(writer, owner, repo):
+    """Write a repository's labels, with colours and descriptions, and its assignable users."""
+    writer.write("labels", get_labels(owner, repo))
+    assignees = paginate(f"/repos/{owner}/{repo}/assignees", error="fetching assignees", params={"per_page": 100})
+    writer.write("assignees", [user["login"] for user in assignees])